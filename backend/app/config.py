@@ -1,6 +1,7 @@
-from sqlalchemy import create_engine, event
+from sqlalchemy import create_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
+from app.engine_profiles import load_profile, engine_options, install_transaction_timeouts, install_sqlite_functions
 import os
 
 # Configuration de la base de données
@@ -15,25 +16,84 @@ DATABASE_URL = os.getenv(
 if DATABASE_URL.startswith("postgres://"):
     DATABASE_URL = DATABASE_URL.replace("postgres://", "postgresql://", 1)
 
-engine = create_engine(
-    DATABASE_URL, 
-    echo=True,
-    pool_pre_ping=True,
-    connect_args={
-        "options": "-c client_encoding=utf8"
-    }
-)
+# SQLite est utilisable en local (recherche en mode repli, sans extensions PostgreSQL)
+IS_SQLITE = DATABASE_URL.startswith("sqlite")
+
+# Profil moteur (DB_PROFILE=development|production|pgbouncer, surcharges DB_*) validé au démarrage
+ENGINE_PROFILE = load_profile()
+
+# Pile asynchrone (optionnelle) : DB_ASYNC=true active AsyncEngine/AsyncSession
+# Les pilotes async sont déduits de DATABASE_URL (asyncpg pour PostgreSQL, aiosqlite pour SQLite)
+DB_ASYNC = os.getenv("DB_ASYNC", "false").lower() in ("1", "true", "yes")
+
+ENGINE_PROFILE.validate(DATABASE_URL, engines=2 if DB_ASYNC else 1)
 
-# Forcer UTF-8 sur CHAQUE connexion
-@event.listens_for(engine, "connect")
-def receive_connect(dbapi_conn, connection_record):
-    cursor = dbapi_conn.cursor()
-    cursor.execute("SET CLIENT_ENCODING TO 'UTF8';")
-    cursor.close()
+# Encodage UTF-8 et timeouts transmis à l'ouverture de la connexion (pas de SET supplémentaire)
+engine = create_engine(DATABASE_URL, **engine_options(ENGINE_PROFILE, DATABASE_URL))
+install_transaction_timeouts(engine, ENGINE_PROFILE)
+install_sqlite_functions(engine)
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 Base = declarative_base()
 
+def to_async_url(url: str) -> str:
+    """Convertir une URL synchrone en URL utilisant un pilote asynchrone"""
+    scheme, _, rest = url.partition("://")
+    dialect = scheme.split("+", 1)[0]
+    driver = "aiosqlite" if dialect == "sqlite" else "asyncpg"
+    return f"{dialect}+{driver}://{rest}"
+
+ASYNC_DATABASE_URL = os.getenv("ASYNC_DATABASE_URL", to_async_url(DATABASE_URL))
+
+async_engine = None
+AsyncSessionLocal = None
+if DB_ASYNC:
+    from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+    
+    async_engine = create_async_engine(ASYNC_DATABASE_URL, **engine_options(ENGINE_PROFILE, ASYNC_DATABASE_URL))
+    install_transaction_timeouts(async_engine.sync_engine, ENGINE_PROFILE)
+    install_sqlite_functions(async_engine.sync_engine)
+    AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False)
+
+# Mode debug : en-têtes X-DB-Queries / X-DB-Time sur chaque réponse
+DEBUG = os.getenv("DEBUG", "false").lower() in ("1", "true", "yes")
+# Budget de requêtes SQL par requête HTTP pour les routes sans budget dédié (dépassement journalisé)
+DB_QUERY_BUDGET = int(os.getenv("DB_QUERY_BUDGET", "10"))
+
+# Cache des produits (lecture par ID) : memory (par processus), redis (partagé) ou none
+PRODUCT_CACHE_BACKEND = os.getenv("PRODUCT_CACHE_BACKEND", "memory").lower()
+PRODUCT_CACHE_TTL = float(os.getenv("PRODUCT_CACHE_TTL", "30"))
+PRODUCT_CACHE_MAXSIZE = int(os.getenv("PRODUCT_CACHE_MAXSIZE", "10000"))
+REDIS_URL = os.getenv("REDIS_URL")
+
+# Événements temps réel (/events) : postgres (LISTEN/NOTIFY, tous les workers), memory (processus courant) ou none
+EVENTS_BACKEND = os.getenv("EVENTS_BACKEND", "memory" if IS_SQLITE else "postgres").lower()
+# Connexion d'écoute (LISTEN) : elle doit garder sa session PostgreSQL, ce que PgBouncer en mode
+# transaction ne garantit pas. Derrière PgBouncer, fournir une URL directe vers PostgreSQL.
+EVENTS_DATABASE_URL = os.getenv("EVENTS_DATABASE_URL") or (None if ENGINE_PROFILE.pgbouncer else DATABASE_URL)
+if EVENTS_DATABASE_URL and EVENTS_DATABASE_URL.startswith("postgres://"):
+    EVENTS_DATABASE_URL = EVENTS_DATABASE_URL.replace("postgres://", "postgresql://", 1)
+# Événements en attente par client ; au-delà, le client reçoit "resync" et doit recharger
+EVENTS_QUEUE_SIZE = int(os.getenv("EVENTS_QUEUE_SIZE", "256"))
+EVENTS_MAX_CLIENTS = int(os.getenv("EVENTS_MAX_CLIENTS", "1000"))
+# Commentaire SSE envoyé en l'absence d'événement (garde la connexion ouverte à travers les proxys)
+EVENTS_HEARTBEAT = float(os.getenv("EVENTS_HEARTBEAT", "15"))
+
+# Résumé du tableau de bord : durée de vie en secondes du cache en mémoire (0 : désactivé)
+DASHBOARD_CACHE_TTL = float(os.getenv("DASHBOARD_CACHE_TTL", "5"))
+
+# Classements (meilleurs produits / vendeurs) : vidés au COMMIT de chaque vente ; avec le cache
+# memory et plusieurs workers, les autres workers gardent leur classement au plus TTL secondes
+LEADERBOARD_CACHE_BACKEND = os.getenv("LEADERBOARD_CACHE_BACKEND", PRODUCT_CACHE_BACKEND).lower()
+LEADERBOARD_CACHE_TTL = float(os.getenv("LEADERBOARD_CACHE_TTL", "300"))
+
+# Hachage des mots de passe : coût bcrypt (les anciens hash sont recalculés à la connexion)
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "12"))
+# Pool dédié au hachage : bcrypt libère le GIL, des threads suffisent
+PASSWORD_POOL_WORKERS = int(os.getenv("PASSWORD_POOL_WORKERS", str(max(1, (os.cpu_count() or 2) // 2))))
+# Demandes en attente au-delà des workers ; au-delà, rejet immédiat (503)
+PASSWORD_POOL_QUEUE = int(os.getenv("PASSWORD_POOL_QUEUE", "32"))
+
 # Configuration JWT
 # En production, utilise les variables d'environnement
 SECRET_KEY = os.getenv(
@@ -52,4 +112,4 @@ def get_db():
         db.rollback()
         raise
     finally:
-        db.close()
\ No newline at end of file
+        db.close()
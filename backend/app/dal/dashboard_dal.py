@@ -0,0 +1,71 @@
+from sqlalchemy.orm import Session
+from sqlalchemy import Numeric, cast, func, select
+from app.models.product import Product
+from app.models.user import User
+from app.models.sales_daily_rollup import SalesDailyRollup
+from typing import Dict
+from datetime import date
+from decimal import Decimal
+
+
+class DashboardDAL:
+    def __init__(self, db: Session):
+        self.db = db
+    
+    def get_counts(self) -> dict:
+        """Nombre de produits, de produits en stock faible (stock <= seuil) et d'utilisateurs (une requête)"""
+        try:
+            users = select(func.count(User.id)).scalar_subquery()
+            products, low_stock, users = self.db.execute(
+                select(
+                    func.count(Product.id),
+                    func.count(Product.id).filter(Product.stock <= Product.reorder_threshold),
+                    users
+                )
+            ).one()
+            return {"products": int(products), "low_stock": int(low_stock), "users": int(users)}
+        except Exception as e:
+            raise e
+    
+    @staticmethod
+    def _totals_columns(since: Dict[int, date]):
+        """Montant, nombre de ventes et quantités : toute la période puis chaque fenêtre (depuis le jour donné)"""
+        columns = []
+        for days, start_day in [(None, None)] + sorted(since.items()):
+            window = SalesDailyRollup.day >= start_day if start_day is not None else None
+            for column, numeric in (
+                (SalesDailyRollup.revenue, True),
+                (SalesDailyRollup.sales_count, False),
+                (SalesDailyRollup.units, False)
+            ):
+                total = func.sum(column) if window is None else func.sum(column).filter(window)
+                columns.append(func.coalesce(cast(total, Numeric(14, 2)) if numeric else total, 0))
+        return columns
+    
+    def get_revenue(self, since: Dict[int, date]) -> dict:
+        """
+        Totaux depuis l'agrégat journalier : toute la période et fenêtres glissantes
+        (une requête ; le jour en cours est inclus, l'agrégat étant tenu à jour à chaque vente)
+
+        Args:
+            since (Dict[int, date]): Taille de fenêtre en jours -> premier jour inclus
+        """
+        try:
+            row = self.db.execute(select(*self._totals_columns(since))).one()
+            totals = [
+                {
+                    "total_amount": Decimal(str(row[index])),
+                    "sales_count": int(row[index + 1]),
+                    "total_quantity": int(row[index + 2])
+                }
+                for index in range(0, len(row), 3)
+            ]
+            return {
+                "total": totals[0],
+                "windows": [
+                    {"days": days, "start_day": start_day, **window}
+                    for (days, start_day), window in zip(sorted(since.items()), totals[1:])
+                ]
+            }
+        except Exception as e:
+            raise e
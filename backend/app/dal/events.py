@@ -0,0 +1,48 @@
+from typing import Hashable, Optional
+from itertools import count
+from sqlalchemy import event, func, select
+from sqlalchemy.orm import Session
+from app.utils.event_broker import EVENTS_CHANNEL, event_broker, notify_payloads
+
+# Clé de Session.info où sont stockés les événements de la transaction courante
+_EVENTS_KEY = "pending_events"
+# Clés uniques des événements non fusionnables
+_sequence = count()
+
+
+def emit_event(session: Session, event_data: dict, key: Optional[Hashable] = None) -> None:
+    """
+    Annoncer un changement aux clients du flux /events, une fois la transaction validée
+
+    Les événements de même clé sont fusionnés (seul le dernier est envoyé, à la
+    position du premier) : un stock modifié deux fois dans la transaction ne
+    produit qu'un événement. Une transaction annulée n'envoie rien.
+
+    Args:
+        session (Session): Session (synchrone) portant la transaction
+        event_data (dict): Événement JSON-compatible, avec un champ "type"
+        key (Hashable): Clé de fusion (optionnelle)
+    """
+    pending = session.info.setdefault(_EVENTS_KEY, {})
+    pending[key if key is not None else next(_sequence)] = event_data
+
+
+@event.listens_for(Session, "before_commit")
+def _notify_before_commit(session: Session) -> None:
+    # PostgreSQL ne remet les NOTIFY qu'au COMMIT (et les oublie au ROLLBACK) : une seule requête
+    if not event_broker.uses_notify or not session.info.get(_EVENTS_KEY):
+        return
+    payloads = notify_payloads(session.info.pop(_EVENTS_KEY).values())
+    session.execute(select(*(func.pg_notify(EVENTS_CHANNEL, payload) for payload in payloads)))
+
+
+@event.listens_for(Session, "after_commit")
+def _publish_after_commit(session: Session) -> None:
+    events = session.info.pop(_EVENTS_KEY, None)
+    if events:
+        event_broker.publish(list(events.values()))
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_after_rollback(session: Session) -> None:
+    session.info.pop(_EVENTS_KEY, None)
@@ -0,0 +1,36 @@
+from typing import Callable
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+# Clé de Session.info où sont stockés les rappels en attente de COMMIT
+_AFTER_COMMIT_KEY = "after_commit_callbacks"
+
+
+def on_commit(session: Session, callback: Callable[[], None]) -> None:
+    """
+    Exécuter un rappel une fois la transaction courante validée
+
+    Le rappel est abandonné si la transaction est annulée : il ne voit donc
+    jamais un état que les autres connexions ne peuvent pas lire.
+
+    Args:
+        session (Session): Session (synchrone) portant la transaction
+        callback (Callable[[], None]): Fonction sans argument à exécuter après COMMIT
+    """
+    session.info.setdefault(_AFTER_COMMIT_KEY, []).append(callback)
+
+
+def has_pending_commit(session: Session) -> bool:
+    """Indiquer si la transaction courante attend un COMMIT (écritures non validées)"""
+    return bool(session.info.get(_AFTER_COMMIT_KEY))
+
+
+@event.listens_for(Session, "after_commit")
+def _run_after_commit(session: Session) -> None:
+    for callback in session.info.pop(_AFTER_COMMIT_KEY, []):
+        callback()
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_after_rollback(session: Session) -> None:
+    session.info.pop(_AFTER_COMMIT_KEY, None)
@@ -1,16 +1,101 @@
+import logging
 from sqlalchemy.orm import Session
+from sqlalchemy import func, or_, literal, update, case, insert, select, desc, text
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 from app.models.product import Product
-from typing import Optional, List
+from app.config import PRODUCT_CACHE_BACKEND, PRODUCT_CACHE_MAXSIZE, PRODUCT_CACHE_TTL, REDIS_URL
+from app.dal.hooks import on_commit, has_pending_commit
+from app.dal.events import emit_event
+from app.dal.schema import SEARCH_NORMALIZE_FUNCTION
+from app.dal.versioning import version_subquery
+from app.utils.cache import build_cache
+from app.utils.search import SQLITE_NORMALIZE_FUNCTION, normalize_text, escape_like, rank_key
+from typing import Optional, List, Dict, Iterable, Tuple
+from decimal import Decimal
+from datetime import datetime
+
+logger = logging.getLogger(__name__)
+
+# Cache de lecture par ID, partagé par toutes les sessions du processus
+product_cache = build_cache(
+    PRODUCT_CACHE_BACKEND,
+    maxsize=PRODUCT_CACHE_MAXSIZE,
+    ttl=PRODUCT_CACHE_TTL,
+    redis_url=REDIS_URL,
+    prefix="optic:product:"
+)
+
+# Colonnes conservées dans le cache (valeurs scalaires uniquement)
+PRODUCT_CACHE_COLUMNS = tuple(column.key for column in Product.__table__.columns)
+
+# PostgreSQL : pg_trgm et la fonction de normalisation sont-ils installés ? (par base, vérifié une fois)
+# La migration 0001 les crée si les droits le permettent ; installés après coup, redémarrer les workers.
+_trigram_search: Dict[str, bool] = {}
+
+# Repli PostgreSQL sans unaccent : accents courants retirés par translate() (fonction standard)
+ACCENTED = "àâäáãåçéèêëíìîïñóòôöõúùûüýÿ"
+UNACCENTED = "aaaaaaceeeeiiiinooooouuuuyy"
 
 class ProductDAL:
     def __init__(self, db: Session):
         self.db = db
     
+    def _invalidate(self, product_ids: Iterable[int]) -> None:
+        """
+        Retirer des produits du cache, immédiatement puis après COMMIT
+        (une lecture concurrente a pu y remettre l'ancienne version entre-temps)
+        """
+        keys = [str(product_id) for product_id in product_ids]
+        
+        def evict():
+            for key in keys:
+                product_cache.delete(key)
+        
+        evict()
+        on_commit(self.db, evict)
+    
+    def _invalidate_all(self) -> None:
+        """Vider le cache (écritures en masse dont les ids ne sont pas connus)"""
+        product_cache.clear()
+        on_commit(self.db, product_cache.clear)
+    
+    @staticmethod
+    def _from_cache(data: dict) -> Product:
+        """Reconstruire un produit détaché (jamais rattaché à la session) depuis le cache"""
+        values = dict(data)
+        if values.get("prix") is not None:
+            values["prix"] = Decimal(str(values["prix"]))
+        if isinstance(values.get("updated_at"), str):
+            values["updated_at"] = datetime.fromisoformat(values["updated_at"])
+        return Product(**values)
+    
+    def _emit_product(self, product: Product) -> None:
+        """Annoncer l'état d'un produit créé ou modifié (flux /events)"""
+        emit_event(self.db, {
+            "type": "product",
+            "id": product.id,
+            "nom": product.nom,
+            "prix": product.prix,
+            "stock": product.stock,
+            "reorder_threshold": product.reorder_threshold,
+            "image_url": product.image_url,
+            "reference": product.reference
+        }, key=("product", product.id))
+    
+    def _emit_stocks(self, rows) -> None:
+        """Annoncer les nouveaux stocks (lignes RETURNING id, stock)"""
+        for row in rows:
+            emit_event(self.db, {"type": "stock", "product_id": row.id, "stock": row.stock}, key=("stock", row.id))
+    
     def create_product(self, product_data: dict) -> Product:
         """Créer un nouveau produit"""
         try:
             product = Product(**product_data)
             self.db.add(product)
+            # INSERT avant le COMMIT : l'id est connu pour l'événement
+            self.db.flush()
+            self._emit_product(product)
             self.db.commit()
             self.db.refresh(product)
             return product
@@ -18,33 +103,188 @@ class ProductDAL:
             self.db.rollback()
             raise e
     
+    def upsert_products(self, products_data: List[dict], commit: bool = True) -> int:
+        """
+        Insérer un lot de produits (INSERT multi-lignes) ; les lignes portant une
+        référence existante mettent à jour le produit correspondant (ON CONFLICT)
+        """
+        try:
+            with_reference = [row for row in products_data if row.get("reference")]
+            without_reference = [row for row in products_data if not row.get("reference")]
+            
+            if with_reference:
+                dialect = self.db.get_bind().dialect.name
+                dialect_insert = sqlite_insert if dialect == "sqlite" else pg_insert
+                statement = dialect_insert(Product)
+                statement = statement.on_conflict_do_update(
+                    index_elements=[Product.reference],
+                    set_={
+                        column: statement.excluded[column]
+                        for column in ("nom", "prix", "stock", "image_url", "reorder_threshold")
+                    } | {"updated_at": datetime.utcnow()}
+                )
+                self.db.execute(statement, with_reference)
+            
+            if without_reference:
+                self.db.execute(insert(Product), without_reference)
+            
+            if with_reference:
+                self._invalidate_all()
+            # Import en masse : un seul événement, les clients rechargent le catalogue
+            emit_event(self.db, {"type": "catalogue", "count": len(products_data)}, key="catalogue")
+            if commit:
+                self.db.commit()
+            return len(products_data)
+        except Exception as e:
+            self.db.rollback()
+            raise e
+    
     def get_product_by_id(self, product_id: int) -> Optional[Product]:
-        """Récupérer un produit par son ID"""
+        """
+        Récupérer un produit par son ID (lecture servie par le cache si possible)
+        
+        Un produit issu du cache est détaché de la session : les écritures
+        passent par _get_for_write, qui lit toujours la base.
+        """
         try:
-            return self.db.query(Product).filter(Product.id == product_id).first()
+            key = str(product_id)
+            cached = product_cache.get(key)
+            if cached is not None:
+                return self._from_cache(cached)
+            
+            product = self._get_for_write(product_id)
+            # Ne jamais publier un état lu au milieu d'une transaction d'écriture non validée
+            if product is not None and not has_pending_commit(self.db):
+                product_cache.set(key, {column: getattr(product, column) for column in PRODUCT_CACHE_COLUMNS})
+            return product
         except Exception as e:
             raise e
     
-    def get_all_products(self, skip: int = 0, limit: int = 100) -> List[Product]:
-        """Récupérer tous les produits avec pagination"""
+    def _get_for_write(self, product_id: int) -> Optional[Product]:
+        """Charger le produit depuis la base, rattaché à la session"""
+        return self.db.get(Product, product_id)
+    
+    def get_version(self) -> Tuple:
+        """Version du catalogue (nombre de produits, id max, dernière modification)"""
         try:
-            return self.db.query(Product).offset(skip).limit(limit).all()
+            return tuple(self.db.execute(select(version_subquery(Product, "products"))).one())
         except Exception as e:
             raise e
     
-    def search_products(self, search_term: str) -> List[Product]:
-        """Rechercher des produits par nom"""
+    def get_all_products(
+        self,
+        skip: int = 0,
+        limit: int = 100,
+        after_id: Optional[int] = None
+    ) -> List[dict]:
+        """
+        Récupérer tous les produits avec pagination (offset ou keyset sur l'id)
+        
+        Lignes en colonnes plates (champs de ProductResponse) : pas d'objets ORM à hydrater
+        """
         try:
-            return self.db.query(Product).filter(
-                Product.nom.ilike(f"%{search_term}%")
-            ).all()
+            statement = select(*Product.__table__.columns).order_by(Product.id).limit(limit)
+            if after_id is not None:
+                # Keyset : on repart directement après le dernier id vu
+                statement = statement.where(Product.id > after_id)
+            else:
+                statement = statement.offset(skip)
+            return [dict(row._mapping) for row in self.db.execute(statement)]
+        except Exception as e:
+            raise e
+    
+    def get_low_stock(self, limit: int = 100) -> List[dict]:
+        """
+        Produits à réapprovisionner (stock <= seuil), les plus urgents d'abord :
+        stock le plus bas, puis plus grand écart au seuil
+        
+        Le filtre reprend exactement le prédicat de l'index partiel ix_products_low_stock :
+        seules les lignes en stock faible sont lues.
+        """
+        try:
+            shortfall = (Product.reorder_threshold - Product.stock).label('shortfall')
+            statement = select(
+                Product.id, Product.nom, Product.prix, Product.stock,
+                Product.reorder_threshold, shortfall, Product.reference
+            ).where(
+                Product.stock <= Product.reorder_threshold
+            ).order_by(Product.stock, desc(shortfall), Product.id).limit(limit)
+            return [dict(row._mapping) for row in self.db.execute(statement)]
+        except Exception as e:
+            raise e
+    
+    def search_products(self, search_term: str, skip: int = 0, limit: int = 50) -> List[Product]:
+        """Rechercher des produits par nom (sans accents ni casse, triés par pertinence)"""
+        try:
+            if self.db.get_bind().dialect.name == "postgresql" and self._has_trigram_search():
+                return self._search_products_postgres(search_term, skip, limit)
+            return self._search_products_fallback(search_term, skip, limit)
         except Exception as e:
             raise e
     
+    def _has_trigram_search(self) -> bool:
+        """Vérifier (une fois par base) la présence de pg_trgm et de la fonction de normalisation"""
+        key = str(self.db.get_bind().engine.url)
+        available = _trigram_search.get(key)
+        if available is None:
+            available = bool(self.db.execute(
+                text(
+                    "SELECT to_regprocedure(:function) IS NOT NULL "
+                    "AND EXISTS (SELECT 1 FROM pg_extension WHERE extname = 'pg_trgm')"
+                ),
+                {"function": f"{SEARCH_NORMALIZE_FUNCTION}(text)"}
+            ).scalar())
+            if not available:
+                logger.warning("pg_trgm ou %s absent : recherche de produits sans index trigramme", SEARCH_NORMALIZE_FUNCTION)
+            _trigram_search[key] = available
+        return available
+    
+    def _search_products_postgres(self, search_term: str, skip: int, limit: int) -> List[Product]:
+        """Recherche servie par l'index trigramme sur la forme normalisée du nom"""
+        name_key = getattr(func, SEARCH_NORMALIZE_FUNCTION)(Product.nom)
+        # Motifs constants (normalisés côté Python) pour que l'index GIN soit utilisable
+        term = normalize_text(search_term)
+        escaped = escape_like(term)
+        
+        return self.db.query(Product).filter(
+            or_(
+                name_key.like(f"%{escaped}%", escape='\\'),
+                # Tolérance aux fautes de frappe (seuil pg_trgm.word_similarity_threshold)
+                literal(term).op('<%')(name_key)
+            )
+        ).order_by(
+            name_key.like(f"{escaped}%", escape='\\').desc(),
+            func.word_similarity(term, name_key).desc(),
+            Product.nom,
+            Product.id
+        ).offset(skip).limit(limit).all()
+    
+    def _search_products_fallback(self, search_term: str, skip: int, limit: int) -> List[Product]:
+        """Recherche de repli (SQLite, PostgreSQL sans pg_trgm) : filtre SQL normalisé, classement en Python"""
+        term = normalize_text(search_term)
+        if self.db.get_bind().dialect.name == "sqlite":
+            name_key = getattr(func, SQLITE_NORMALIZE_FUNCTION)(Product.nom)
+        else:
+            name_key = func.translate(func.lower(Product.nom), ACCENTED, UNACCENTED)
+        
+        candidates = self.db.query(Product.id, Product.nom).filter(
+            name_key.like(f"%{escape_like(term)}%", escape='\\')
+        ).all()
+        candidates.sort(key=lambda row: rank_key(term, normalize_text(row.nom)))
+        page_ids = [row.id for row in candidates[skip:skip + limit]]
+        if not page_ids:
+            return []
+        
+        products = {
+            product.id: product
+            for product in self.db.query(Product).filter(Product.id.in_(page_ids)).all()
+        }
+        return [products[product_id] for product_id in page_ids if product_id in products]
+    
     def update_product(self, product_id: int, product_data: dict) -> Optional[Product]:
         """Mettre à jour un produit"""
         try:
-            product = self.get_product_by_id(product_id)
+            product = self._get_for_write(product_id)
             if not product:
                 return None
             
@@ -52,6 +292,8 @@ class ProductDAL:
                 if value is not None:
                     setattr(product, key, value)
             
+            self._invalidate([product_id])
+            self._emit_product(product)
             self.db.commit()
             self.db.refresh(product)
             return product
@@ -62,29 +304,114 @@ class ProductDAL:
     def update_stock(self, product_id: int, quantity_change: int) -> Optional[Product]:
         """Mettre à jour le stock d'un produit"""
         try:
-            product = self.get_product_by_id(product_id)
-            if not product:
-                return None
-            
-            product.stock += quantity_change
-            
-            if product.stock < 0:
+            if self.adjust_stock(product_id, quantity_change, commit=False) is None:
+                if self.get_stock(product_id) is None:
+                    return None
                 raise ValueError("Stock insuffisant")
             
             self.db.commit()
-            self.db.refresh(product)
-            return product
+            return self.get_product_by_id(product_id)
+        except Exception as e:
+            self.db.rollback()
+            raise e
+    
+    def adjust_stock(self, product_id: int, quantity_change: int, commit: bool = True) -> Optional[dict]:
+        """
+        Modifier le stock de façon atomique (UPDATE ... WHERE stock + :delta >= 0 RETURNING)
+        
+        Renvoie None si le produit n'existe pas ou si le stock serait négatif ;
+        aucune lecture préalable, donc pas de mise à jour perdue entre deux ventes concurrentes.
+        """
+        try:
+            row = self.db.execute(
+                update(Product).where(
+                    Product.id == product_id,
+                    Product.stock + quantity_change >= 0
+                ).values(
+                    stock=Product.stock + quantity_change
+                ).returning(
+                    Product.id, Product.nom, Product.prix, Product.stock
+                )
+            ).first()
+            
+            if row:
+                self._invalidate([product_id])
+                self._emit_stocks([row])
+            if commit:
+                self.db.commit()
+            return dict(row._mapping) if row else None
         except Exception as e:
             self.db.rollback()
             raise e
     
+    def adjust_stocks(self, quantity_changes: Dict[int, int], commit: bool = True) -> Dict[int, dict]:
+        """
+        Modifier le stock de plusieurs produits en une seule instruction
+        (UPDATE ... SET stock = stock + CASE id ... END WHERE id IN (...) AND stock + CASE ... >= 0)
+        
+        Renvoie les produits effectivement mis à jour, indexés par id : un produit
+        absent du résultat est introuvable ou n'a pas assez de stock.
+        
+        Sous PostgreSQL, les lignes sont d'abord verrouillées par id croissant (sous-requête
+        ORDER BY id FOR UPDATE dans la même instruction) : deux paniers partageant des
+        produits prennent leurs verrous dans le même ordre, sans interblocage.
+        """
+        try:
+            delta = case(quantity_changes, value=Product.id)
+            ids = sorted(quantity_changes)
+            if self.db.get_bind().dialect.name == "postgresql":
+                locked = select(Product.id).where(
+                    Product.id.in_(ids)
+                ).order_by(Product.id).with_for_update().subquery()
+                target = Product.id == locked.c.id
+            else:
+                # SQLite : un seul écrivain à la fois, pas de verrou de ligne
+                target = Product.id.in_(ids)
+            rows = self.db.execute(
+                update(Product).where(
+                    target,
+                    Product.stock + delta >= 0
+                ).values(
+                    stock=Product.stock + delta
+                ).returning(
+                    Product.id, Product.nom, Product.prix, Product.stock
+                ).execution_options(synchronize_session="fetch")
+            ).all()
+            
+            self._invalidate(row.id for row in rows)
+            self._emit_stocks(rows)
+            if commit:
+                self.db.commit()
+            return {row.id: dict(row._mapping) for row in rows}
+        except Exception as e:
+            self.db.rollback()
+            raise e
+    
+    def get_stocks(self, product_ids: List[int]) -> Dict[int, int]:
+        """Lire le stock courant de plusieurs produits en une requête"""
+        try:
+            return dict(
+                self.db.query(Product.id, Product.stock).filter(Product.id.in_(product_ids)).all()
+            )
+        except Exception as e:
+            raise e
+    
+    def get_stock(self, product_id: int) -> Optional[int]:
+        """Lire le stock courant d'un produit (None si introuvable)"""
+        try:
+            return self.db.query(Product.stock).filter(Product.id == product_id).scalar()
+        except Exception as e:
+            raise e
+    
     def delete_product(self, product_id: int) -> bool:
         """Supprimer un produit"""
         try:
-            product = self.get_product_by_id(product_id)
+            product = self._get_for_write(product_id)
             if not product:
                 return False
             
+            self._invalidate([product_id])
+            emit_event(self.db, {"type": "product_deleted", "id": product_id}, key=("product", product_id))
             self.db.delete(product)
             self.db.commit()
             return True
@@ -0,0 +1,317 @@
+from sqlalchemy.orm import Session
+from sqlalchemy import Date, DateTime, Numeric, cast, delete, desc, func, insert, literal, select, text, tuple_
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.sql import Select
+from app.models.sale import Sale
+from app.models.product import Product
+from app.models.user import User
+from app.models.sales_daily_rollup import SalesDailyRollup
+from app.config import LEADERBOARD_CACHE_BACKEND, LEADERBOARD_CACHE_TTL, REDIS_URL
+from app.dal.hooks import on_commit
+from app.dal.series import add_totals, gap_filled_statement, series_points
+from app.utils.cache import build_cache
+from app.utils.series import fill_series, truncate
+from typing import Dict, List, Optional, Tuple
+from datetime import date, datetime, time, timedelta
+from decimal import Decimal
+
+# Clé d'une ligne d'agrégat : (jour, produit, vendeur)
+RollupKey = Tuple[date, int, int]
+# Variation d'une ligne : (unités, chiffre d'affaires, nombre de ventes)
+RollupDelta = Tuple[int, Decimal, int]
+
+# Regroupements autorisés : clé -> (colonne id, colonne nom, table du nom)
+ROLLUP_GROUP_BY = {
+    "product": (SalesDailyRollup.product_id, Product.nom, Product),
+    "user": (SalesDailyRollup.user_id, User.nom, User),
+}
+
+# Critères de classement (colonnes de l'agrégat)
+LEADERBOARD_RANKS = ("revenue", "units")
+
+# Classements calculés, par (regroupement, premier jour, critère, taille) ; vidé à chaque écriture de l'agrégat
+leaderboard_cache = build_cache(
+    LEADERBOARD_CACHE_BACKEND,
+    maxsize=256,
+    ttl=LEADERBOARD_CACHE_TTL,
+    redis_url=REDIS_URL,
+    prefix="optic:leaderboard:"
+)
+
+
+def add_delta(deltas: Dict[RollupKey, RollupDelta], key: RollupKey, units: int, revenue: Decimal, count: int) -> None:
+    """Cumuler une variation dans un lot de variations (une ligne par clé)"""
+    current_units, current_revenue, current_count = deltas.get(key, (0, Decimal("0"), 0))
+    deltas[key] = (current_units + units, current_revenue + revenue, current_count + count)
+
+
+class SalesRollupDAL:
+    def __init__(self, db: Session):
+        self.db = db
+
+    def apply_deltas(self, deltas: Dict[RollupKey, RollupDelta]) -> None:
+        """
+        Appliquer des variations dans la transaction en cours (INSERT ... ON CONFLICT DO UPDATE)
+
+        Les clés sont triées : deux transactions verrouillent les lignes dans le même
+        ordre (pas d'interblocage). Les lignes retombées à zéro vente sont supprimées.
+        """
+        try:
+            deltas = {key: delta for key, delta in deltas.items() if any(delta)}
+            if not deltas:
+                return
+
+            dialect = self.db.get_bind().dialect.name
+            dialect_insert = sqlite_insert if dialect == "sqlite" else pg_insert
+            statement = dialect_insert(SalesDailyRollup)
+            table = SalesDailyRollup.__table__
+            statement = statement.on_conflict_do_update(
+                index_elements=[table.c.day, table.c.product_id, table.c.user_id],
+                set_={
+                    column: table.c[column] + statement.excluded[column]
+                    for column in ("units", "revenue", "sales_count")
+                }
+            )
+            self.db.execute(statement, [
+                {
+                    "day": day, "product_id": product_id, "user_id": user_id,
+                    "units": units, "revenue": revenue, "sales_count": count
+                }
+                for (day, product_id, user_id), (units, revenue, count) in sorted(deltas.items())
+            ])
+            on_commit(self.db, leaderboard_cache.clear)
+
+            emptied = [key for key, (_, _, count) in deltas.items() if count < 0]
+            if emptied:
+                self.db.execute(
+                    delete(SalesDailyRollup).where(
+                        tuple_(SalesDailyRollup.day, SalesDailyRollup.product_id, SalesDailyRollup.user_id).in_(emptied),
+                        SalesDailyRollup.sales_count <= 0
+                    )
+                )
+        except Exception as e:
+            raise e
+
+    @staticmethod
+    def _filter_days(query, start_day: Optional[date], end_day: Optional[date]):
+        """Bornes de jour incluses (optionnelles)"""
+        if start_day is not None:
+            query = query.where(SalesDailyRollup.day >= start_day)
+        if end_day is not None:
+            query = query.where(SalesDailyRollup.day <= end_day)
+        return query
+
+    @staticmethod
+    def _totals_columns():
+        return (
+            func.coalesce(cast(func.sum(SalesDailyRollup.revenue), Numeric(14, 2)), 0).label('total_amount'),
+            func.coalesce(func.sum(SalesDailyRollup.sales_count), 0).label('sales_count'),
+            func.coalesce(func.sum(SalesDailyRollup.units), 0).label('total_quantity')
+        )
+
+    def get_totals(self, start_day: Optional[date] = None, end_day: Optional[date] = None) -> dict:
+        """Totaux (montant, nombre de ventes, quantités) sur des jours entiers"""
+        try:
+            total_amount, sales_count, total_quantity = self.db.execute(
+                self._filter_days(select(*self._totals_columns()), start_day, end_day)
+            ).one()
+            return {
+                "total_amount": Decimal(str(total_amount)),
+                "sales_count": int(sales_count),
+                "total_quantity": int(total_quantity)
+            }
+        except Exception as e:
+            raise e
+
+    def get_totals_grouped(
+        self,
+        group_by: str,
+        start_day: Optional[date] = None,
+        end_day: Optional[date] = None
+    ) -> List[dict]:
+        """Totaux sur des jours entiers regroupés par produit ou par vendeur"""
+        try:
+            id_column, nom_column, model = ROLLUP_GROUP_BY[group_by]
+            query = select(id_column, nom_column, *self._totals_columns()).join(model, model.id == id_column)
+            results = self.db.execute(
+                self._filter_days(query, start_day, end_day).group_by(id_column, nom_column).order_by(desc('total_amount'))
+            ).all()
+            return [
+                {
+                    f"{group_by}_id": group_id,
+                    f"{group_by}_nom": nom,
+                    "total_amount": Decimal(str(total_amount)),
+                    "sales_count": int(sales_count),
+                    "total_quantity": int(total_quantity)
+                }
+                for group_id, nom, total_amount, sales_count, total_quantity in results
+            ]
+        except Exception as e:
+            raise e
+
+    def get_series(
+        self,
+        bucket: str,
+        first_bucket: datetime,
+        last_bucket: datetime,
+        start_day: Optional[date] = None,
+        end_day: Optional[date] = None,
+        product_id: Optional[int] = None,
+        user_id: Optional[int] = None
+    ) -> List[dict]:
+        """Série par jour, semaine ou mois (UTC) sur des jours entiers, un point par pas (pas vides à zéro)"""
+        try:
+            filters = []
+            if product_id is not None:
+                filters.append(SalesDailyRollup.product_id == product_id)
+            if user_id is not None:
+                filters.append(SalesDailyRollup.user_id == user_id)
+
+            if self.db.get_bind().dialect.name == "postgresql":
+                aggregate = self._filter_days(select(
+                    func.date_trunc(bucket, cast(SalesDailyRollup.day, DateTime), type_=DateTime).label('bucket'),
+                    func.sum(SalesDailyRollup.units).label('units'),
+                    func.sum(SalesDailyRollup.revenue).label('revenue'),
+                    func.sum(SalesDailyRollup.sales_count).label('sales_count')
+                ).where(*filters), start_day, end_day).group_by(text("1"))
+                return series_points(self.db.execute(gap_filled_statement(aggregate, bucket, first_bucket, last_bucket)))
+
+            rows = self.db.execute(self._filter_days(select(
+                SalesDailyRollup.day,
+                func.sum(SalesDailyRollup.units),
+                func.sum(SalesDailyRollup.revenue),
+                func.sum(SalesDailyRollup.sales_count)
+            ).where(*filters), start_day, end_day).group_by(SalesDailyRollup.day))
+            totals = {}
+            for day, units, revenue, sales_count in rows:
+                add_totals(totals, truncate(datetime.combine(day, time.min), bucket), units, revenue, sales_count)
+            return fill_series(totals, first_bucket, last_bucket, bucket)
+        except Exception as e:
+            raise e
+
+    def get_leaderboard(
+        self,
+        group_by: str,
+        start_day: date,
+        limit: int = 10,
+        rank_by: str = "revenue"
+    ) -> List[dict]:
+        """
+        Meilleurs produits ou vendeurs depuis start_day (jour en cours compris)
+
+        Une requête : GROUP BY ... ORDER BY ... LIMIT sur l'agrégat journalier (clé
+        primaire commençant par le jour), noms joints aux seules lignes retenues.
+        Servi par le cache jusqu'à la prochaine vente validée.
+        """
+        try:
+            key = f"{group_by}:{start_day.isoformat()}:{rank_by}:{limit}"
+            cached = leaderboard_cache.get(key)
+            if cached is not None:
+                return cached
+
+            id_column, nom_column, model = ROLLUP_GROUP_BY[group_by]
+            top = select(
+                id_column.label('id'),
+                func.sum(SalesDailyRollup.units).label('units'),
+                cast(func.sum(SalesDailyRollup.revenue), Numeric(14, 2)).label('revenue'),
+                func.sum(SalesDailyRollup.sales_count).label('sales_count')
+            ).where(SalesDailyRollup.day >= start_day).group_by(id_column)
+            # Égalités départagées par l'autre critère puis par id (ordre stable)
+            tie_break = "units" if rank_by == "revenue" else "revenue"
+            top = top.order_by(desc(rank_by), desc(tie_break), id_column).limit(limit).subquery()
+
+            rows = self.db.execute(
+                select(top.c.id, nom_column, top.c.units, top.c.revenue, top.c.sales_count)
+                .join(model, model.id == top.c.id)
+                .order_by(desc(top.c[rank_by]), desc(top.c[tie_break]), top.c.id)
+            ).all()
+            entries = [
+                {
+                    "rank": rank,
+                    "id": entry_id,
+                    "nom": nom,
+                    "units": int(units),
+                    "revenue": Decimal(str(revenue)),
+                    "sales_count": int(sales_count)
+                }
+                for rank, (entry_id, nom, units, revenue, sales_count) in enumerate(rows, start=1)
+            ]
+            leaderboard_cache.set(key, entries)
+            return entries
+        except Exception as e:
+            raise e
+
+    @staticmethod
+    def expected_statement(start_day: Optional[date] = None, end_day: Optional[date] = None) -> Select:
+        """Agrégat recalculé depuis les ventes (reconstruction et vérification)"""
+        day = func.date(Sale.date, type_=Date)
+        statement = select(
+            day.label('day'),
+            Sale.product_id,
+            Sale.user_id,
+            func.sum(Sale.quantity).label('units'),
+            cast(func.sum(Sale.total), Numeric(14, 2)).label('revenue'),
+            func.count(Sale.id).label('sales_count')
+        ).group_by(day, Sale.product_id, Sale.user_id)
+        # Bornes exprimées sur sales.date (index) plutôt que sur le jour calculé
+        if start_day is not None:
+            statement = statement.where(Sale.date >= datetime.combine(start_day, time.min))
+        if end_day is not None:
+            statement = statement.where(Sale.date < datetime.combine(end_day + timedelta(days=1), time.min))
+        return statement
+
+    def rebuild(self, start_day: Optional[date] = None, end_day: Optional[date] = None) -> int:
+        """
+        Recalculer l'agrégat (toute la période ou les jours donnés) dans la transaction en cours
+
+        Sous PostgreSQL, la table est verrouillée contre les écritures concurrentes jusqu'au
+        commit : une vente en cours attend, puis applique sa variation sur le résultat reconstruit.
+        """
+        try:
+            if self.db.get_bind().dialect.name == "postgresql":
+                self.db.execute(text("LOCK TABLE sales_daily_rollup IN SHARE ROW EXCLUSIVE MODE"))
+            self.db.execute(self._filter_days(delete(SalesDailyRollup), start_day, end_day))
+            result = self.db.execute(
+                insert(SalesDailyRollup).from_select(
+                    ["day", "product_id", "user_id", "units", "revenue", "sales_count"],
+                    self.expected_statement(start_day, end_day)
+                )
+            )
+            on_commit(self.db, leaderboard_cache.clear)
+            return result.rowcount
+        except Exception as e:
+            raise e
+
+    def find_mismatches(
+        self,
+        start_day: Optional[date] = None,
+        end_day: Optional[date] = None,
+        limit: int = 100
+    ) -> List[dict]:
+        """
+        Lignes qui diffèrent entre l'agrégat et le recalcul depuis les ventes
+        (source "expected" : manquante ou fausse dans l'agrégat, "rollup" : en trop ou fausse)
+        """
+        try:
+            expected = self.expected_statement(start_day, end_day).subquery()
+            actual = self._filter_days(select(
+                SalesDailyRollup.day, SalesDailyRollup.product_id, SalesDailyRollup.user_id,
+                SalesDailyRollup.units, SalesDailyRollup.revenue, SalesDailyRollup.sales_count
+            ), start_day, end_day).subquery()
+
+            # Montants arrondis au centime des deux côtés (SQLite stocke les NUMERIC en flottant)
+            def comparable(source):
+                return select(
+                    source.c.day, source.c.product_id, source.c.user_id, source.c.units,
+                    func.round(source.c.revenue, 2).label('revenue'), source.c.sales_count
+                )
+
+            missing = comparable(expected).except_(comparable(actual)).subquery()
+            extra = comparable(actual).except_(comparable(expected)).subquery()
+            statement = select(literal("expected").label('source'), missing).union_all(
+                select(literal("rollup").label('source'), extra)
+            ).limit(limit)
+            return [dict(row._mapping) for row in self.db.execute(statement)]
+        except Exception as e:
+            raise e
@@ -1,20 +1,39 @@
 from sqlalchemy.orm import Session
-from sqlalchemy import desc
+from sqlalchemy import desc, func, cast, Numeric, DateTime, tuple_, delete, insert, select, text, true
+from sqlalchemy.sql import Select
 from app.models.sale import Sale
 from app.models.product import Product
 from app.models.user import User
-from typing import Optional, List
-from datetime import datetime
+from app.dal.versioning import version_subquery
+from app.dal.events import emit_event
+from app.dal.series import add_totals, gap_filled_statement, series_points, sqlite_slot
+from app.utils.series import fill_series, load_timezone, to_local, truncate
+from typing import Iterable, Optional, List, Tuple
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+# Regroupements autorisés pour les agrégats : clé -> (colonne id, colonne nom)
+TOTALS_GROUP_BY = {
+    "product": (Sale.product_id, Product.nom),
+    "user": (Sale.user_id, User.nom),
+}
+
+# Séries SQLite : créneaux UTC de 15 minutes (tous les décalages horaires en usage en sont multiples)
+SQLITE_SLOT_SECONDS = 900
+EPOCH = datetime(1970, 1, 1)
 
 class SaleDAL:
     def __init__(self, db: Session):
         self.db = db
     
-    def create_sale(self, sale_data: dict) -> Sale:
-        """Créer une nouvelle vente"""
+    def create_sale(self, sale_data: dict, commit: bool = True) -> Sale:
+        """Créer une nouvelle vente (commit=False : INSERT dans la transaction en cours)"""
         try:
             sale = Sale(**sale_data)
             self.db.add(sale)
+            if not commit:
+                self.db.flush()
+                return sale
             self.db.commit()
             self.db.refresh(sale)
             return sale
@@ -22,161 +41,268 @@ class SaleDAL:
             self.db.rollback()
             raise e
     
+    def get_version(self) -> Tuple:
+        """
+        Version des ventes telles qu'exposées : ventes, produits et utilisateurs
+        joints (renommer un produit ou un vendeur modifie aussi les lignes de vente)
+        """
+        try:
+            sales = version_subquery(Sale, "sales")
+            products = version_subquery(Product, "products")
+            users = version_subquery(User, "users")
+            # Agrégats d'une ligne chacun : jointures sur TRUE, une seule requête
+            return tuple(self.db.execute(
+                select(sales, products, users).select_from(
+                    sales.join(products, true()).join(users, true())
+                )
+            ).one())
+        except Exception as e:
+            raise e
+    
+    @staticmethod
+    def _details_statement() -> Select:
+        """Ventes avec détails en colonnes plates (ordre de SaleResponse) : pas d'objets ORM à hydrater"""
+        return select(
+            Sale.id,
+            Sale.product_id,
+            Sale.user_id,
+            Sale.quantity,
+            Sale.date,
+            Product.nom.label('product_nom'),
+            User.nom.label('user_nom'),
+            Sale.unit_price.label('prix_unitaire'),
+            Sale.total.label('prix_total')
+        ).join(
+            Product, Sale.product_id == Product.id
+        ).join(
+            User, Sale.user_id == User.id
+        )
+    
+    def _details(self, statement: Select) -> List[dict]:
+        return [dict(row._mapping) for row in self.db.execute(statement)]
+    
     def get_sale_by_id(self, sale_id: int) -> Optional[dict]:
         """Récupérer une vente par son ID avec détails"""
         try:
-            result = self.db.query(
-                Sale,
-                Product.nom.label('product_nom'),
-                Product.prix.label('prix_unitaire'),
-                User.nom.label('user_nom')
-            ).join(
-                Product, Sale.product_id == Product.id
-            ).join(
-                User, Sale.user_id == User.id
-            ).filter(Sale.id == sale_id).first()
-            
-            if result:
-                sale, product_nom, prix_unitaire, user_nom = result
-                return {
-                    "id": sale.id,
-                    "product_id": sale.product_id,
-                    "user_id": sale.user_id,
-                    "quantity": sale.quantity,
-                    "date": sale.date,
-                    "product_nom": product_nom,
-                    "user_nom": user_nom,
-                    "prix_unitaire": float(prix_unitaire),
-                    "prix_total": float(prix_unitaire) * sale.quantity
-                }
-            return None
+            sales = self._details(self._details_statement().where(Sale.id == sale_id))
+            return sales[0] if sales else None
         except Exception as e:
             raise e
     
-    def get_all_sales(self, skip: int = 0, limit: int = 100) -> List[dict]:
-        """Récupérer toutes les ventes avec détails et pagination"""
+    def create_sales(self, sales_data: List[dict], commit: bool = True) -> List[dict]:
+        """Créer plusieurs ventes avec un seul INSERT multi-lignes (RETURNING)"""
         try:
-            results = self.db.query(
-                Sale,
-                Product.nom.label('product_nom'),
-                Product.prix.label('prix_unitaire'),
-                User.nom.label('user_nom')
-            ).join(
-                Product, Sale.product_id == Product.id
-            ).join(
-                User, Sale.user_id == User.id
-            ).order_by(desc(Sale.date)).offset(skip).limit(limit).all()
-            
-            sales = []
-            for sale, product_nom, prix_unitaire, user_nom in results:
-                sales.append({
-                    "id": sale.id,
-                    "product_id": sale.product_id,
-                    "user_id": sale.user_id,
-                    "quantity": sale.quantity,
-                    "date": sale.date,
-                    "product_nom": product_nom,
-                    "user_nom": user_nom,
-                    "prix_unitaire": float(prix_unitaire),
-                    "prix_total": float(prix_unitaire) * sale.quantity
-                })
-            return sales
+            rows = self.db.execute(
+                insert(Sale).values(sales_data).returning(
+                    Sale.id, Sale.product_id, Sale.user_id, Sale.quantity, Sale.date, Sale.unit_price, Sale.total
+                )
+            ).all()
+            if commit:
+                self.db.commit()
+            return sorted((dict(row._mapping) for row in rows), key=lambda row: row["id"])
+        except Exception as e:
+            self.db.rollback()
+            raise e
+    
+    def get_sale_for_update(self, sale_id: int) -> Optional[Sale]:
+        """Récupérer une vente en la verrouillant jusqu'à la fin de la transaction"""
+        try:
+            return self.db.query(Sale).filter(Sale.id == sale_id).with_for_update().first()
+        except Exception as e:
+            raise e
+    
+    def get_all_sales(
+        self,
+        skip: int = 0,
+        limit: int = 100,
+        after: Optional[tuple] = None
+    ) -> List[dict]:
+        """Récupérer toutes les ventes avec détails et pagination (offset ou keyset sur (date, id))"""
+        try:
+            statement = self._details_statement().order_by(desc(Sale.date), desc(Sale.id)).limit(limit)
+            if after is not None:
+                # Keyset : comparaison de ligne (date, id) < curseur, sans OFFSET
+                return self._details(statement.where(tuple_(Sale.date, Sale.id) < tuple_(*after)))
+            return self._details(statement.offset(skip))
         except Exception as e:
             raise e
     
     def get_sales_by_user(self, user_id: int) -> List[dict]:
         """Récupérer toutes les ventes d'un utilisateur"""
         try:
-            results = self.db.query(
-                Sale,
-                Product.nom.label('product_nom'),
-                Product.prix.label('prix_unitaire'),
-                User.nom.label('user_nom')
-            ).join(
-                Product, Sale.product_id == Product.id
-            ).join(
-                User, Sale.user_id == User.id
-            ).filter(Sale.user_id == user_id).order_by(desc(Sale.date)).all()
-            
-            sales = []
-            for sale, product_nom, prix_unitaire, user_nom in results:
-                sales.append({
-                    "id": sale.id,
-                    "product_id": sale.product_id,
-                    "user_id": sale.user_id,
-                    "quantity": sale.quantity,
-                    "date": sale.date,
-                    "product_nom": product_nom,
-                    "user_nom": user_nom,
-                    "prix_unitaire": float(prix_unitaire),
-                    "prix_total": float(prix_unitaire) * sale.quantity
-                })
-            return sales
+            return self._details(
+                self._details_statement().where(Sale.user_id == user_id).order_by(desc(Sale.date))
+            )
         except Exception as e:
             raise e
     
     def get_sales_by_product(self, product_id: int) -> List[dict]:
         """Récupérer toutes les ventes d'un produit"""
         try:
-            results = self.db.query(
-                Sale,
-                Product.nom.label('product_nom'),
-                Product.prix.label('prix_unitaire'),
-                User.nom.label('user_nom')
-            ).join(
-                Product, Sale.product_id == Product.id
-            ).join(
-                User, Sale.user_id == User.id
-            ).filter(Sale.product_id == product_id).order_by(desc(Sale.date)).all()
-            
-            sales = []
-            for sale, product_nom, prix_unitaire, user_nom in results:
-                sales.append({
-                    "id": sale.id,
-                    "product_id": sale.product_id,
-                    "user_id": sale.user_id,
-                    "quantity": sale.quantity,
-                    "date": sale.date,
-                    "product_nom": product_nom,
-                    "user_nom": user_nom,
-                    "prix_unitaire": float(prix_unitaire),
-                    "prix_total": float(prix_unitaire) * sale.quantity
-                })
-            return sales
+            return self._details(
+                self._details_statement().where(Sale.product_id == product_id).order_by(desc(Sale.date))
+            )
         except Exception as e:
             raise e
     
+    @staticmethod
+    def export_statement(
+        start_date: Optional[datetime] = None,
+        end_date: Optional[datetime] = None
+    ) -> Select:
+        """Requête d'export des ventes (colonnes plates, ordre chronologique) pour un curseur serveur"""
+        statement = select(
+            Sale.id,
+            Sale.date,
+            Sale.product_id,
+            Product.nom.label('product_nom'),
+            Sale.user_id,
+            User.nom.label('user_nom'),
+            Sale.quantity,
+            Sale.unit_price.label('prix_unitaire'),
+            Sale.total.label('prix_total')
+        ).join(
+            Product, Sale.product_id == Product.id
+        ).join(
+            User, Sale.user_id == User.id
+        ).order_by(Sale.date, Sale.id)
+        
+        if start_date is not None:
+            statement = statement.where(Sale.date >= start_date)
+        if end_date is not None:
+            statement = statement.where(Sale.date <= end_date)
+        return statement
+    
     def get_sales_by_date_range(self, start_date: datetime, end_date: datetime) -> List[dict]:
         """Récupérer les ventes dans une période"""
         try:
-            results = self.db.query(
-                Sale,
-                Product.nom.label('product_nom'),
-                Product.prix.label('prix_unitaire'),
-                User.nom.label('user_nom')
-            ).join(
-                Product, Sale.product_id == Product.id
-            ).join(
-                User, Sale.user_id == User.id
-            ).filter(
-                Sale.date >= start_date,
-                Sale.date <= end_date
-            ).order_by(desc(Sale.date)).all()
+            return self._details(
+                self._details_statement().where(
+                    Sale.date >= start_date,
+                    Sale.date <= end_date
+                ).order_by(desc(Sale.date))
+            )
+        except Exception as e:
+            raise e
+    
+    def _totals_columns(self):
+        """Colonnes agrégées communes : montant exact, nombre de ventes, quantités"""
+        return (
+            func.coalesce(
+                cast(func.sum(Sale.total), Numeric(14, 2)), 0
+            ).label('total_amount'),
+            func.count(Sale.id).label('sales_count'),
+            func.coalesce(func.sum(Sale.quantity), 0).label('total_quantity')
+        )
+    
+    @staticmethod
+    def _filter_dates(query, start_date: Optional[datetime], end_date: Optional[datetime]):
+        """Appliquer les bornes de date (optionnelles) à une requête sur les ventes"""
+        if start_date is not None:
+            query = query.filter(Sale.date >= start_date)
+        if end_date is not None:
+            query = query.filter(Sale.date <= end_date)
+        return query
+    
+    def get_sales_totals(
+        self,
+        start_date: Optional[datetime] = None,
+        end_date: Optional[datetime] = None
+    ) -> dict:
+        """Calculer montant total, nombre de ventes et quantités en une seule requête SQL"""
+        try:
+            # Montants figés sur chaque vente : aucune jointure
+            query = self.db.query(*self._totals_columns()).select_from(Sale)
+            total_amount, sales_count, total_quantity = self._filter_dates(
+                query, start_date, end_date
+            ).one()
             
-            sales = []
-            for sale, product_nom, prix_unitaire, user_nom in results:
-                sales.append({
-                    "id": sale.id,
-                    "product_id": sale.product_id,
-                    "user_id": sale.user_id,
-                    "quantity": sale.quantity,
-                    "date": sale.date,
-                    "product_nom": product_nom,
-                    "user_nom": user_nom,
-                    "prix_unitaire": float(prix_unitaire),
-                    "prix_total": float(prix_unitaire) * sale.quantity
-                })
-            return sales
+            return {
+                "total_amount": Decimal(str(total_amount)),
+                "sales_count": int(sales_count),
+                "total_quantity": int(total_quantity)
+            }
+        except Exception as e:
+            raise e
+    
+    def get_sales_totals_grouped(
+        self,
+        group_by: str,
+        start_date: Optional[datetime] = None,
+        end_date: Optional[datetime] = None
+    ) -> List[dict]:
+        """Calculer les totaux regroupés par produit ou par utilisateur (une seule requête)"""
+        try:
+            id_column, nom_column = TOTALS_GROUP_BY[group_by]
+            # Seule la table portant le nom du groupe est jointe
+            name_model = User if group_by == "user" else Product
+            query = self.db.query(
+                id_column, nom_column, *self._totals_columns()
+            ).select_from(Sale).join(name_model, id_column == name_model.id)
+            
+            results = self._filter_dates(query, start_date, end_date).group_by(
+                id_column, nom_column
+            ).order_by(desc('total_amount')).all()
+            
+            return [
+                {
+                    f"{group_by}_id": group_id,
+                    f"{group_by}_nom": nom,
+                    "total_amount": Decimal(str(total_amount)),
+                    "sales_count": int(sales_count),
+                    "total_quantity": int(total_quantity)
+                }
+                for group_id, nom, total_amount, sales_count, total_quantity in results
+            ]
+        except Exception as e:
+            raise e
+    
+    def get_sales_series(
+        self,
+        bucket: str,
+        start_date: datetime,
+        end_date: datetime,
+        first_bucket: datetime,
+        last_bucket: datetime,
+        tz_name: str = "UTC",
+        product_id: Optional[int] = None,
+        user_id: Optional[int] = None
+    ) -> List[dict]:
+        """
+        Unités, chiffre d'affaires et nombre de ventes par pas de temps local,
+        un point par pas de first_bucket à last_bucket (pas sans vente à zéro)
+        
+        PostgreSQL : date_trunc dans le fuseau demandé, generate_series pour les pas vides.
+        SQLite : agrégat par créneau UTC de 15 minutes, regroupé en pas locaux ici.
+        """
+        try:
+            filters = [Sale.date >= start_date, Sale.date <= end_date]
+            if product_id is not None:
+                filters.append(Sale.product_id == product_id)
+            if user_id is not None:
+                filters.append(Sale.user_id == user_id)
+            
+            if self.db.get_bind().dialect.name == "postgresql":
+                # Dates stockées en UTC naïf : UTC -> timestamptz -> heure locale du fuseau
+                local_date = func.timezone(tz_name, func.timezone('UTC', Sale.date), type_=DateTime)
+                aggregate = select(
+                    func.date_trunc(bucket, local_date, type_=DateTime).label('bucket'),
+                    func.sum(Sale.quantity).label('units'),
+                    func.sum(Sale.total).label('revenue'),
+                    func.count(Sale.id).label('sales_count')
+                ).where(*filters).group_by(text("1"))
+                return series_points(self.db.execute(gap_filled_statement(aggregate, bucket, first_bucket, last_bucket)))
+            
+            slot = sqlite_slot(Sale.date, SQLITE_SLOT_SECONDS)
+            rows = self.db.execute(
+                select(slot, func.sum(Sale.quantity), func.sum(Sale.total), func.count(Sale.id)).where(*filters).group_by(text("1"))
+            )
+            tz = load_timezone(tz_name)
+            totals = {}
+            for slot_number, units, revenue, sales_count in rows:
+                local_start = to_local(EPOCH + timedelta(seconds=slot_number * SQLITE_SLOT_SECONDS), tz)
+                add_totals(totals, truncate(local_start, bucket), units, revenue, sales_count)
+            return fill_series(totals, first_bucket, last_bucket, bucket)
         except Exception as e:
             raise e
     
@@ -210,4 +336,42 @@ class SaleDAL:
             return True
         except Exception as e:
             self.db.rollback()
-            raise e
\ No newline at end of file
+            raise e
+    
+    def delete_sale_returning(self, sale_id: int, commit: bool = True) -> Optional[dict]:
+        """Supprimer une vente en une instruction et renvoyer son produit, son vendeur, sa quantité, sa date et son montant"""
+        try:
+            row = self.db.execute(
+                delete(Sale).where(Sale.id == sale_id).returning(
+                    Sale.id, Sale.product_id, Sale.user_id, Sale.quantity, Sale.date, Sale.total
+                )
+            ).first()
+            if commit:
+                self.db.commit()
+            return dict(row._mapping) if row else None
+        except Exception as e:
+            self.db.rollback()
+            raise e
+    
+    def publish_changes(self, action: str, sales: Iterable) -> None:
+        """Annoncer des ventes créées, modifiées ou supprimées (flux /events, envoi au COMMIT)"""
+        for sale in sales:
+            get = sale.get if isinstance(sale, dict) else lambda key: getattr(sale, key)
+            emit_event(self.db, {
+                "type": "sale",
+                "action": action,
+                "id": get("id"),
+                "product_id": get("product_id"),
+                "user_id": get("user_id"),
+                "quantity": get("quantity"),
+                "total": get("total"),
+                "date": get("date")
+            }, key=("sale", get("id")))
+    
+    def commit(self) -> None:
+        """Valider la transaction en cours"""
+        self.db.commit()
+    
+    def rollback(self) -> None:
+        """Annuler la transaction en cours"""
+        self.db.rollback()
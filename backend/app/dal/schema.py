@@ -0,0 +1,66 @@
+import logging
+from pathlib import Path
+from typing import Optional
+from alembic import command
+from alembic.config import Config
+from alembic.runtime.migration import MigrationContext
+from alembic.script import ScriptDirectory
+from sqlalchemy.engine import Engine
+
+logger = logging.getLogger(__name__)
+
+# Fonction SQL de normalisation utilisée par la recherche de produits sous PostgreSQL (créée par migration)
+SEARCH_NORMALIZE_FUNCTION = "f_search_normalize"
+
+# Configuration Alembic du projet (backend/alembic.ini)
+ALEMBIC_INI = Path(__file__).resolve().parents[2] / "alembic.ini"
+
+
+def alembic_config(url: Optional[str] = None) -> Config:
+    """
+    Configuration Alembic, éventuellement pour une autre base que DATABASE_URL
+
+    Args:
+        url (str): URL de la base cible (DATABASE_URL par défaut)
+    """
+    config = Config(str(ALEMBIC_INI))
+    # La journalisation de l'application est conservée
+    config.attributes["configure_logger"] = False
+    if url:
+        config.set_main_option("sqlalchemy.url", url.replace("%", "%%"))
+    return config
+
+
+def upgrade_schema(url: Optional[str] = None, revision: str = "head") -> None:
+    """Appliquer les migrations (équivalent de `alembic upgrade head`)"""
+    command.upgrade(alembic_config(url), revision)
+
+
+def check_schema(engine: Engine) -> bool:
+    """
+    Vérifier au démarrage que la base est à la dernière migration
+
+    Les migrations ne sont pas appliquées ici (plusieurs workers démarrent en
+    même temps, les index sont créés CONCURRENTLY) : un écart est journalisé.
+
+    Args:
+        engine (Engine): Moteur SQLAlchemy de l'application
+
+    Returns:
+        bool: True si la base est à jour
+    """
+    heads = set(ScriptDirectory.from_config(alembic_config()).get_heads())
+    try:
+        with engine.connect() as connection:
+            current = set(MigrationContext.configure(connection).get_current_heads())
+    except Exception as e:
+        logger.warning("Version du schéma illisible: %s", e)
+        return False
+
+    if current != heads:
+        logger.warning(
+            "Schéma de base en retard (%s, attendu %s) : exécuter `alembic upgrade head`",
+            ", ".join(sorted(current)) or "aucune migration", ", ".join(sorted(heads))
+        )
+        return False
+    return True
@@ -0,0 +1,62 @@
+from sqlalchemy import DateTime, Integer, Numeric, cast, func, literal, literal_column, select
+from sqlalchemy.sql import Select
+from sqlalchemy.sql.elements import ColumnElement
+from app.utils.series import BucketTotals
+from typing import Dict, Iterable
+from datetime import datetime
+from decimal import Decimal
+
+
+def gap_filled_statement(aggregate: Select, bucket: str, first: datetime, last: datetime) -> Select:
+    """
+    PostgreSQL : série complète (generate_series) jointe à un agrégat par pas
+
+    Args:
+        aggregate (Select): Requête (bucket, units, revenue, sales_count) groupée par pas
+        bucket (str): Pas validé (hour, day, week, month)
+        first (datetime): Début du premier pas (heure locale)
+        last (datetime): Début du dernier pas (heure locale)
+    """
+    totals = aggregate.subquery()
+    series = select(
+        func.generate_series(
+            cast(literal(first), DateTime), cast(literal(last), DateTime), literal_column(f"interval '1 {bucket}'"),
+            type_=DateTime
+        ).label('bucket')
+    ).subquery()
+    return select(
+        series.c.bucket,
+        func.coalesce(totals.c.units, 0).label('units'),
+        cast(func.coalesce(totals.c.revenue, 0), Numeric(14, 2)).label('revenue'),
+        func.coalesce(totals.c.sales_count, 0).label('sales_count')
+    ).select_from(
+        series.outerjoin(totals, totals.c.bucket == series.c.bucket)
+    ).order_by(series.c.bucket)
+
+
+def series_points(rows: Iterable) -> list:
+    """Lignes (bucket, units, revenue, sales_count) -> points typés"""
+    return [
+        {
+            "bucket": bucket,
+            "units": int(units),
+            "revenue": Decimal(str(revenue)),
+            "sales_count": int(sales_count)
+        }
+        for bucket, units, revenue, sales_count in rows
+    ]
+
+
+def add_totals(totals: Dict[datetime, BucketTotals], bucket: datetime, units, revenue, sales_count) -> None:
+    """Cumuler un sous-total (créneau ou jour) dans son pas"""
+    current_units, current_revenue, current_count = totals.get(bucket, (0, Decimal("0.00"), 0))
+    totals[bucket] = (
+        current_units + int(units),
+        current_revenue + Decimal(str(revenue)),
+        current_count + int(sales_count)
+    )
+
+
+def sqlite_slot(column: ColumnElement, seconds: int) -> ColumnElement:
+    """SQLite : numéro de créneau de `seconds` secondes depuis l'epoch (dates UTC naïves)"""
+    return cast(func.strftime('%s', column), Integer) // seconds
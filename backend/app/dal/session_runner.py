@@ -0,0 +1,115 @@
+from typing import Any, AsyncIterator, Callable, List, Union
+from sqlalchemy.engine import Row
+from sqlalchemy.orm import Session
+from sqlalchemy.sql import Executable
+from sqlalchemy.ext.asyncio import AsyncSession
+from starlette.concurrency import run_in_threadpool
+from app.config import DB_ASYNC, SessionLocal, AsyncSessionLocal
+
+
+class SessionRunner:
+    """
+    Exécuter le code DAL/service (synchrone) sur la session de la requête
+
+    - Mode async (DB_ASYNC=true) : AsyncSession.run_sync, les E/S base de données
+      sont asynchrones et aucun thread n'est monopolisé pendant l'attente.
+    - Mode sync : le code est exécuté dans le pool de threads de Starlette.
+    """
+
+    def __init__(self, session: Union[Session, AsyncSession]):
+        self.session = session
+
+    async def run(self, fn: Callable[..., Any], *args, **kwargs) -> Any:
+        """
+        Appeler fn(session, *args, **kwargs) avec une Session synchrone
+
+        Args:
+            fn (Callable): Fonction recevant la Session en premier argument
+
+        Returns:
+            Any: Valeur renvoyée par fn
+        """
+        if isinstance(self.session, AsyncSession):
+            return await self.session.run_sync(fn, *args, **kwargs)
+        return await run_in_threadpool(fn, self.session, *args, **kwargs)
+
+
+async def get_runner():
+    """Dependency FastAPI : SessionRunner lié à une session (async ou sync selon la configuration)"""
+    if DB_ASYNC:
+        async with AsyncSessionLocal() as db:
+            try:
+                yield SessionRunner(db)
+            except Exception:
+                await db.rollback()
+                raise
+        return
+
+    db = SessionLocal()
+    try:
+        yield SessionRunner(db)
+    except Exception:
+        await run_in_threadpool(db.rollback)
+        raise
+    finally:
+        # La fermeture rend la connexion au pool (ROLLBACK réseau) : hors de la boucle d'événements
+        await run_in_threadpool(db.close)
+
+
+async def run_in_session(fn: Callable[..., Any], *args, **kwargs) -> Any:
+    """
+    Appeler fn(session, *args, **kwargs) sur une session dédiée, ouverte puis fermée ici
+
+    Chaque appel a sa propre connexion : plusieurs lectures indépendantes
+    peuvent s'exécuter en parallèle (asyncio.gather).
+
+    Args:
+        fn (Callable): Fonction recevant la Session en premier argument
+
+    Returns:
+        Any: Valeur renvoyée par fn
+    """
+    if DB_ASYNC:
+        async with AsyncSessionLocal() as db:
+            return await SessionRunner(db).run(fn, *args, **kwargs)
+
+    db = SessionLocal()
+    try:
+        return await SessionRunner(db).run(fn, *args, **kwargs)
+    finally:
+        await run_in_threadpool(db.close)
+
+
+async def stream_rows(statement: Executable, batch_size: int = 1000) -> AsyncIterator[List[Row]]:
+    """
+    Parcourir le résultat d'une requête par paquets via un curseur côté serveur
+
+    La session est propre au flux (elle survit à la fin du handler, contrairement
+    à celle de get_runner) : adapté aux StreamingResponse.
+
+    Args:
+        statement (Executable): Requête à exécuter
+        batch_size (int): Nombre de lignes par paquet
+
+    Yields:
+        List[Row]: Paquet de lignes
+    """
+    statement = statement.execution_options(yield_per=batch_size)
+
+    if DB_ASYNC:
+        async with AsyncSessionLocal() as db:
+            result = await db.stream(statement)
+            async for partition in result.partitions():
+                yield partition
+        return
+
+    db = SessionLocal()
+    try:
+        result = await run_in_threadpool(db.execute, statement)
+        while True:
+            partition = await run_in_threadpool(result.fetchmany, batch_size)
+            if not partition:
+                break
+            yield partition
+    finally:
+        await run_in_threadpool(db.close)
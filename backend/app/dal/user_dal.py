@@ -1,4 +1,5 @@
 from sqlalchemy.orm import Session
+from sqlalchemy import update
 from app.models.user import User
 from typing import Optional, List
 
@@ -25,6 +26,13 @@ class UserDAL:
         except Exception as e:
             raise e
     
+    def get_user_nom(self, user_id: int) -> Optional[str]:
+        """Récupérer uniquement le nom d'un utilisateur (None si introuvable)"""
+        try:
+            return self.db.query(User.nom).filter(User.id == user_id).scalar()
+        except Exception as e:
+            raise e
+    
     def get_user_by_email(self, email: str) -> Optional[User]:
         """Récupérer un utilisateur par son email"""
         try:
@@ -57,6 +65,21 @@ class UserDAL:
             self.db.rollback()
             raise e
     
+    def replace_password_hash(self, user_id: int, old_hash: str, new_hash: str) -> bool:
+        """
+        Remplacer le hash du mot de passe s'il n'a pas changé entre-temps
+        (UPDATE conditionnel : un changement de mot de passe concurrent l'emporte)
+        """
+        try:
+            result = self.db.execute(
+                update(User).where(User.id == user_id, User.password == old_hash).values(password=new_hash)
+            )
+            self.db.commit()
+            return result.rowcount == 1
+        except Exception as e:
+            self.db.rollback()
+            raise e
+    
     def delete_user(self, user_id: int) -> bool:
         """Supprimer un utilisateur"""
         try:
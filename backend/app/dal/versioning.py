@@ -0,0 +1,17 @@
+from sqlalchemy import func, select
+from sqlalchemy.sql import Subquery
+
+
+def version_subquery(model, name: str) -> Subquery:
+    """
+    Version d'une table : (nombre de lignes, id max, dernière modification)
+
+    Une création change l'id max, une modification la date max, une
+    suppression le nombre de lignes : toute écriture change la version.
+    Les trois agrégats sont servis par des index (clé primaire, updated_at).
+    """
+    return select(
+        func.count(model.id).label(f"{name}_count"),
+        func.max(model.id).label(f"{name}_max_id"),
+        func.max(model.updated_at).label(f"{name}_updated_at")
+    ).subquery(f"{name}_version")
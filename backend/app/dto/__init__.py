@@ -1,9 +1,20 @@
 from app.dto.user_dto import UserCreate, UserLogin, UserResponse, UserUpdate
-from app.dto.product_dto import ProductCreate, ProductResponse, ProductUpdate
-from app.dto.sale_dto import SaleCreate, SaleResponse, SaleUpdate
+from app.dto.product_dto import (
+    ProductCreate, ProductResponse, ProductUpdate, LowStockProduct, ProductImportError, ProductImportReport
+)
+from app.dto.sale_dto import (
+    SaleCreate, SaleResponse, SaleUpdate, SaleLine, SaleBatchCreate, SaleBatchResponse,
+    SalesSeriesPoint, SalesSeriesResponse, LeaderboardEntry, LeaderboardResponse
+)
+from app.dto.dashboard_dto import (
+    DashboardCounts, RevenueTotals, RevenueWindow, DashboardSummary
+)
 
 __all__ = [
     "UserCreate", "UserLogin", "UserResponse", "UserUpdate",
-    "ProductCreate", "ProductResponse", "ProductUpdate",
-    "SaleCreate", "SaleResponse", "SaleUpdate"
+    "ProductCreate", "ProductResponse", "ProductUpdate", "LowStockProduct", "ProductImportError", "ProductImportReport",
+    "SaleCreate", "SaleResponse", "SaleUpdate",
+    "SaleLine", "SaleBatchCreate", "SaleBatchResponse", "SalesSeriesPoint", "SalesSeriesResponse",
+    "LeaderboardEntry", "LeaderboardResponse",
+    "DashboardCounts", "RevenueTotals", "RevenueWindow", "DashboardSummary"
 ]
\ No newline at end of file
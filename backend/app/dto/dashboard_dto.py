@@ -0,0 +1,33 @@
+from pydantic import BaseModel
+from datetime import date, datetime
+from decimal import Decimal
+from typing import List
+from app.dto.product_dto import LowStockProduct
+from app.dto.sale_dto import SaleResponse
+
+# DTO des compteurs globaux
+class DashboardCounts(BaseModel):
+    products: int
+    users: int
+    sales: int
+    low_stock: int
+
+# DTO des totaux de ventes (toute la période)
+class RevenueTotals(BaseModel):
+    total_amount: Decimal
+    sales_count: int
+    total_quantity: int
+
+# DTO des totaux d'une fenêtre glissante (jour en cours compris)
+class RevenueWindow(RevenueTotals):
+    days: int
+    start_day: date
+
+# DTO du résumé du tableau de bord
+class DashboardSummary(BaseModel):
+    generated_at: datetime
+    counts: DashboardCounts
+    revenue: RevenueTotals
+    revenue_windows: List[RevenueWindow]
+    low_stock: List[LowStockProduct]
+    recent_sales: List[SaleResponse]
@@ -1,13 +1,16 @@
 from pydantic import BaseModel
 from decimal import Decimal
-from typing import Optional
+from datetime import datetime
+from typing import Optional, List
 
 # DTO pour la création d'un produit
 class ProductCreate(BaseModel):
     nom: str
     prix: Decimal
     stock: int
+    reorder_threshold: int = 20
     image_url: Optional[str] = None
+    reference: Optional[str] = None
 
 # DTO pour la réponse
 class ProductResponse(BaseModel):
@@ -15,7 +18,10 @@ class ProductResponse(BaseModel):
     nom: str
     prix: Decimal
     stock: int
+    reorder_threshold: int = 20
     image_url: Optional[str] = None
+    reference: Optional[str] = None
+    updated_at: Optional[datetime] = None
     
     class Config:
         from_attributes = True
@@ -25,4 +31,27 @@ class ProductUpdate(BaseModel):
     nom: Optional[str] = None
     prix: Optional[Decimal] = None
     stock: Optional[int] = None
-    image_url: Optional[str] = None
\ No newline at end of file
+    reorder_threshold: Optional[int] = None
+    image_url: Optional[str] = None
+    reference: Optional[str] = None
+
+# DTO d'un produit à réapprovisionner (shortfall : unités sous le seuil)
+class LowStockProduct(BaseModel):
+    id: int
+    nom: str
+    prix: Decimal
+    stock: int
+    reorder_threshold: int
+    shortfall: int
+    reference: Optional[str] = None
+
+# DTO pour le rapport d'import de catalogue
+class ProductImportError(BaseModel):
+    line: int
+    error: str
+
+class ProductImportReport(BaseModel):
+    total_rows: int
+    imported: int
+    error_count: int
+    errors: List[ProductImportError]
@@ -1,7 +1,7 @@
-from pydantic import BaseModel
-from datetime import datetime
+from pydantic import BaseModel, Field
+from datetime import date, datetime
 from decimal import Decimal
-from typing import Optional
+from typing import Optional, List
 
 # DTO pour la création d'une vente
 class SaleCreate(BaseModel):
@@ -28,4 +28,55 @@ class SaleResponse(BaseModel):
     prix_total: Optional[Decimal] = None
     
     class Config:
-        from_attributes = True
\ No newline at end of file
+        from_attributes = True
+
+# DTO pour une ligne de panier
+class SaleLine(BaseModel):
+    product_id: int
+    quantity: int
+
+# DTO pour l'enregistrement d'un panier complet (plusieurs ventes en une requête)
+class SaleBatchCreate(BaseModel):
+    user_id: int
+    items: List[SaleLine] = Field(..., min_length=1, max_length=200)
+
+# DTO pour la réponse d'un panier
+class SaleBatchResponse(BaseModel):
+    user_id: int
+    user_nom: str
+    total_quantity: int
+    prix_total: Decimal
+    sales: List[SaleResponse]
+
+# DTO d'un point de série temporelle (début du pas en heure locale)
+class SalesSeriesPoint(BaseModel):
+    bucket: datetime
+    units: int
+    revenue: Decimal
+    sales_count: int
+
+# DTO de la série des ventes par pas de temps
+class SalesSeriesResponse(BaseModel):
+    bucket: str
+    timezone: str
+    start_date: datetime
+    end_date: datetime
+    product_id: Optional[int] = None
+    user_id: Optional[int] = None
+    points: List[SalesSeriesPoint]
+
+# DTO d'une ligne de classement (produit ou vendeur)
+class LeaderboardEntry(BaseModel):
+    rank: int
+    id: int
+    nom: str
+    units: int
+    revenue: Decimal
+    sales_count: int
+
+# DTO d'un classement sur une fenêtre de jours
+class LeaderboardResponse(BaseModel):
+    days: int
+    start_day: date
+    rank_by: str
+    entries: List[LeaderboardEntry]
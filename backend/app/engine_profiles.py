@@ -0,0 +1,232 @@
+import os
+import uuid
+from dataclasses import dataclass, replace
+from typing import Any, Dict, Mapping
+from sqlalchemy import event
+from sqlalchemy.engine import Engine, make_url
+
+# Valeurs par défaut de chaque profil ; chaque champ reste surchargeable par variable d'environnement
+PROFILE_DEFAULTS = {
+    "development": dict(
+        pool_size=5, max_overflow=10, pool_timeout=30, pool_recycle=1800,
+        statement_timeout_ms=0, idle_in_transaction_timeout_ms=0
+    ),
+    "production": dict(
+        pool_size=10, max_overflow=5, pool_timeout=10, pool_recycle=1800,
+        statement_timeout_ms=30000, idle_in_transaction_timeout_ms=60000
+    ),
+    # Derrière PgBouncer en mode transaction : petit pool local, PgBouncer mutualise le reste
+    "pgbouncer": dict(
+        pool_size=5, max_overflow=0, pool_timeout=10, pool_recycle=1800,
+        statement_timeout_ms=30000, idle_in_transaction_timeout_ms=60000, pgbouncer=True
+    ),
+}
+
+# Variable d'environnement -> champ du profil
+ENV_OVERRIDES = {
+    "DB_POOL_SIZE": "pool_size",
+    "DB_MAX_OVERFLOW": "max_overflow",
+    "DB_POOL_TIMEOUT": "pool_timeout",
+    "DB_POOL_RECYCLE": "pool_recycle",
+    "DB_STATEMENT_TIMEOUT_MS": "statement_timeout_ms",
+    "DB_IDLE_IN_TRANSACTION_TIMEOUT_MS": "idle_in_transaction_timeout_ms",
+    "DB_MAX_CONNECTIONS": "max_connections",
+    "WEB_CONCURRENCY": "workers",
+}
+FLAG_OVERRIDES = {
+    "DB_PGBOUNCER": "pgbouncer",
+    "DB_ECHO": "echo",
+    "DB_POOL_PRE_PING": "pool_pre_ping",
+}
+
+_TRUE = ("1", "true", "yes")
+
+
+@dataclass(frozen=True)
+class EngineProfile:
+    """Réglages du moteur SQLAlchemy d'un déploiement"""
+    name: str
+    pool_size: int
+    max_overflow: int
+    pool_timeout: int
+    pool_recycle: int
+    statement_timeout_ms: int
+    idle_in_transaction_timeout_ms: int
+    pgbouncer: bool = False
+    echo: bool = False
+    pool_pre_ping: bool = True
+    # Budget de connexions côté serveur (0 : non vérifié) et nombre de workers qui le partagent
+    max_connections: int = 0
+    workers: int = 1
+
+    @property
+    def connections_per_worker(self) -> int:
+        return self.pool_size + self.max_overflow
+
+    def validate(self, url: str, engines: int = 1) -> None:
+        """
+        Vérifier la cohérence du profil au démarrage
+
+        Args:
+            url (str): URL de la base
+            engines (int): Moteurs ouverts par worker (2 si les piles sync et async coexistent)
+
+        Raises:
+            ValueError: Si un réglage est invalide ou si les pools dépassent le budget de connexions
+        """
+        for field in ("pool_size", "workers"):
+            if getattr(self, field) < 1:
+                raise ValueError(f"Profil {self.name}: {field} doit être >= 1")
+        for field in ("max_overflow", "pool_timeout", "pool_recycle", "statement_timeout_ms",
+                      "idle_in_transaction_timeout_ms", "max_connections"):
+            if getattr(self, field) < 0:
+                raise ValueError(f"Profil {self.name}: {field} ne peut pas être négatif")
+
+        if self.pgbouncer and make_url(url).get_backend_name() != "postgresql":
+            raise ValueError("DB_PGBOUNCER n'a de sens qu'avec PostgreSQL")
+
+        # Pire cas : tous les pools de tous les workers pleins, débordement compris
+        if self.max_connections:
+            needed = self.connections_per_worker * engines * self.workers
+            if needed > self.max_connections:
+                raise ValueError(
+                    f"Profil {self.name}: {self.workers} worker(s) x {engines} moteur(s) x "
+                    f"{self.connections_per_worker} connexions = {needed} > DB_MAX_CONNECTIONS ({self.max_connections})"
+                )
+
+
+def load_profile(environ: Mapping[str, str] = os.environ) -> EngineProfile:
+    """
+    Construire le profil moteur depuis l'environnement (DB_PROFILE + surcharges DB_*)
+
+    Args:
+        environ (Mapping[str, str]): Variables d'environnement
+
+    Returns:
+        EngineProfile: Profil (non encore validé)
+    """
+    name = environ.get("DB_PROFILE", "development").lower()
+    if name not in PROFILE_DEFAULTS:
+        raise ValueError(f"DB_PROFILE inconnu: {name} ({', '.join(PROFILE_DEFAULTS)})")
+
+    profile = EngineProfile(name=name, **PROFILE_DEFAULTS[name])
+    overrides: Dict[str, Any] = {}
+    for variable, field in ENV_OVERRIDES.items():
+        if environ.get(variable):
+            try:
+                overrides[field] = int(environ[variable])
+            except ValueError:
+                raise ValueError(f"{variable} doit être un entier (reçu: {environ[variable]!r})")
+    for variable, field in FLAG_OVERRIDES.items():
+        if environ.get(variable):
+            overrides[field] = environ[variable].lower() in _TRUE
+    return replace(profile, **overrides)
+
+
+def _server_settings(profile: EngineProfile) -> Dict[str, str]:
+    """Paramètres de session PostgreSQL (0 : désactivé)"""
+    settings = {}
+    if profile.statement_timeout_ms:
+        settings["statement_timeout"] = str(profile.statement_timeout_ms)
+    if profile.idle_in_transaction_timeout_ms:
+        settings["idle_in_transaction_session_timeout"] = str(profile.idle_in_transaction_timeout_ms)
+    return settings
+
+
+def engine_options(profile: EngineProfile, url: str) -> Dict[str, Any]:
+    """
+    Arguments de create_engine / create_async_engine pour un profil et une URL
+
+    - Les timeouts sont transmis dans le paquet de démarrage (options libpq /
+      server_settings asyncpg) : aucune requête SET supplémentaire à la connexion.
+    - Mode PgBouncer : aucun paramètre de démarrage non supporté, aucune
+      requête préparée côté serveur (psycopg 3, asyncpg).
+    """
+    dialect = make_url(url).get_dialect()
+    options: Dict[str, Any] = {"echo": profile.echo, "pool_pre_ping": profile.pool_pre_ping}
+
+    if dialect.name == "sqlite":
+        if dialect.driver == "pysqlite":
+            options["connect_args"] = {"check_same_thread": False}
+        return options
+
+    options.update(
+        pool_size=profile.pool_size,
+        max_overflow=profile.max_overflow,
+        pool_timeout=profile.pool_timeout,
+        pool_recycle=profile.pool_recycle,
+    )
+    settings = _server_settings(profile)
+
+    if dialect.driver == "asyncpg":
+        connect_args: Dict[str, Any] = {}
+        if profile.pgbouncer:
+            # Caches asyncpg et SQLAlchemy désactivés, noms uniques si une préparation reste nécessaire
+            connect_args["statement_cache_size"] = 0
+            connect_args["prepared_statement_cache_size"] = 0
+            connect_args["prepared_statement_name_func"] = lambda: f"__asyncpg_{uuid.uuid4()}__"
+        elif settings:
+            connect_args["server_settings"] = settings
+        options["connect_args"] = connect_args
+        return options
+
+    # psycopg2 / psycopg 3 (libpq) : l'encodage est un paramètre de démarrage accepté par PgBouncer
+    connect_args = {"client_encoding": "utf8"}
+    if profile.pgbouncer:
+        if dialect.driver == "psycopg":
+            connect_args["prepare_threshold"] = None
+    elif settings:
+        connect_args["options"] = " ".join(f"-c {key}={value}" for key, value in settings.items())
+    options["connect_args"] = connect_args
+    return options
+
+
+def install_transaction_timeouts(engine: Engine, profile: EngineProfile) -> None:
+    """
+    Mode PgBouncer : les paramètres de démarrage étant refusés et une session
+    serveur étant partagée entre clients, les timeouts sont posés par
+    transaction (set_config(..., true), équivalent de SET LOCAL annulé au COMMIT/ROLLBACK)
+
+    Tous les paramètres en une seule requête : un aller-retour par transaction.
+    """
+    settings = _server_settings(profile)
+    if not profile.pgbouncer or not settings:
+        return
+    # Valeurs numériques issues de la configuration : écrites en littéral (indépendant du pilote)
+    statement = "SELECT " + ", ".join(
+        f"set_config('{key}', '{value}', true)" for key, value in settings.items()
+    )
+
+    @event.listens_for(engine, "begin")
+    def _set_local_timeouts(connection):
+        # Réglage de transaction, compté à part comme BEGIN/COMMIT (hors budgets de requêtes)
+        connection.exec_driver_sql(statement, execution_options={"transaction_setup": True})
+
+
+
+def _register_sqlite_functions(dbapi_conn, connection_record) -> None:
+    # Import différé : app.utils charge la configuration, qui construit ce moteur
+    from app.utils.search import SQLITE_NORMALIZE_FUNCTION, normalize_text
+    # sqlite3 natif ou adaptateur aiosqlite (DB_ASYNC=true) : tous deux exposent create_function
+    dbapi_conn.create_function(SQLITE_NORMALIZE_FUNCTION, 1, normalize_text, deterministic=True)
+
+
+def install_sqlite_functions(engine: Engine) -> None:
+    """
+    SQLite : exposer la normalisation Python de la recherche (repli sans pg_trgm/unaccent)
+
+    Posé sur le moteur juste après sa création : toutes ses connexions, y compris
+    celles ouvertes avant le premier import du module de recherche, la reçoivent.
+    """
+    if engine.dialect.name == "sqlite":
+        event.listen(engine, "connect", _register_sqlite_functions)
+
+def describe(profile: EngineProfile) -> str:
+    """Résumé lisible du profil (journal de démarrage, sans secret)"""
+    return (
+        f"profil={profile.name} pool={profile.pool_size}+{profile.max_overflow} "
+        f"timeout={profile.pool_timeout}s recycle={profile.pool_recycle}s "
+        f"statement_timeout={profile.statement_timeout_ms}ms "
+        f"idle_in_transaction={profile.idle_in_transaction_timeout_ms}ms "
+        f"pgbouncer={profile.pgbouncer} echo={profile.echo}"
+    )
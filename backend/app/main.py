@@ -1,8 +1,32 @@
+import logging
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from app.config import engine, ENGINE_PROFILE, DEBUG, DB_QUERY_BUDGET
+from app.engine_profiles import describe
+from app.dal.schema import check_schema
+from app.utils.password_pool import password_pool
+from app.utils.event_broker import event_broker
+from app.utils.metrics import MetricsMiddleware
+from app.utils.query_budget import QueryBudgetMiddleware
 from app.routers.auth_router import router as auth_router
 from app.routers.product_router import router as product_router
 from app.routers.sale_router import router as sale_router
+from app.routers.dashboard_router import router as dashboard_router
+from app.routers.events_router import router as events_router
+from app.routers.metrics_router import router as metrics_router
+
+logger = logging.getLogger(__name__)
+
+# Démarrage : profil moteur et version du schéma (migrations appliquées par `alembic upgrade head`)
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    logger.info("Moteur SQL: %s", describe(ENGINE_PROFILE))
+    check_schema(engine)
+    await event_broker.start()
+    yield
+    event_broker.stop()
+    password_pool.shutdown()
 
 # Créer l'application FastAPI
 app = FastAPI(
@@ -10,7 +34,8 @@ app = FastAPI(
     description="API pour la gestion d'un magasin d'optique - Produits, Ventes et Utilisateurs",
     version="1.0.0",
     docs_url="/docs",
-    redoc_url="/redoc"
+    redoc_url="/redoc",
+    lifespan=lifespan
 )
 
 # Configuration CORS (Cross-Origin Resource Sharing)
@@ -20,12 +45,22 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "ETag", "X-DB-Queries", "X-DB-Time"],  # Lisibles par le navigateur
 )
 
+# Requêtes SQL par requête HTTP : budgets par route, en-têtes de diagnostic en mode debug
+app.add_middleware(QueryBudgetMiddleware, default_budget=DB_QUERY_BUDGET, debug_headers=DEBUG)
+
+# Métriques par route (ajouté en dernier : englobe toute la pile, CORS compris)
+app.add_middleware(MetricsMiddleware)
+
 # Enregistrer les routers
 app.include_router(auth_router)
 app.include_router(product_router)
 app.include_router(sale_router)
+app.include_router(dashboard_router)
+app.include_router(events_router)
+app.include_router(metrics_router)
 
 # Route racine
 @app.get("/", tags=["Root"])
@@ -38,7 +73,10 @@ def root():
         "endpoints": {
             "auth": "/auth",
             "products": "/products",
-            "sales": "/sales"
+            "sales": "/sales",
+            "dashboard": "/dashboard",
+            "events": "/events",
+            "metrics": "/metrics"
         }
     }
 
@@ -1,5 +1,6 @@
 from app.models.user import User
 from app.models.product import Product
 from app.models.sale import Sale
+from app.models.sales_daily_rollup import SalesDailyRollup
 
-__all__ = ["User", "Product", "Sale"]
\ No newline at end of file
+__all__ = ["User", "Product", "Sale", "SalesDailyRollup"]
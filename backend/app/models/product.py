@@ -1,11 +1,30 @@
-from sqlalchemy import Column, Integer, String, Numeric, Text
+from sqlalchemy import Column, Integer, String, Numeric, Text, DateTime, CheckConstraint, Index, text
+from datetime import datetime
 from app.config import Base
 
 class Product(Base):
     __tablename__ = "products"
+    __table_args__ = (
+        # Garde-fou en base : aucune vente concurrente ne peut rendre le stock négatif
+        CheckConstraint("stock >= 0", name="ck_products_stock_non_negative"),
+    )
     
     id = Column(Integer, primary_key=True, index=True, autoincrement=True)
     nom = Column(String(100), nullable=False)
     prix = Column(Numeric(10, 2), nullable=False)
     stock = Column(Integer, nullable=False)
-    image_url = Column(Text, nullable=True)
\ No newline at end of file
+    # Seuil de réapprovisionnement : produit en stock faible quand stock <= seuil
+    reorder_threshold = Column(Integer, nullable=False, default=20, server_default=text("20"))
+    image_url = Column(Text, nullable=True)
+    # Référence fournisseur (clé naturelle utilisée par l'import de catalogue)
+    reference = Column(String(64), unique=True, nullable=True, index=True)
+    # Date de dernière modification (ETag / revalidation HTTP)
+    updated_at = Column(DateTime, nullable=False, default=datetime.utcnow, onupdate=datetime.utcnow, index=True)
+
+# Index partiel (migration 0004) : seuls les produits en stock faible y figurent
+Index(
+    "ix_products_low_stock",
+    Product.stock,
+    postgresql_where=Product.stock <= Product.reorder_threshold,
+    sqlite_where=Product.stock <= Product.reorder_threshold
+)
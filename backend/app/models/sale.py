@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, ForeignKey, DateTime
+from sqlalchemy import Column, Integer, Numeric, ForeignKey, DateTime, Index
 from sqlalchemy.orm import relationship
 from datetime import datetime
 from app.config import Base
@@ -10,8 +10,18 @@ class Sale(Base):
     product_id = Column(Integer, ForeignKey("products.id"), nullable=False)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
     quantity = Column(Integer, nullable=False)
-    date = Column(DateTime, default=datetime.utcnow)
+    # Prix unitaire et montant figés à la vente (indépendants des changements de prix ultérieurs)
+    unit_price = Column(Numeric(10, 2), nullable=False)
+    total = Column(Numeric(12, 2), nullable=False)
+    date = Column(DateTime, nullable=False, default=datetime.utcnow)
+    # Date de dernière modification (ETag / revalidation HTTP)
+    updated_at = Column(DateTime, nullable=False, default=datetime.utcnow, onupdate=datetime.utcnow, index=True)
     
     # Relations (optionnel mais pratique pour les requêtes)
     product = relationship("Product", backref="sales")
-    user = relationship("User", backref="sales")
\ No newline at end of file
+    user = relationship("User", backref="sales")
+
+# Index composites (migration 0002) : ventes d'un produit / d'un vendeur par date, liste paginée (date, id)
+Index("ix_sales_product_id_date", Sale.product_id, Sale.date.desc())
+Index("ix_sales_user_id_date", Sale.user_id, Sale.date.desc())
+Index("ix_sales_date_id", Sale.date.desc(), Sale.id.desc())
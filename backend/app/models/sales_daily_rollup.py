@@ -0,0 +1,14 @@
+from sqlalchemy import Column, Integer, Numeric, Date, ForeignKey
+from app.config import Base
+
+class SalesDailyRollup(Base):
+    """Agrégat journalier des ventes par produit et vendeur (maintenu dans la transaction de chaque vente)"""
+    __tablename__ = "sales_daily_rollup"
+    
+    day = Column(Date, primary_key=True)
+    product_id = Column(Integer, ForeignKey("products.id"), primary_key=True)
+    user_id = Column(Integer, ForeignKey("users.id"), primary_key=True)
+    units = Column(Integer, nullable=False, default=0)
+    # Chiffre d'affaires au prix appliqué lors de la vente
+    revenue = Column(Numeric(14, 2), nullable=False, default=0)
+    sales_count = Column(Integer, nullable=False, default=0)
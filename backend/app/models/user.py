@@ -1,4 +1,5 @@
-from sqlalchemy import Column, Integer, String
+from sqlalchemy import Column, Integer, String, DateTime
+from datetime import datetime
 from app.config import Base
 
 class User(Base):
@@ -7,4 +8,6 @@ class User(Base):
     id = Column(Integer, primary_key=True, index=True, autoincrement=True)
     nom = Column(String(100), nullable=False)
     email = Column(String(100), unique=True, nullable=False, index=True)
-    password = Column(String(255), nullable=False)
\ No newline at end of file
+    password = Column(String(255), nullable=False)
+    # Date de dernière modification (version de la liste des ventes, qui expose le nom)
+    updated_at = Column(DateTime, nullable=False, default=datetime.utcnow, onupdate=datetime.utcnow, index=True)
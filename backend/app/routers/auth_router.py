@@ -1,54 +1,70 @@
 from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.orm import Session
-from app.config import get_db
+from app.dal.session_runner import SessionRunner, get_runner
 from app.dal.user_dal import UserDAL
-from app.services.auth_service import AuthService
+from app.services.auth_service import AuthService, INVALID_CREDENTIALS
+from app.utils.security import hash_password, verify_and_update_password
+from app.utils.password_pool import password_pool, PasswordPoolSaturated
 from app.dto.user_dto import UserCreate, UserLogin, UserResponse
 
 router = APIRouter(prefix="/auth", tags=["Authentication"])
 
+def auth_service(db: Session) -> AuthService:
+    """Construire le service d'authentification sur la session de la requête"""
+    return AuthService(UserDAL(db))
+
+def saturated(e: PasswordPoolSaturated) -> HTTPException:
+    """Rejet rapide quand le pool de hachage est plein"""
+    return HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail=str(e), headers={"Retry-After": "1"})
+
 @router.post("/register", response_model=UserResponse, status_code=status.HTTP_201_CREATED)
-def register(user_data: UserCreate, db: Session = Depends(get_db)):
+async def register(user_data: UserCreate, runner: SessionRunner = Depends(get_runner)):
     """Inscription d'un nouvel utilisateur"""
     try:
-        user_dal = UserDAL(db)
-        auth_service = AuthService(user_dal)
-        return auth_service.register(user_data)
+        # bcrypt hors de la boucle d'événements et sans session ouverte
+        hashed_password = await password_pool.run(hash_password, user_data.password)
+        return await runner.run(lambda db: auth_service(db).register(user_data, hashed_password))
     except ValueError as e:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    except PasswordPoolSaturated as e:
+        raise saturated(e)
     except Exception as e:
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=str(e))
 
 @router.post("/login")
-def login(credentials: UserLogin, db: Session = Depends(get_db)):
-    """Connexion d'un utilisateur"""
+async def login(credentials: UserLogin, runner: SessionRunner = Depends(get_runner)):
+    """Connexion d'un utilisateur (hash recalculé si le coût bcrypt a changé)"""
     try:
-        user_dal = UserDAL(db)
-        auth_service = AuthService(user_dal)
-        return auth_service.login(credentials)
+        user = await runner.run(lambda db: auth_service(db).get_login_user(credentials.email))
+        is_valid, new_hash = await password_pool.run(verify_and_update_password, credentials.password, user.password)
+        if not is_valid:
+            raise ValueError(INVALID_CREDENTIALS)
+        # Réponse construite avant le COMMIT du rehash (qui expire les attributs de l'utilisateur)
+        login_response = AuthService.create_login_response(user)
+        if new_hash:
+            await runner.run(lambda db: auth_service(db).rehash_password(user, new_hash))
+        return login_response
     except ValueError as e:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail=str(e))
+    except PasswordPoolSaturated as e:
+        raise saturated(e)
     except Exception as e:
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=str(e))
 
 @router.get("/users/{user_id}", response_model=UserResponse)
-def get_user(user_id: int, db: Session = Depends(get_db)):
+async def get_user(user_id: int, runner: SessionRunner = Depends(get_runner)):
     """Récupérer un utilisateur par son ID"""
     try:
-        user_dal = UserDAL(db)
-        auth_service = AuthService(user_dal)
-        return auth_service.get_user_by_id(user_id)
+        return await runner.run(lambda db: auth_service(db).get_user_by_id(user_id))
     except ValueError as e:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=str(e))
 
 @router.get("/users", response_model=list[UserResponse])
-def get_all_users(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
+async def get_all_users(skip: int = 0, limit: int = 100, runner: SessionRunner = Depends(get_runner)):
     """Récupérer tous les utilisateurs"""
     try:
-        user_dal = UserDAL(db)
-        auth_service = AuthService(user_dal)
-        return auth_service.get_all_users(skip, limit)
+        return await runner.run(lambda db: auth_service(db).get_all_users(skip, limit))
     except Exception as e:
-        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=str(e))
\ No newline at end of file
+        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=str(e))
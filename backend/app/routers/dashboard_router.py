@@ -0,0 +1,24 @@
+from fastapi import APIRouter, HTTPException, status, Query, Response
+from app.services.dashboard_service import DashboardService, DEFAULT_WINDOWS
+from app.config import DASHBOARD_CACHE_TTL
+from app.dto.dashboard_dto import DashboardSummary
+
+router = APIRouter(prefix="/dashboard", tags=["Dashboard"])
+
+@router.get("/summary", response_model=DashboardSummary)
+async def get_dashboard_summary(
+    response: Response,
+    windows: str = Query(DEFAULT_WINDOWS, description="Fenêtres de chiffre d'affaires en jours, ex: 1,7,30"),
+    low_stock_limit: int = Query(10, ge=0, le=100, description="Nombre de produits à réapprovisionner listés"),
+    recent_limit: int = Query(5, ge=0, le=50, description="Nombre de ventes récentes")
+):
+    """Résumé du tableau de bord : compteurs, chiffre d'affaires, stock faible et ventes récentes"""
+    try:
+        summary = await DashboardService().get_summary(windows, low_stock_limit, recent_limit)
+        # Le résumé peut dater de DASHBOARD_CACHE_TTL secondes : le navigateur peut le réutiliser autant
+        response.headers["Cache-Control"] = f"private, max-age={int(DASHBOARD_CACHE_TTL)}"
+        return summary
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=str(e))
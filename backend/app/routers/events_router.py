@@ -0,0 +1,59 @@
+from fastapi import APIRouter, HTTPException, status, Query
+from fastapi.responses import StreamingResponse
+from app.config import EVENTS_HEARTBEAT
+from app.utils.event_broker import EVENT_TYPES, EventStreamUnavailable, event_broker
+from typing import Optional
+
+router = APIRouter(prefix="/events", tags=["Events"])
+
+# Délai de reconnexion conseillé au navigateur (EventSource), en millisecondes
+RETRY_MS = 3000
+
+@router.get("")
+async def stream_events(
+    types: Optional[str] = Query(None, description=f"Types d'événements séparés par des virgules ({', '.join(EVENT_TYPES)})")
+):
+    """
+    Flux Server-Sent Events des changements validés (stocks, produits, ventes)
+
+    À chaque (re)connexion le client reçoit "ready" puis les changements suivants ;
+    "resync" signale des événements perdus : l'état affiché doit être rechargé.
+    """
+    wanted = None
+    if types:
+        wanted = {part.strip() for part in types.split(",") if part.strip()}
+        unknown = wanted.difference(EVENT_TYPES)
+        if unknown:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Types d'événements inconnus: {', '.join(sorted(unknown))}"
+            )
+    
+    try:
+        event_broker.check_capacity()
+    except EventStreamUnavailable as e:
+        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail=str(e), headers={"Retry-After": "5"})
+    
+    async def content():
+        # Inscription au démarrage du flux seulement : un client parti avant le premier
+        # octet n'ouvre jamais le générateur et ne doit pas garder de place
+        try:
+            subscription = event_broker.subscribe(wanted)
+        except EventStreamUnavailable:
+            # Place prise entre-temps : fin du flux, le navigateur se reconnecte après `retry`
+            yield f"retry: {RETRY_MS}\n\n".encode("ascii")
+            return
+        try:
+            yield f"retry: {RETRY_MS}\nevent: ready\ndata: {{\"backend\":\"{event_broker.name}\"}}\n\n".encode("ascii")
+            while True:
+                frame = await subscription.next_frame(EVENTS_HEARTBEAT)
+                # Commentaire SSE en l'absence d'événement : connexion maintenue à travers les proxys
+                yield frame if frame is not None else b": ping\n\n"
+        finally:
+            event_broker.unsubscribe(subscription)
+    
+    return StreamingResponse(
+        content(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
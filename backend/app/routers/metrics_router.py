@@ -0,0 +1,39 @@
+from fastapi import APIRouter, Response
+from app.config import engine, async_engine
+from app.dal.product_dal import product_cache
+from app.dal.rollup_dal import leaderboard_cache
+from app.utils.metrics import metrics, render_pools, render_samples, METRICS_CONTENT_TYPE
+from app.utils.password_pool import password_pool
+from app.utils.event_broker import event_broker
+
+router = APIRouter(tags=["Monitoring"])
+
+@router.get("/metrics", include_in_schema=False)
+async def get_metrics():
+    """Métriques du processus au format texte Prometheus"""
+    engines = {"sync": engine}
+    if async_engine is not None:
+        engines["async"] = async_engine.sync_engine
+    
+    cache_labels = f'backend="{product_cache.name}"'
+    lines = metrics.render()
+    lines += render_pools(engines)
+    lines += render_samples("product_cache_hits_total", "Lectures de produits servies par le cache",
+                            [(cache_labels, product_cache.hits)], kind="counter")
+    lines += render_samples("product_cache_misses_total", "Lectures de produits servies par la base",
+                            [(cache_labels, product_cache.misses)], kind="counter")
+    leaderboard_labels = f'backend="{leaderboard_cache.name}"'
+    lines += render_samples("leaderboard_cache_hits_total", "Classements servis par le cache",
+                            [(leaderboard_labels, leaderboard_cache.hits)], kind="counter")
+    lines += render_samples("leaderboard_cache_misses_total", "Classements recalculés en base",
+                            [(leaderboard_labels, leaderboard_cache.misses)], kind="counter")
+    lines += render_samples("password_pool_rejected_total", "Demandes de hachage rejetées (pool saturé)",
+                            [("", password_pool.rejected)], kind="counter")
+    events_labels = f'backend="{event_broker.name}"'
+    lines += render_samples("events_subscribers", "Clients connectés au flux /events",
+                            [(events_labels, event_broker.subscribers)])
+    lines += render_samples("events_published_total", "Événements diffusés aux clients du processus",
+                            [(events_labels, event_broker.published)], kind="counter")
+    lines += render_samples("events_dropped_total", "Événements écartés (file d'un client saturée, remplacés par resync)",
+                            [(events_labels, event_broker.dropped)], kind="counter")
+    return Response("\n".join(lines) + "\n", media_type=METRICS_CONTENT_TYPE)
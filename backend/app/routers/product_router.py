@@ -1,82 +1,150 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Request, Response, UploadFile, File
 from sqlalchemy.orm import Session
-from app.config import get_db
-from app.dal.product_dal import ProductDAL
+from starlette.concurrency import run_in_threadpool
+from app.config import SessionLocal
+from app.dal.session_runner import SessionRunner, get_runner
+from app.dal.product_dal import ProductDAL, product_cache
 from app.services.product_service import ProductService
-from app.dto.product_dto import ProductCreate, ProductUpdate, ProductResponse
-from typing import List
+from app.services.product_import_service import ProductImportService, detect_format
+from app.dto.product_dto import ProductCreate, ProductUpdate, ProductResponse, LowStockProduct, ProductImportReport
+from app.utils.pagination import NEXT_CURSOR_HEADER
+from app.utils.etag import request_is_fresh, set_validators, not_modified
+from app.utils.json_response import trusted_json
+from typing import List, Optional
 
 router = APIRouter(prefix="/products", tags=["Products"])
 
+def product_service(db: Session) -> ProductService:
+    """Construire le service produit sur la session de la requête"""
+    return ProductService(ProductDAL(db))
+
 @router.post("/", response_model=ProductResponse, status_code=status.HTTP_201_CREATED)
-def create_product(product_data: ProductCreate, db: Session = Depends(get_db)):
+async def create_product(product_data: ProductCreate, runner: SessionRunner = Depends(get_runner)):
     """Créer un nouveau produit"""
     try:
-        product_dal = ProductDAL(db)
-        product_service = ProductService(product_dal)
-        return product_service.create_product(product_data)
+        return await runner.run(lambda db: product_service(db).create_product(product_data))
     except ValueError as e:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=str(e))
 
+def import_catalogue(stream, file_format: str) -> dict:
+    """Import de catalogue sur une session dédiée (travail CPU gardé hors de la boucle d'événements)"""
+    db = SessionLocal()
+    try:
+        return ProductImportService(ProductDAL(db)).import_file(stream, file_format)
+    finally:
+        db.close()
+
+@router.post("/import", response_model=ProductImportReport)
+async def import_products(
+    file: UploadFile = File(..., description="Catalogue CSV (en-tête nom,prix,stock,image_url,reference) ou NDJSON"),
+    file_format: Optional[str] = Query(None, alias="format", description="csv ou ndjson (déduit du nom de fichier sinon)")
+):
+    """Importer un catalogue fournisseur en masse (upsert par référence)"""
+    try:
+        file_format = file_format or detect_format(file.filename, file.content_type)
+        return await run_in_threadpool(import_catalogue, file.file, file_format)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=str(e))
+
+@router.get("/cache/stats")
+async def get_cache_stats():
+    """Statistiques du cache des produits (compteurs du processus courant)"""
+    return product_cache.stats()
+
+# Déclarée avant /{product_id} : "low-stock" ne doit pas être lu comme un ID
+@router.get("/low-stock", response_model=List[LowStockProduct])
+async def get_low_stock_products(
+    limit: int = Query(100, ge=1, le=1000),
+    runner: SessionRunner = Depends(get_runner)
+):
+    """Produits à réapprovisionner (stock <= seuil du produit), les plus urgents d'abord"""
+    try:
+        return await runner.run(lambda db: product_service(db).get_low_stock(limit))
+    except Exception as e:
+        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=str(e))
+
 @router.get("/{product_id}", response_model=ProductResponse)
-def get_product(product_id: int, db: Session = Depends(get_db)):
-    """Récupérer un produit par son ID"""
+async def get_product(product_id: int, request: Request, response: Response, runner: SessionRunner = Depends(get_runner)):
+    """Récupérer un produit par son ID (304 si le client a déjà cette version)"""
     try:
-        product_dal = ProductDAL(db)
-        product_service = ProductService(product_dal)
-        return product_service.get_product_by_id(product_id)
+        product = await runner.run(lambda db: product_service(db).get_product_by_id(product_id))
+        etag = ProductService.get_product_etag(product)
+        if request_is_fresh(request, etag, product.updated_at):
+            return not_modified(etag, product.updated_at)
+        set_validators(response, etag, product.updated_at)
+        return product
     except ValueError as e:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=str(e))
 
 @router.get("/", response_model=List[ProductResponse])
-def get_all_products(
+async def get_all_products(
+    request: Request,
+    response: Response,
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=1000),
-    db: Session = Depends(get_db)
+    after: Optional[str] = Query(None, description="Curseur de la page suivante (en-tête X-Next-Cursor)"),
+    runner: SessionRunner = Depends(get_runner)
 ):
-    """Récupérer tous les produits avec pagination"""
+    """Récupérer tous les produits avec pagination (offset ou curseur, 304 si inchangés)"""
+    def load(db: Session):
+        # Version vérifiée avant toute lecture de ligne : un 304 ne charge aucun produit
+        service = product_service(db)
+        etag = service.get_products_etag(skip, limit, after)
+        if request_is_fresh(request, etag):
+            return etag, None
+        return etag, service.get_products_page(skip, limit, after)
+    
     try:
-        product_dal = ProductDAL(db)
-        product_service = ProductService(product_dal)
-        return product_service.get_all_products(skip, limit)
+        etag, page = await runner.run(load)
+        if page is None:
+            return not_modified(etag)
+        products, cursor = page
+        set_validators(response, etag)
+        if cursor:
+            response.headers[NEXT_CURSOR_HEADER] = cursor
+        # Lignes du DAL déjà conformes à ProductResponse : encodées sans nouvelle validation
+        return trusted_json(products, response)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=str(e))
 
 @router.get("/search/", response_model=List[ProductResponse])
-def search_products(q: str = Query(..., min_length=2), db: Session = Depends(get_db)):
-    """Rechercher des produits par nom"""
+async def search_products(
+    q: str = Query(..., min_length=2),
+    skip: int = Query(0, ge=0),
+    limit: int = Query(50, ge=1, le=200),
+    runner: SessionRunner = Depends(get_runner)
+):
+    """Rechercher des produits par nom (sans accents, triés par pertinence)"""
     try:
-        product_dal = ProductDAL(db)
-        product_service = ProductService(product_dal)
-        return product_service.search_products(q)
+        return await runner.run(lambda db: product_service(db).search_products(q, skip, limit))
     except ValueError as e:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=str(e))
 
 @router.put("/{product_id}", response_model=ProductResponse)
-def update_product(product_id: int, product_data: ProductUpdate, db: Session = Depends(get_db)):
+async def update_product(product_id: int, product_data: ProductUpdate, runner: SessionRunner = Depends(get_runner)):
     """Mettre à jour un produit"""
     try:
-        product_dal = ProductDAL(db)
-        product_service = ProductService(product_dal)
-        return product_service.update_product(product_id, product_data)
+        return await runner.run(lambda db: product_service(db).update_product(product_id, product_data))
     except ValueError as e:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=str(e))
 
 @router.delete("/{product_id}", status_code=status.HTTP_204_NO_CONTENT)
-def delete_product(product_id: int, db: Session = Depends(get_db)):
+async def delete_product(product_id: int, runner: SessionRunner = Depends(get_runner)):
     """Supprimer un produit"""
     try:
-        product_dal = ProductDAL(db)
-        product_service = ProductService(product_dal)
-        product_service.delete_product(product_id)
+        await runner.run(lambda db: product_service(db).delete_product(product_id))
         return None
     except ValueError as e:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(e))
@@ -84,12 +152,12 @@ def delete_product(product_id: int, db: Session = Depends(get_db)):
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=str(e))
 
 @router.get("/{product_id}/stock-check")
-def check_stock(product_id: int, quantity: int = Query(..., ge=1), db: Session = Depends(get_db)):
+async def check_stock(product_id: int, quantity: int = Query(..., ge=1), runner: SessionRunner = Depends(get_runner)):
     """Vérifier la disponibilité du stock"""
     try:
-        product_dal = ProductDAL(db)
-        product_service = ProductService(product_dal)
-        is_available = product_service.check_stock_availability(product_id, quantity)
+        is_available = await runner.run(
+            lambda db: product_service(db).check_stock_availability(product_id, quantity)
+        )
         return {
             "product_id": product_id,
             "requested_quantity": quantity,
@@ -98,4 +166,4 @@ def check_stock(product_id: int, quantity: int = Query(..., ge=1), db: Session =
     except ValueError as e:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(e))
     except Exception as e:
-        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=str(e))
\ No newline at end of file
+        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=str(e))
@@ -1,129 +1,166 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Request, Response
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
-from app.config import get_db
+from app.dal.session_runner import SessionRunner, get_runner, stream_rows
 from app.dal.sale_dal import SaleDAL
 from app.dal.product_dal import ProductDAL
 from app.dal.user_dal import UserDAL
+from app.dal.rollup_dal import SalesRollupDAL
 from app.services.sale_service import SaleService
-from app.dto.sale_dto import SaleCreate, SaleUpdate, SaleResponse
-from typing import List
+from app.services.sale_export_service import SaleExportService, EXPORT_BATCH_SIZE
+from app.dto.sale_dto import (
+    SaleCreate, SaleUpdate, SaleResponse, SaleBatchCreate, SaleBatchResponse, SalesSeriesResponse, LeaderboardResponse
+)
+from app.utils.pagination import NEXT_CURSOR_HEADER
+from app.utils.etag import request_is_fresh, set_validators, not_modified
+from app.utils.json_response import trusted_json
+from typing import List, Optional
 from datetime import datetime
 
 router = APIRouter(prefix="/sales", tags=["Sales"])
 
+def sale_service(db: Session) -> SaleService:
+    """Construire le service des ventes sur la session de la requête"""
+    return SaleService(SaleDAL(db), ProductDAL(db), UserDAL(db), SalesRollupDAL(db))
+
 @router.post("/", response_model=SaleResponse, status_code=status.HTTP_201_CREATED)
-def create_sale(sale_data: SaleCreate, db: Session = Depends(get_db)):
+async def create_sale(sale_data: SaleCreate, runner: SessionRunner = Depends(get_runner)):
     """Créer une nouvelle vente"""
     try:
-        sale_dal = SaleDAL(db)
-        product_dal = ProductDAL(db)
-        user_dal = UserDAL(db)
-        sale_service = SaleService(sale_dal, product_dal, user_dal)
-        return sale_service.create_sale(sale_data)
+        return await runner.run(lambda db: sale_service(db).create_sale(sale_data))
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=str(e))
+
+@router.post("/batch", response_model=SaleBatchResponse, status_code=status.HTTP_201_CREATED)
+async def create_sales_batch(batch: SaleBatchCreate, runner: SessionRunner = Depends(get_runner)):
+    """Enregistrer un panier complet (plusieurs ventes) en une seule transaction"""
+    try:
+        return await runner.run(lambda db: sale_service(db).create_sales_batch(batch))
     except ValueError as e:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=str(e))
 
+@router.get("/export")
+async def export_sales(
+    file_format: str = Query("csv", alias="format", description="csv ou ndjson"),
+    start_date: Optional[datetime] = Query(None, description="Date de début (optionnel)"),
+    end_date: Optional[datetime] = Query(None, description="Date de fin (optionnel)")
+):
+    """Exporter l'historique des ventes en flux (mémoire constante, curseur côté serveur)"""
+    try:
+        export_service = SaleExportService(file_format)
+        export_service.validate_period(start_date, end_date)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    
+    statement = SaleDAL.export_statement(start_date, end_date)
+    
+    async def content():
+        yield export_service.header()
+        async for rows in stream_rows(statement, EXPORT_BATCH_SIZE):
+            yield export_service.encode_rows(rows)
+    
+    return StreamingResponse(
+        content(),
+        media_type=export_service.media_type,
+        headers={"Content-Disposition": f'attachment; filename="{export_service.filename()}"'}
+    )
+
 @router.get("/{sale_id}", response_model=SaleResponse)
-def get_sale(sale_id: int, db: Session = Depends(get_db)):
+async def get_sale(sale_id: int, runner: SessionRunner = Depends(get_runner)):
     """Récupérer une vente par son ID"""
     try:
-        sale_dal = SaleDAL(db)
-        product_dal = ProductDAL(db)
-        user_dal = UserDAL(db)
-        sale_service = SaleService(sale_dal, product_dal, user_dal)
-        return sale_service.get_sale_by_id(sale_id)
+        return await runner.run(lambda db: sale_service(db).get_sale_by_id(sale_id))
     except ValueError as e:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=str(e))
 
 @router.get("/", response_model=List[SaleResponse])
-def get_all_sales(
+async def get_all_sales(
+    request: Request,
+    response: Response,
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=1000),
-    db: Session = Depends(get_db)
+    after: Optional[str] = Query(None, description="Curseur de la page suivante (en-tête X-Next-Cursor)"),
+    runner: SessionRunner = Depends(get_runner)
 ):
-    """Récupérer toutes les ventes avec pagination"""
+    """Récupérer toutes les ventes avec pagination (offset ou curseur, 304 si inchangées)"""
+    def load(db: Session):
+        # Version vérifiée avant toute lecture de ligne : un 304 ne charge aucune vente
+        service = sale_service(db)
+        etag = service.get_sales_etag(skip, limit, after)
+        if request_is_fresh(request, etag):
+            return etag, None
+        return etag, service.get_sales_page(skip, limit, after)
+    
     try:
-        sale_dal = SaleDAL(db)
-        product_dal = ProductDAL(db)
-        user_dal = UserDAL(db)
-        sale_service = SaleService(sale_dal, product_dal, user_dal)
-        return sale_service.get_all_sales(skip, limit)
+        etag, page = await runner.run(load)
+        if page is None:
+            return not_modified(etag)
+        sales, cursor = page
+        set_validators(response, etag)
+        if cursor:
+            response.headers[NEXT_CURSOR_HEADER] = cursor
+        # Lignes du DAL déjà conformes à SaleResponse : encodées sans nouvelle validation
+        return trusted_json(sales, response)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=str(e))
 
 @router.get("/user/{user_id}", response_model=List[SaleResponse])
-def get_sales_by_user(user_id: int, db: Session = Depends(get_db)):
+async def get_sales_by_user(user_id: int, runner: SessionRunner = Depends(get_runner)):
     """Récupérer toutes les ventes d'un utilisateur"""
     try:
-        sale_dal = SaleDAL(db)
-        product_dal = ProductDAL(db)
-        user_dal = UserDAL(db)
-        sale_service = SaleService(sale_dal, product_dal, user_dal)
-        return sale_service.get_sales_by_user(user_id)
+        return trusted_json(await runner.run(lambda db: sale_service(db).get_sales_by_user(user_id)))
     except ValueError as e:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=str(e))
 
 @router.get("/product/{product_id}", response_model=List[SaleResponse])
-def get_sales_by_product(product_id: int, db: Session = Depends(get_db)):
+async def get_sales_by_product(product_id: int, runner: SessionRunner = Depends(get_runner)):
     """Récupérer toutes les ventes d'un produit"""
     try:
-        sale_dal = SaleDAL(db)
-        product_dal = ProductDAL(db)
-        user_dal = UserDAL(db)
-        sale_service = SaleService(sale_dal, product_dal, user_dal)
-        return sale_service.get_sales_by_product(product_id)
+        return trusted_json(await runner.run(lambda db: sale_service(db).get_sales_by_product(product_id)))
     except ValueError as e:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=str(e))
 
 @router.get("/date-range/", response_model=List[SaleResponse])
-def get_sales_by_date_range(
+async def get_sales_by_date_range(
     start_date: datetime = Query(..., description="Date de début (format: YYYY-MM-DD)"),
     end_date: datetime = Query(..., description="Date de fin (format: YYYY-MM-DD)"),
-    db: Session = Depends(get_db)
+    runner: SessionRunner = Depends(get_runner)
 ):
     """Récupérer les ventes dans une période"""
     try:
-        sale_dal = SaleDAL(db)
-        product_dal = ProductDAL(db)
-        user_dal = UserDAL(db)
-        sale_service = SaleService(sale_dal, product_dal, user_dal)
-        return sale_service.get_sales_by_date_range(start_date, end_date)
+        return trusted_json(await runner.run(lambda db: sale_service(db).get_sales_by_date_range(start_date, end_date)))
     except ValueError as e:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=str(e))
 
 @router.put("/{sale_id}", response_model=SaleResponse)
-def update_sale(sale_id: int, sale_data: SaleUpdate, db: Session = Depends(get_db)):
+async def update_sale(sale_id: int, sale_data: SaleUpdate, runner: SessionRunner = Depends(get_runner)):
     """Mettre à jour une vente"""
     try:
-        sale_dal = SaleDAL(db)
-        product_dal = ProductDAL(db)
-        user_dal = UserDAL(db)
-        sale_service = SaleService(sale_dal, product_dal, user_dal)
-        return sale_service.update_sale(sale_id, sale_data)
+        return await runner.run(lambda db: sale_service(db).update_sale(sale_id, sale_data))
     except ValueError as e:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=str(e))
 
 @router.delete("/{sale_id}", status_code=status.HTTP_204_NO_CONTENT)
-def delete_sale(sale_id: int, db: Session = Depends(get_db)):
+async def delete_sale(sale_id: int, runner: SessionRunner = Depends(get_runner)):
     """Supprimer une vente (remet le stock)"""
     try:
-        sale_dal = SaleDAL(db)
-        product_dal = ProductDAL(db)
-        user_dal = UserDAL(db)
-        sale_service = SaleService(sale_dal, product_dal, user_dal)
-        sale_service.delete_sale(sale_id)
+        await runner.run(lambda db: sale_service(db).delete_sale(sale_id))
         return None
     except ValueError as e:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(e))
@@ -131,22 +168,74 @@ def delete_sale(sale_id: int, db: Session = Depends(get_db)):
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=str(e))
 
 @router.get("/stats/total-amount")
-def get_total_sales_amount(
+async def get_total_sales_amount(
     start_date: datetime = Query(None, description="Date de début (optionnel)"),
     end_date: datetime = Query(None, description="Date de fin (optionnel)"),
-    db: Session = Depends(get_db)
+    group_by: Optional[str] = Query(None, description="Regroupement optionnel: product ou user"),
+    runner: SessionRunner = Depends(get_runner)
 ):
-    """Calculer le montant total des ventes"""
+    """Calculer le montant total des ventes (agrégé en base, montants exacts en texte)"""
     try:
-        sale_dal = SaleDAL(db)
-        product_dal = ProductDAL(db)
-        user_dal = UserDAL(db)
-        sale_service = SaleService(sale_dal, product_dal, user_dal)
-        total = sale_service.get_total_sales_amount(start_date, end_date)
-        return {
-            "total_amount": total,
+        totals = await runner.run(
+            lambda db: sale_service(db).get_sales_totals(start_date, end_date, group_by)
+        )
+        # Encodage direct : les Decimal restent exacts ("1139.70") au lieu de devenir des flottants
+        return trusted_json({
+            **totals,
             "start_date": start_date,
             "end_date": end_date
-        }
+        })
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=str(e))
+
+@router.get("/stats/series", response_model=SalesSeriesResponse)
+async def get_sales_series(
+    bucket: str = Query("day", description="Pas: hour, day, week ou month"),
+    start_date: datetime = Query(None, description="Début (optionnel ; sans fuseau : heure locale de tz)"),
+    end_date: datetime = Query(None, description="Fin (optionnel, maintenant par défaut)"),
+    tz: str = Query("UTC", description="Fuseau IANA des pas, ex: Africa/Casablanca"),
+    product_id: Optional[int] = Query(None, description="Limiter à un produit"),
+    user_id: Optional[int] = Query(None, description="Limiter à un vendeur"),
+    runner: SessionRunner = Depends(get_runner)
+):
+    """Unités et chiffre d'affaires par pas de temps, calculés en base (pas vides inclus)"""
+    try:
+        return await runner.run(
+            lambda db: sale_service(db).get_sales_series(bucket, start_date, end_date, tz, product_id, user_id)
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
     except Exception as e:
-        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=str(e))
\ No newline at end of file
+        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=str(e))
+
+@router.get("/stats/top-products", response_model=LeaderboardResponse)
+async def get_top_products(
+    days: int = Query(30, ge=1, le=366, description="Fenêtre en jours (jour en cours compris)"),
+    limit: int = Query(10, ge=1, le=100),
+    rank_by: str = Query("units", description="Critère: units ou revenue"),
+    runner: SessionRunner = Depends(get_runner)
+):
+    """Produits les plus vendus sur la fenêtre (classement en cache jusqu'à la prochaine vente)"""
+    try:
+        return await runner.run(lambda db: sale_service(db).get_leaderboard("product", days, limit, rank_by))
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=str(e))
+
+@router.get("/stats/top-sellers", response_model=LeaderboardResponse)
+async def get_top_sellers(
+    days: int = Query(30, ge=1, le=366, description="Fenêtre en jours (jour en cours compris)"),
+    limit: int = Query(10, ge=1, le=100),
+    rank_by: str = Query("revenue", description="Critère: revenue ou units"),
+    runner: SessionRunner = Depends(get_runner)
+):
+    """Vendeurs ayant réalisé le plus de ventes sur la fenêtre (classement en cache jusqu'à la prochaine vente)"""
+    try:
+        return await runner.run(lambda db: sale_service(db).get_leaderboard("user", days, limit, rank_by))
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=str(e))
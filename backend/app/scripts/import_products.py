@@ -0,0 +1,40 @@
+"""
+Import en masse d'un catalogue produits depuis la ligne de commande
+
+Usage:
+    python -m app.scripts.import_products catalogue.csv
+    python -m app.scripts.import_products catalogue.ndjson --batch-size 5000
+"""
+import argparse
+import json
+import sys
+from app.config import SessionLocal
+from app.dal.product_dal import ProductDAL
+from app.services.product_import_service import (
+    DEFAULT_BATCH_SIZE, IMPORT_FORMATS, ProductImportService, detect_format
+)
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Importer un catalogue produits (CSV ou NDJSON)")
+    parser.add_argument("path", help="Fichier à importer")
+    parser.add_argument("--format", choices=IMPORT_FORMATS, help="Format (déduit de l'extension sinon)")
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE, help="Lignes par INSERT")
+    args = parser.parse_args(argv)
+
+    db = SessionLocal()
+    try:
+        with open(args.path, "rb") as stream:
+            report = ProductImportService(ProductDAL(db), args.batch_size).import_file(
+                stream, args.format or detect_format(args.path)
+            )
+    finally:
+        db.close()
+
+    json.dump(report, sys.stdout, ensure_ascii=False, indent=2)
+    sys.stdout.write("\n")
+    return 1 if report["error_count"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
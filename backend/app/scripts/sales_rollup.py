@@ -0,0 +1,45 @@
+"""
+Maintenance de l'agrégat journalier des ventes (sales_daily_rollup)
+
+Usage:
+    python -m app.scripts.sales_rollup rebuild
+    python -m app.scripts.sales_rollup rebuild --start 2024-01-01 --end 2024-12-31
+    python -m app.scripts.sales_rollup check --limit 20
+"""
+import argparse
+import json
+import sys
+from datetime import date
+from app.config import SessionLocal
+from app.dal.rollup_dal import SalesRollupDAL
+from app.services.sales_rollup_service import SalesRollupService
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Reconstruire ou vérifier l'agrégat journalier des ventes")
+    parser.add_argument("command", choices=("rebuild", "check"), help="rebuild : recalculer, check : comparer aux ventes")
+    parser.add_argument("--start", type=date.fromisoformat, help="Premier jour (AAAA-MM-JJ, inclus)")
+    parser.add_argument("--end", type=date.fromisoformat, help="Dernier jour (AAAA-MM-JJ, inclus)")
+    parser.add_argument("--limit", type=int, default=100, help="check : nombre maximal d'écarts rapportés")
+    args = parser.parse_args(argv)
+
+    db = SessionLocal()
+    try:
+        service = SalesRollupService(SalesRollupDAL(db))
+        if args.command == "rebuild":
+            report = service.rebuild(args.start, args.end)
+        else:
+            report = service.check(args.start, args.end, args.limit)
+    except ValueError as e:
+        print(f"Erreur: {e}", file=sys.stderr)
+        return 2
+    finally:
+        db.close()
+
+    json.dump(report, sys.stdout, ensure_ascii=False, indent=2, default=str)
+    sys.stdout.write("\n")
+    return 0 if report.get("consistent", True) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,298 @@
+"""
+Génération de données synthétiques réalistes (magasin d'optique) à grande échelle
+
+- Demande des produits selon une loi de Zipf (quelques best-sellers, une longue traîne)
+- Ventes datées selon la saison, le jour de la semaine et l'heure d'ouverture
+- Chargement par lots (COPY sous PostgreSQL, INSERT multi-lignes sous SQLite), mémoire bornée
+- Agrégat journalier des ventes reconstruit après le chargement
+- Déterministe : même graine, mêmes données
+
+Usage:
+    python -m app.scripts.seed_data --reset
+    python -m app.scripts.seed_data --products 20000 --users 300 --sales 10000000 --reset
+"""
+import argparse
+import csv
+import io
+import random
+import sys
+import time
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+from itertools import accumulate
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+from sqlalchemy import func, insert, select, text
+from sqlalchemy.engine import Connection, Engine
+from sqlalchemy.orm import Session
+from app.config import engine as default_engine
+from app.dal.rollup_dal import SalesRollupDAL
+from app.dal.schema import upgrade_schema
+from app.models import Product, Sale, User
+from app.utils.security import hash_password
+
+DEFAULT_PASSWORD = "optic-demo"
+DEFAULT_CHUNK_SIZE = 100_000
+
+# Catégorie -> (prix min, prix max) en euros
+CATEGORIES = {
+    "Monture": (79, 420),
+    "Verres progressifs": (150, 690),
+    "Verres unifocaux": (60, 260),
+    "Lunettes de soleil": (59, 320),
+    "Lentilles": (19, 89),
+    "Étui": (9, 45),
+    "Cordon": (5, 19),
+    "Spray nettoyant": (4, 15),
+}
+MATERIALS = ["acétate", "titane", "métal", "écaille", "polycarbonate", "bois", "nylon"]
+COLORS = ["noir", "havane", "doré", "argenté", "bleu", "rouge", "transparent", "vert"]
+
+# Poids relatifs : mois (janvier..décembre), jour (lundi..dimanche), heure (0..23)
+MONTH_WEIGHTS = [0.8, 0.8, 0.9, 1.0, 1.1, 1.3, 1.4, 1.2, 1.3, 1.0, 1.0, 1.5]
+WEEKDAY_WEIGHTS = [0.7, 1.0, 1.0, 1.0, 1.2, 1.6, 0.05]
+HOUR_WEIGHTS = [0] * 9 + [2, 5, 8, 7, 4, 5, 6, 7, 9, 6, 1] + [0] * 4
+QUANTITY_WEIGHTS = [85, 12, 3]
+
+
+def zipf_cum_weights(count: int, exponent: float) -> List[float]:
+    """Poids cumulés d'une loi de Zipf sur `count` rangs (rang 1 = le plus demandé)"""
+    return list(accumulate(1.0 / rank ** exponent for rank in range(1, count + 1)))
+
+
+class SyntheticDataGenerator:
+    """Générateur déterministe d'utilisateurs, de produits et de ventes"""
+
+    def __init__(self, seed: int = 42, days: int = 730, end: Optional[date] = None, zipf_exponent: float = 1.1):
+        self.seed = seed
+        self.zipf_exponent = zipf_exponent
+        # Aucune vente dans le futur : les heures du jour en cours sont ramenées à la part écoulée de la journée
+        self.latest = datetime.utcnow()
+        self.today = datetime.combine(self.latest.date(), datetime.min.time())
+        self.today_fraction = (self.latest - self.today) / timedelta(days=1)
+        self.end = end or self.latest.date()
+        self.start = self.end - timedelta(days=days - 1)
+
+        # Calendrier pondéré (saison x jour de la semaine) : un tirage = un jour
+        self.days = [
+            datetime.combine(self.start, datetime.min.time()) + timedelta(days=offset) for offset in range(days)
+        ]
+        self.day_cum_weights = list(accumulate(
+            MONTH_WEIGHTS[day.month - 1] * WEEKDAY_WEIGHTS[day.weekday()] for day in self.days
+        ))
+        # Un décalage par seconde de la journée, construit une fois
+        self.offsets = [timedelta(seconds=second) for second in range(24 * 3600)]
+        self.hour_cum_weights = list(accumulate(HOUR_WEIGHTS))
+        self.quantity_cum_weights = list(accumulate(QUANTITY_WEIGHTS))
+
+    @staticmethod
+    def email(index: int) -> str:
+        return f"vendeur{index}@example.com"
+
+    def users(self, count: int, password_hash: str) -> List[dict]:
+        return [
+            {"nom": f"Vendeur {index}", "email": self.email(index), "password": password_hash}
+            for index in range(1, count + 1)
+        ]
+
+    def products(self, count: int, stock_range: Tuple[int, int] = (0, 500)) -> List[dict]:
+        rng = random.Random(self.seed)
+        categories = list(CATEGORIES)
+        rows = []
+        for index in range(1, count + 1):
+            category = rng.choice(categories)
+            low, high = CATEGORIES[category]
+            rows.append({
+                "nom": f"{category} {rng.choice(MATERIALS)} {rng.choice(COLORS)} {index}",
+                "prix": Decimal(rng.randrange(low * 100, high * 100)) / 100,
+                "stock": rng.randint(*stock_range),
+                "reference": f"SYN-{index:07d}",
+            })
+        return rows
+
+    def sales(self, count: int, product_ids: Sequence[int], user_ids: Sequence[int],
+              chunk_size: int = DEFAULT_CHUNK_SIZE) -> Iterator[List[tuple]]:
+        """
+        Ventes par paquets de `chunk_size` : (product_id, user_id, quantity, date)
+
+        Chaque paquet a son propre générateur (graine dérivée) : le contenu ne
+        dépend pas de la taille des autres paquets déjà produits.
+        """
+        # Popularité : rang Zipf attribué aux produits dans un ordre aléatoire mais fixe
+        ranked_products = list(product_ids)
+        random.Random(self.seed).shuffle(ranked_products)
+        product_cum_weights = zipf_cum_weights(len(ranked_products), self.zipf_exponent)
+        # Vendeurs : activité inégale mais moins marquée que la demande
+        user_cum_weights = zipf_cum_weights(len(user_ids), 0.5)
+        quantities = (1, 2, 3)
+
+        for chunk_index, offset in enumerate(range(0, count, chunk_size)):
+            size = min(chunk_size, count - offset)
+            rng = random.Random(self.seed * 1_000_003 + chunk_index)
+            products = rng.choices(ranked_products, cum_weights=product_cum_weights, k=size)
+            users = rng.choices(user_ids, cum_weights=user_cum_weights, k=size)
+            quantity = rng.choices(quantities, cum_weights=self.quantity_cum_weights, k=size)
+            days = rng.choices(self.days, cum_weights=self.day_cum_weights, k=size)
+            hours = rng.choices(range(0, 24 * 3600, 3600), cum_weights=self.hour_cum_weights, k=size)
+            offsets = self.offsets
+            yield [
+                (products[row], users[row], quantity[row], self.sold_at(days[row], offsets[hours[row] + int(rng.random() * 3600)]))
+                for row in range(size)
+            ]
+
+    def sold_at(self, day: datetime, offset: timedelta) -> datetime:
+        """Date d'une vente, jamais postérieure à maintenant (jours futurs : plafonnée)"""
+        if day == self.today:
+            offset = offset * self.today_fraction
+        return min(day + offset, self.latest)
+
+
+SALE_COLUMNS = ("product_id", "user_id", "quantity", "unit_price", "total", "date", "updated_at")
+
+
+def sale_records(rows: List[tuple], prices: Dict[int, Decimal]) -> Iterator[tuple]:
+    """Lignes complètes de la table sales (prix figé au prix catalogue), dans l'ordre de SALE_COLUMNS"""
+    for product_id, user_id, quantity, sold_at in rows:
+        price = prices[product_id]
+        yield product_id, user_id, quantity, price, price * quantity, sold_at, sold_at
+
+
+def copy_sales(connection: Connection, rows: List[tuple], prices: Dict[int, Decimal]) -> None:
+    """Charger un paquet de ventes via COPY (psycopg 3 ou psycopg2)"""
+    statement = f"COPY sales ({', '.join(SALE_COLUMNS)}) FROM STDIN"
+    cursor = connection.connection.driver_connection.cursor()
+    try:
+        if hasattr(cursor, "copy"):
+            with cursor.copy(statement) as copy:
+                for record in sale_records(rows, prices):
+                    copy.write_row(record)
+            return
+
+        buffer = io.StringIO()
+        csv.writer(buffer).writerows(sale_records(rows, prices))
+        buffer.seek(0)
+        cursor.copy_expert(statement + " WITH (FORMAT csv)", buffer)
+    finally:
+        cursor.close()
+
+
+def insert_sales(connection: Connection, rows: List[tuple], prices: Dict[int, Decimal]) -> None:
+    """Charger un paquet de ventes par INSERT multi-lignes (SQLite)"""
+    connection.execute(insert(Sale), [dict(zip(SALE_COLUMNS, record)) for record in sale_records(rows, prices)])
+
+
+def reset_schema(engine: Engine) -> None:
+    """Supprimer les tables de l'application et la version Alembic (base dédiée uniquement)"""
+    with engine.begin() as connection:
+        for table in ("sales_daily_rollup", "sales", "products", "users", "alembic_version"):
+            connection.execute(text(f"DROP TABLE IF EXISTS {table}"))
+
+
+def seed_database(
+    products: int,
+    users: int,
+    sales: int,
+    generator: SyntheticDataGenerator,
+    engine: Engine = default_engine,
+    reset: bool = False,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    stock_range: Tuple[int, int] = (0, 500),
+    password: str = DEFAULT_PASSWORD,
+    progress=None,
+) -> dict:
+    """
+    Créer le schéma et charger un jeu de données complet
+
+    Args:
+        products (int): Nombre de produits
+        users (int): Nombre d'utilisateurs (tous avec le même mot de passe)
+        sales (int): Nombre de ventes
+        generator (SyntheticDataGenerator): Générateur (graine, période, Zipf)
+        engine (Engine): Moteur cible
+        reset (bool): Supprimer les tables existantes d'abord
+        chunk_size (int): Ventes par paquet (mémoire bornée)
+        stock_range (Tuple[int, int]): Bornes du stock initial des produits
+        password (str): Mot de passe en clair des utilisateurs
+        progress (Callable[[int], None]): Rappel après chaque paquet (ventes chargées)
+
+    Returns:
+        dict: Volumes chargés et durée
+    """
+    started_at = time.perf_counter()
+    if reset:
+        reset_schema(engine)
+    upgrade_schema(engine.url.render_as_string(hide_password=False))
+
+    with engine.begin() as connection:
+        if connection.execute(select(func.count()).select_from(Product)).scalar():
+            raise ValueError("La base contient déjà des produits : utilisez --reset sur une base dédiée")
+
+    # Un seul hachage bcrypt pour tous les comptes
+    password_hash = hash_password(password)
+    with engine.begin() as connection:
+        connection.execute(insert(User), generator.users(users, password_hash))
+        connection.execute(insert(Product), generator.products(products, stock_range))
+        prices = dict(connection.execute(select(Product.id, Product.prix).order_by(Product.id)).all())
+        user_ids = connection.execute(select(User.id).order_by(User.id)).scalars().all()
+
+    load = copy_sales if engine.dialect.name == "postgresql" else insert_sales
+    loaded = 0
+    for rows in generator.sales(sales, list(prices), user_ids, chunk_size):
+        # Une transaction par paquet : un échec ne perd que le paquet en cours
+        with engine.begin() as connection:
+            load(connection, rows, prices)
+        loaded += len(rows)
+        if progress:
+            progress(loaded)
+
+    # Agrégat journalier recalculé en une passe plutôt que maintenu vente par vente
+    with Session(engine) as db:
+        rollup_rows = SalesRollupDAL(db).rebuild()
+        db.commit()
+
+    if engine.dialect.name == "postgresql":
+        with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as connection:
+            connection.execute(text("ANALYZE users, products, sales, sales_daily_rollup"))
+
+    return {
+        "users": users,
+        "products": products,
+        "sales": loaded,
+        "rollup_rows": rollup_rows,
+        "period": [generator.start.isoformat(), generator.end.isoformat()],
+        "seconds": round(time.perf_counter() - started_at, 1),
+    }
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Générer un jeu de données synthétique (utilisateurs, produits, ventes)")
+    parser.add_argument("--users", type=int, default=300, help="Nombre d'utilisateurs")
+    parser.add_argument("--products", type=int, default=20000, help="Nombre de produits")
+    parser.add_argument("--sales", type=int, default=1_000_000, help="Nombre de ventes")
+    parser.add_argument("--days", type=int, default=730, help="Période couverte (jours jusqu'à aujourd'hui)")
+    parser.add_argument("--zipf", type=float, default=1.1, help="Exposant de Zipf de la demande produit")
+    parser.add_argument("--seed", type=int, default=42, help="Graine du générateur")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE, help="Ventes par paquet chargé")
+    parser.add_argument("--password", default=DEFAULT_PASSWORD, help="Mot de passe commun des utilisateurs")
+    parser.add_argument("--reset", action="store_true", help="Supprimer les tables existantes (base dédiée uniquement)")
+    args = parser.parse_args(argv)
+
+    generator = SyntheticDataGenerator(seed=args.seed, days=args.days, zipf_exponent=args.zipf)
+
+    def progress(loaded: int) -> None:
+        print(f"\r{loaded}/{args.sales} ventes", end="", file=sys.stderr, flush=True)
+
+    try:
+        report = seed_database(
+            args.products, args.users, args.sales, generator,
+            reset=args.reset, chunk_size=args.chunk_size, password=args.password, progress=progress
+        )
+    except ValueError as e:
+        print(f"Erreur: {e}", file=sys.stderr)
+        return 1
+    print(file=sys.stderr)
+    print(report)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,5 +1,6 @@
 from app.services.auth_service import AuthService
 from app.services.product_service import ProductService
 from app.services.sale_service import SaleService
+from app.services.dashboard_service import DashboardService
 
-__all__ = ["AuthService", "ProductService", "SaleService"]
\ No newline at end of file
+__all__ = ["AuthService", "ProductService", "SaleService", "DashboardService"]
\ No newline at end of file
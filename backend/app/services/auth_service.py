@@ -1,70 +1,72 @@
 from app.dal.user_dal import UserDAL
-from app.utils.security import hash_password, verify_password, create_access_token
-from app.dto.user_dto import UserCreate, UserLogin, UserResponse
+from app.models.user import User
+from app.utils.security import create_access_token
+from app.dto.user_dto import UserCreate, UserResponse
 from datetime import timedelta
 from app.config import ACCESS_TOKEN_EXPIRE_MINUTES
 from typing import Dict
-import traceback
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Message unique pour ne pas révéler si l'email existe
+INVALID_CREDENTIALS = "Email ou mot de passe incorrect"
 
 class AuthService:
     def __init__(self, user_dal: UserDAL):
         self.user_dal = user_dal
     
-    def register(self, user_data: UserCreate) -> UserResponse:
-        """Inscription d'un nouvel utilisateur"""
+    def register(self, user_data: UserCreate, hashed_password: str) -> UserResponse:
+        """Inscription d'un nouvel utilisateur (mot de passe déjà hashé dans le pool dédié)"""
         try:
-            print(f"🔍 DEBUG: Début de l'inscription")
-            print(f"🔍 DEBUG: Données reçues: {user_data}")
-            
             # Vérifier si l'email existe déjà
-            print(f"🔍 DEBUG: Vérification de l'email...")
             existing_user = self.user_dal.get_user_by_email(user_data.email)
             if existing_user:
                 raise ValueError("Cet email est déjà utilisé")
             
-            print(f"🔍 DEBUG: Email disponible, hashage du mot de passe...")
-            # Hasher le mot de passe
-            hashed_password = hash_password(user_data.password)
-            print(f"🔍 DEBUG: Mot de passe hashé avec succès")
-            
             # Préparer les données pour la création
             user_dict = {
                 "nom": user_data.nom,
                 "email": user_data.email,
                 "password": hashed_password
             }
-            print(f"🔍 DEBUG: Dictionnaire créé: {user_dict}")
             
             # Créer l'utilisateur
-            print(f"🔍 DEBUG: Création de l'utilisateur dans la DB...")
             new_user = self.user_dal.create_user(user_dict)
-            print(f"🔍 DEBUG: Utilisateur créé avec succès: {new_user.id}")
+            logger.debug("Utilisateur %s inscrit", new_user.id)
             
             return UserResponse.from_orm(new_user)
         
         except ValueError as e:
-            print(f"❌ ERROR ValueError: {str(e)}")
             raise e
         except Exception as e:
-            print(f"❌ ERROR Exception: {str(e)}")
-            print(f"❌ Traceback complet:")
-            traceback.print_exc()
+            # Type seulement : le message d'une erreur SQL reprend les paramètres (hash du mot de passe)
+            logger.warning("Échec de l'inscription (%s)", type(e).__name__)
             raise Exception(f"Erreur lors de l'inscription: {str(e)}")
         
-    def login(self, credentials: UserLogin) -> Dict:
-        """Connexion d'un utilisateur"""
+    def get_login_user(self, email: str) -> User:
+        """Récupérer l'utilisateur qui tente de se connecter"""
         try:
-            # Récupérer l'utilisateur par email
-            user = self.user_dal.get_user_by_email(credentials.email)
-            
+            user = self.user_dal.get_user_by_email(email)
             if not user:
-                raise ValueError("Email ou mot de passe incorrect")
-            
-            # Vérifier le mot de passe
-            if not verify_password(credentials.password, user.password):
-                raise ValueError("Email ou mot de passe incorrect")
-            
-            # Créer le token JWT
+                raise ValueError(INVALID_CREDENTIALS)
+            return user
+        except ValueError as e:
+            raise e
+        except Exception as e:
+            raise Exception(f"Erreur lors de la connexion: {str(e)}")
+    
+    def rehash_password(self, user: User, new_hash: str) -> None:
+        """Enregistrer le hash recalculé au nouveau coût bcrypt (un échec n'empêche pas la connexion)"""
+        try:
+            self.user_dal.replace_password_hash(user.id, user.password, new_hash)
+        except Exception as e:
+            logger.warning("Mise à jour du hash ignorée pour l'utilisateur %s: %s", user.id, e)
+    
+    @staticmethod
+    def create_login_response(user: User) -> Dict:
+        """Créer le token JWT d'un utilisateur authentifié"""
+        try:
             access_token_expires = timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
             access_token = create_access_token(
                 data={"sub": user.email, "user_id": user.id},
@@ -76,9 +78,6 @@ class AuthService:
                 "token_type": "bearer",
                 "user": UserResponse.from_orm(user)
             }
-        
-        except ValueError as e:
-            raise e
         except Exception as e:
             raise Exception(f"Erreur lors de la connexion: {str(e)}")
     
@@ -0,0 +1,103 @@
+import asyncio
+from app.config import DASHBOARD_CACHE_TTL
+from app.dal.dashboard_dal import DashboardDAL
+from app.dal.product_dal import ProductDAL
+from app.dal.sale_dal import SaleDAL
+from app.dal.session_runner import run_in_session
+from app.utils.cache import CacheBackend, LRUCache, NullCache
+from typing import Any, Awaitable, Callable, Dict, List
+from datetime import datetime, timedelta
+
+# Fenêtres de chiffre d'affaires par défaut (jours glissants, jour en cours compris)
+DEFAULT_WINDOWS = "1,7,30"
+MAX_WINDOWS = 6
+MAX_WINDOW_DAYS = 366
+
+# Résumés récents, par combinaison de paramètres (quelques Ko chacun)
+dashboard_cache = LRUCache(maxsize=64, ttl=DASHBOARD_CACHE_TTL) if DASHBOARD_CACHE_TTL > 0 else NullCache()
+
+# Calculs en cours : les requêtes simultanées sur une même clé attendent le même calcul
+_pending: Dict[str, asyncio.Future] = {}
+
+
+def parse_windows(raw: str) -> List[int]:
+    """Liste "1,7,30" -> tailles de fenêtre triées et dédoublonnées"""
+    try:
+        windows = sorted({int(part) for part in raw.split(",") if part.strip()})
+    except ValueError:
+        raise ValueError(f"Fenêtres invalides: {raw} (entiers séparés par des virgules)")
+    if not windows or len(windows) > MAX_WINDOWS:
+        raise ValueError(f"Entre 1 et {MAX_WINDOWS} fenêtres sont attendues")
+    if windows[0] < 1 or windows[-1] > MAX_WINDOW_DAYS:
+        raise ValueError(f"Une fenêtre doit compter entre 1 et {MAX_WINDOW_DAYS} jours")
+    return windows
+
+
+class DashboardService:
+    def __init__(
+        self,
+        run: Callable[..., Awaitable[Any]] = run_in_session,
+        cache: CacheBackend = dashboard_cache
+    ):
+        self.run = run
+        self.cache = cache
+    
+    async def get_summary(
+        self,
+        windows: str = DEFAULT_WINDOWS,
+        low_stock_limit: int = 10,
+        recent_limit: int = 5
+    ) -> dict:
+        """
+        Résumé du tableau de bord (taille indépendante du volume de données)
+
+        Servi depuis le cache tant qu'il est frais ; sinon quatre requêtes
+        d'agrégat exécutées en parallèle, chacune sur sa propre session.
+        """
+        window_days = parse_windows(windows)
+        key = f"summary:{','.join(map(str, window_days))}:{low_stock_limit}:{recent_limit}"
+        cached = self.cache.get(key)
+        if cached is not None:
+            return cached
+        
+        computation = _pending.get(key)
+        if computation is None:
+            computation = asyncio.ensure_future(
+                self._compute(key, window_days, low_stock_limit, recent_limit)
+            )
+            _pending[key] = computation
+            computation.add_done_callback(lambda _: _pending.pop(key, None))
+        # shield : un client qui se déconnecte n'annule pas le calcul attendu par les autres
+        return await asyncio.shield(computation)
+    
+    async def _compute(
+        self,
+        key: str,
+        window_days: List[int],
+        low_stock_limit: int,
+        recent_limit: int
+    ) -> dict:
+        try:
+            generated_at = datetime.utcnow()
+            today = generated_at.date()
+            since = {days: today - timedelta(days=days - 1) for days in window_days}
+            
+            counts, revenue, low_stock, recent_sales = await asyncio.gather(
+                self.run(lambda db: DashboardDAL(db).get_counts()),
+                self.run(lambda db: DashboardDAL(db).get_revenue(since)),
+                self.run(lambda db: ProductDAL(db).get_low_stock(low_stock_limit)),
+                self.run(lambda db: SaleDAL(db).get_all_sales(limit=recent_limit))
+            )
+        except Exception as e:
+            raise Exception(f"Erreur lors du calcul du tableau de bord: {str(e)}")
+        
+        summary = {
+            "generated_at": generated_at,
+            "counts": {**counts, "sales": revenue["total"]["sales_count"]},
+            "revenue": revenue["total"],
+            "revenue_windows": revenue["windows"],
+            "low_stock": low_stock,
+            "recent_sales": recent_sales
+        }
+        self.cache.set(key, summary)
+        return summary
@@ -0,0 +1,135 @@
+import csv
+import io
+import json
+from typing import BinaryIO, Dict, Iterator, Optional, Tuple
+from pydantic import ValidationError
+from app.dal.product_dal import ProductDAL
+from app.dto.product_dto import ProductCreate
+from app.services.product_service import ProductService
+
+# Formats de fichier acceptés pour l'import de catalogue
+IMPORT_FORMATS = ("csv", "ndjson")
+
+# Nombre de lignes valides envoyées en base par INSERT multi-lignes
+DEFAULT_BATCH_SIZE = 1000
+
+# Nombre maximal d'erreurs détaillées dans le rapport (le total reste compté)
+MAX_REPORTED_ERRORS = 1000
+
+
+def detect_format(filename: Optional[str], content_type: Optional[str] = None) -> str:
+    """Déduire le format d'import depuis le nom de fichier ou le type MIME"""
+    name = (filename or "").lower()
+    if name.endswith((".ndjson", ".jsonl")) or "ndjson" in (content_type or ""):
+        return "ndjson"
+    return "csv"
+
+
+class ProductImportService:
+    def __init__(self, product_dal: ProductDAL, batch_size: int = DEFAULT_BATCH_SIZE):
+        self.product_dal = product_dal
+        self.batch_size = batch_size
+
+    def import_file(self, stream: BinaryIO, file_format: str = "csv") -> dict:
+        """
+        Importer un catalogue en flux (mémoire bornée par la taille de lot)
+
+        Les lignes invalides sont rapportées sans interrompre l'import ; les lignes
+        valides sont insérées (ou mises à jour via leur référence) par lots.
+
+        Args:
+            stream (BinaryIO): Fichier binaire (CSV UTF-8 avec en-tête, ou NDJSON)
+            file_format (str): "csv" ou "ndjson"
+
+        Returns:
+            dict: Rapport (lignes lues, importées, erreurs par ligne)
+        """
+        if file_format not in IMPORT_FORMATS:
+            raise ValueError(f"Format invalide. Valeurs possibles: {', '.join(IMPORT_FORMATS)}")
+
+        report = {"total_rows": 0, "imported": 0, "error_count": 0, "errors": []}
+        batch: Dict[object, dict] = {}
+
+        try:
+            for line_number, row in self._read_rows(stream, file_format):
+                report["total_rows"] += 1
+                try:
+                    product = self._validate_row(row)
+                except ValueError as e:
+                    self._add_error(report, line_number, str(e))
+                    continue
+
+                # Une même référence ne peut être mise à jour deux fois dans un INSERT : la dernière gagne
+                batch[product.get("reference") or ("ligne", line_number)] = product
+                if len(batch) >= self.batch_size:
+                    report["imported"] += self._flush(batch)
+
+            report["imported"] += self._flush(batch)
+            return report
+        except ValueError as e:
+            raise e
+        except Exception as e:
+            raise Exception(f"Erreur lors de l'import du catalogue: {str(e)}")
+
+    def _flush(self, batch: Dict[object, dict]) -> int:
+        """Envoyer le lot courant en base (une transaction par lot) puis le vider"""
+        if not batch:
+            return 0
+        count = self.product_dal.upsert_products(list(batch.values()))
+        batch.clear()
+        return count
+
+    @staticmethod
+    def _read_rows(stream: BinaryIO, file_format: str) -> Iterator[Tuple[int, dict]]:
+        """Lire le fichier ligne à ligne (numéro de ligne, dictionnaire brut)"""
+        text = io.TextIOWrapper(stream, encoding="utf-8-sig", newline="")
+        try:
+            if file_format == "csv":
+                reader = csv.DictReader(text)
+                for row in reader:
+                    yield reader.line_num, row
+                return
+
+            for line_number, line in enumerate(text, start=1):
+                if not line.strip():
+                    continue
+                try:
+                    row = json.loads(line)
+                except json.JSONDecodeError:
+                    row = None
+                yield line_number, row
+        finally:
+            # Ne pas fermer le fichier sous-jacent (appartient à l'appelant)
+            text.detach()
+
+    @staticmethod
+    def _validate_row(row: Optional[dict]) -> dict:
+        """Valider une ligne avec les mêmes règles que ProductService"""
+        if not isinstance(row, dict):
+            raise ValueError("Ligne illisible")
+
+        # Les cellules vides d'un CSV valent "non renseigné"
+        cleaned = {
+            key.strip(): value.strip() if isinstance(value, str) else value
+            for key, value in row.items()
+            if key and value not in ("", None)
+        }
+        try:
+            product = ProductCreate(**cleaned)
+        except ValidationError as e:
+            first = e.errors()[0]
+            field = ".".join(str(part) for part in first["loc"])
+            raise ValueError(f"{field}: {first['msg']}")
+
+        ProductService.validate_product_fields(product.prix, product.stock, product.reorder_threshold)
+        data = product.dict()
+        # Hors limites des colonnes, la ligne ferait échouer tout le lot en base
+        ProductService.validate_column_limits(data)
+        return data
+
+    @staticmethod
+    def _add_error(report: dict, line_number: int, message: str) -> None:
+        """Enregistrer une erreur de ligne (détail borné à MAX_REPORTED_ERRORS)"""
+        report["error_count"] += 1
+        if len(report["errors"]) < MAX_REPORTED_ERRORS:
+            report["errors"].append({"line": line_number, "error": message})
@@ -1,21 +1,64 @@
+from sqlalchemy import Integer, Numeric, String
 from app.dal.product_dal import ProductDAL
+from app.models.product import Product
 from app.dto.product_dto import ProductCreate, ProductUpdate, ProductResponse
-from typing import List
+from app.utils.pagination import decode_product_cursor, next_cursor
+from app.utils.etag import make_etag
+from typing import List, Optional, Tuple
+from decimal import Decimal
+
+# Bornes des entiers SQL (INTEGER 32 bits)
+INTEGER_RANGE = (-2**31, 2**31 - 1)
 
 class ProductService:
     def __init__(self, product_dal: ProductDAL):
         self.product_dal = product_dal
     
+    @staticmethod
+    def validate_product_fields(
+        prix: Optional[Decimal] = None,
+        stock: Optional[int] = None,
+        reorder_threshold: Optional[int] = None
+    ) -> None:
+        """Règles métier communes (création, mise à jour, import) : prix > 0, stock >= 0, seuil >= 0"""
+        # Validation du stock
+        if stock is not None and stock < 0:
+            raise ValueError("Le stock ne peut pas être négatif")
+        
+        # Validation du seuil de réapprovisionnement
+        if reorder_threshold is not None and reorder_threshold < 0:
+            raise ValueError("Le seuil de réapprovisionnement ne peut pas être négatif")
+        
+        # Validation du prix
+        if prix is not None and prix <= 0:
+            raise ValueError("Le prix doit être supérieur à 0")
+    
+    @staticmethod
+    def validate_column_limits(values: dict) -> None:
+        """
+        Vérifier que les valeurs tiennent dans les colonnes de la table products
+        (longueur des textes, chiffres du prix, entiers 32 bits) : sans cela
+        PostgreSQL refuse l'instruction entière (DataError)
+        """
+        columns = Product.__table__.columns
+        for key, value in values.items():
+            if value is None or key not in columns:
+                continue
+            column_type = columns[key].type
+            if isinstance(column_type, String) and column_type.length and len(value) > column_type.length:
+                raise ValueError(f"{key}: {column_type.length} caractères au maximum")
+            if isinstance(column_type, Numeric) and not isinstance(column_type, Integer) and column_type.precision:
+                integer_digits = column_type.precision - (column_type.scale or 0)
+                if abs(value) >= Decimal(10) ** integer_digits:
+                    raise ValueError(f"{key}: {integer_digits} chiffres au maximum avant la virgule")
+            if isinstance(column_type, Integer) and not INTEGER_RANGE[0] <= value <= INTEGER_RANGE[1]:
+                raise ValueError(f"{key}: valeur hors limites")
+    
     def create_product(self, product_data: ProductCreate) -> ProductResponse:
         """Créer un nouveau produit"""
         try:
-            # Validation du stock
-            if product_data.stock < 0:
-                raise ValueError("Le stock ne peut pas être négatif")
-            
-            # Validation du prix
-            if product_data.prix <= 0:
-                raise ValueError("Le prix doit être supérieur à 0")
+            self.validate_product_fields(product_data.prix, product_data.stock, product_data.reorder_threshold)
+            self.validate_column_limits(product_data.dict())
             
             # Créer le produit
             product_dict = product_data.dict()
@@ -40,21 +83,57 @@ class ProductService:
         except Exception as e:
             raise Exception(f"Erreur lors de la récupération du produit: {str(e)}")
     
-    def get_all_products(self, skip: int = 0, limit: int = 100) -> List[ProductResponse]:
+    def get_all_products(self, skip: int = 0, limit: int = 100) -> List[dict]:
         """Récupérer tous les produits"""
         try:
-            products = self.product_dal.get_all_products(skip, limit)
-            return [ProductResponse.from_orm(product) for product in products]
+            products, _ = self.get_products_page(skip, limit)
+            return products
         except Exception as e:
             raise Exception(f"Erreur lors de la récupération des produits: {str(e)}")
     
-    def search_products(self, search_term: str) -> List[ProductResponse]:
+    def get_products_page(
+        self,
+        skip: int = 0,
+        limit: int = 100,
+        after: Optional[str] = None
+    ) -> Tuple[List[dict], Optional[str]]:
+        """Récupérer une page de produits (lignes conformes à ProductResponse) et le curseur de la page suivante"""
+        try:
+            after_id = decode_product_cursor(after) if after else None
+            products = self.product_dal.get_all_products(skip, limit, after_id)
+            return products, next_cursor(products, limit, "id")
+        except ValueError as e:
+            raise e
+        except Exception as e:
+            raise Exception(f"Erreur lors de la récupération des produits: {str(e)}")
+    
+    def get_products_etag(self, *variant) -> str:
+        """ETag de la liste des produits (version du catalogue + paramètres de la page)"""
+        try:
+            return make_etag("products", *self.product_dal.get_version(), *variant)
+        except Exception as e:
+            raise Exception(f"Erreur lors du calcul de la version du catalogue: {str(e)}")
+    
+    @staticmethod
+    def get_product_etag(product: ProductResponse) -> str:
+        """ETag d'un produit (identifiant + date de dernière modification)"""
+        return make_etag("product", product.id, product.updated_at)
+    
+    def get_low_stock(self, limit: int = 100) -> List[dict]:
+        """Produits à réapprovisionner, les plus urgents d'abord"""
+        try:
+            return self.product_dal.get_low_stock(limit)
+        except Exception as e:
+            raise Exception(f"Erreur lors de la récupération du stock faible: {str(e)}")
+    
+    def search_products(self, search_term: str, skip: int = 0, limit: int = 50) -> List[ProductResponse]:
         """Rechercher des produits par nom"""
         try:
+            search_term = search_term.strip() if search_term else search_term
             if not search_term or len(search_term) < 2:
                 raise ValueError("Le terme de recherche doit contenir au moins 2 caractères")
             
-            products = self.product_dal.search_products(search_term)
+            products = self.product_dal.search_products(search_term, skip, limit)
             return [ProductResponse.from_orm(product) for product in products]
         except ValueError as e:
             raise e
@@ -70,11 +149,8 @@ class ProductService:
                 raise ValueError("Produit introuvable")
             
             # Validation des données
-            if product_data.stock is not None and product_data.stock < 0:
-                raise ValueError("Le stock ne peut pas être négatif")
-            
-            if product_data.prix is not None and product_data.prix <= 0:
-                raise ValueError("Le prix doit être supérieur à 0")
+            self.validate_product_fields(product_data.prix, product_data.stock, product_data.reorder_threshold)
+            self.validate_column_limits(product_data.dict())
             
             # Mettre à jour
             product_dict = product_data.dict(exclude_unset=True)
@@ -0,0 +1,61 @@
+import csv
+import io
+from datetime import datetime
+from typing import List, Optional, Sequence
+from app.utils.json_response import dumps
+
+# Formats d'export disponibles : type MIME et extension
+EXPORT_FORMATS = {
+    "csv": ("text/csv; charset=utf-8", "csv"),
+    "ndjson": ("application/x-ndjson", "ndjson"),
+}
+
+# Colonnes exportées, dans l'ordre (identiques à SaleDAL.export_statement)
+EXPORT_COLUMNS = [
+    "id", "date", "product_id", "product_nom", "user_id", "user_nom",
+    "quantity", "prix_unitaire", "prix_total",
+]
+
+# Lignes lues par aller-retour sur le curseur serveur
+EXPORT_BATCH_SIZE = 2000
+
+
+class SaleExportService:
+    def __init__(self, file_format: str = "csv"):
+        if file_format not in EXPORT_FORMATS:
+            raise ValueError(f"Format invalide. Valeurs possibles: {', '.join(EXPORT_FORMATS)}")
+        self.file_format = file_format
+
+    @staticmethod
+    def validate_period(start_date: Optional[datetime], end_date: Optional[datetime]) -> None:
+        """Vérifier la cohérence de la période exportée"""
+        if start_date and end_date and start_date > end_date:
+            raise ValueError("La date de début doit être antérieure à la date de fin")
+
+    @property
+    def media_type(self) -> str:
+        return EXPORT_FORMATS[self.file_format][0]
+
+    def filename(self) -> str:
+        """Nom du fichier proposé au téléchargement"""
+        return f"ventes_{datetime.utcnow():%Y%m%d_%H%M%S}.{EXPORT_FORMATS[self.file_format][1]}"
+
+    def header(self) -> str:
+        """En-tête du fichier (ligne de colonnes en CSV, rien en NDJSON)"""
+        if self.file_format == "csv":
+            return ",".join(EXPORT_COLUMNS) + "\r\n"
+        return ""
+
+    def encode_rows(self, rows: List[Sequence]) -> str:
+        """Encoder un paquet de lignes en un seul morceau de texte"""
+        if self.file_format == "ndjson":
+            return "".join(
+                dumps(dict(zip(EXPORT_COLUMNS, row))).decode("utf-8") + "\n"
+                for row in rows
+            )
+
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        for row in rows:
+            writer.writerow(value.isoformat() if isinstance(value, datetime) else value for value in row)
+        return buffer.getvalue()
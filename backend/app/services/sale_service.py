@@ -1,51 +1,174 @@
 from app.dal.sale_dal import SaleDAL
 from app.dal.product_dal import ProductDAL
 from app.dal.user_dal import UserDAL
-from app.dto.sale_dto import SaleCreate, SaleUpdate, SaleResponse
-from typing import List
-from datetime import datetime
+from app.dal.rollup_dal import SalesRollupDAL, LEADERBOARD_RANKS, add_delta
+from app.dto.sale_dto import SaleCreate, SaleUpdate, SaleResponse, SaleBatchCreate
+from app.dal.sale_dal import TOTALS_GROUP_BY
+from app.utils.pagination import decode_sale_cursor, next_cursor
+from app.utils.etag import make_etag
+from app.utils.series import (
+    BUCKETS, DEFAULT_SPANS, MAX_SERIES_POINTS, UTC_ZONES, bucket_starts, load_timezone, to_local, to_utc, truncate
+)
+from itertools import islice
+from typing import List, Optional, Tuple
+from datetime import date, datetime, time, timedelta
+from decimal import Decimal
 
 class SaleService:
-    def __init__(self, sale_dal: SaleDAL, product_dal: ProductDAL, user_dal: UserDAL):
+    def __init__(self, sale_dal: SaleDAL, product_dal: ProductDAL, user_dal: UserDAL, rollup_dal: SalesRollupDAL):
         self.sale_dal = sale_dal
         self.product_dal = product_dal
         self.user_dal = user_dal
+        self.rollup_dal = rollup_dal
     
     def create_sale(self, sale_data: SaleCreate) -> dict:
-        """Créer une nouvelle vente"""
+        """Créer une nouvelle vente (une seule transaction, décrément de stock atomique)"""
         try:
-            # Vérifier que l'utilisateur existe
-            user = self.user_dal.get_user_by_id(sale_data.user_id)
-            if not user:
+            # Vérifier la quantité
+            if sale_data.quantity <= 0:
+                raise ValueError("La quantité doit être supérieure à 0")
+            
+            # Vérifier que l'utilisateur existe (son nom sert aussi à la réponse)
+            user_nom = self.user_dal.get_user_nom(sale_data.user_id)
+            if user_nom is None:
                 raise ValueError("Utilisateur introuvable")
             
-            # Vérifier que le produit existe
-            product = self.product_dal.get_product_by_id(sale_data.product_id)
-            if not product:
-                raise ValueError("Produit introuvable")
+            # Décrémenter le stock seulement s'il est suffisant (UPDATE conditionnel)
+            product = self.product_dal.adjust_stock(
+                sale_data.product_id, -sale_data.quantity, commit=False
+            )
+            if product is None:
+                self._raise_stock_error(sale_data.product_id)
             
-            # Vérifier la quantité
-            if sale_data.quantity <= 0:
+            # Créer la vente dans la même transaction, au prix courant du produit
+            new_sale = self.sale_dal.create_sale(
+                {**sale_data.dict(), **self._price_fields(product["prix"], sale_data.quantity)},
+                commit=False
+            )
+            self.rollup_dal.apply_deltas({
+                (new_sale.date.date(), new_sale.product_id, new_sale.user_id):
+                    (new_sale.quantity, new_sale.total, 1)
+            })
+            response = self._sale_response(new_sale, product, user_nom)
+            self.sale_dal.publish_changes("created", [new_sale])
+            self.sale_dal.commit()
+            return response
+        
+        except ValueError as e:
+            self.sale_dal.rollback()
+            raise e
+        except Exception as e:
+            self.sale_dal.rollback()
+            raise Exception(f"Erreur lors de la création de la vente: {str(e)}")
+    
+    def _raise_stock_error(self, product_id: int) -> None:
+        """Expliquer l'échec d'un décrément de stock : produit absent ou stock insuffisant"""
+        stock = self.product_dal.get_stock(product_id)
+        if stock is None:
+            raise ValueError("Produit introuvable")
+        raise ValueError(f"Stock insuffisant. Stock disponible: {stock}")
+    
+    @staticmethod
+    def _price_fields(unit_price: Decimal, quantity: int) -> dict:
+        """Prix unitaire et montant exacts figés sur la vente"""
+        return {"unit_price": unit_price, "total": unit_price * quantity}
+    
+    @staticmethod
+    def _sale_response(sale, product: dict, user_nom: str) -> dict:
+        """Construire la réponse détaillée d'une vente (objet ou ligne RETURNING) sans la relire en base"""
+        get = sale.get if isinstance(sale, dict) else lambda key: getattr(sale, key)
+        return {
+            "id": get("id"),
+            "product_id": get("product_id"),
+            "user_id": get("user_id"),
+            "quantity": get("quantity"),
+            "date": get("date"),
+            "product_nom": product["nom"],
+            "user_nom": user_nom,
+            "prix_unitaire": get("unit_price"),
+            "prix_total": get("total")
+        }
+    
+    def create_sales_batch(self, batch: SaleBatchCreate) -> dict:
+        """
+        Enregistrer un panier (plusieurs lignes) en une seule transaction :
+        une requête pour l'utilisateur, un UPDATE groupé des stocks, un INSERT multi-lignes
+        """
+        try:
+            if any(line.quantity <= 0 for line in batch.items):
                 raise ValueError("La quantité doit être supérieure à 0")
             
-            # Vérifier le stock disponible
-            if product.stock < sale_data.quantity:
-                raise ValueError(f"Stock insuffisant. Stock disponible: {product.stock}")
+            user_nom = self.user_dal.get_user_nom(batch.user_id)
+            if user_nom is None:
+                raise ValueError("Utilisateur introuvable")
+            
+            # Quantités cumulées par produit (un produit peut apparaître sur plusieurs lignes)
+            quantities = {}
+            for line in batch.items:
+                quantities[line.product_id] = quantities.get(line.product_id, 0) + line.quantity
             
-            # Créer la vente
-            sale_dict = sale_data.dict()
-            new_sale = self.sale_dal.create_sale(sale_dict)
+            products = self.product_dal.adjust_stocks(
+                {product_id: -quantity for product_id, quantity in quantities.items()},
+                commit=False
+            )
+            if len(products) != len(quantities):
+                self._raise_batch_stock_error(quantities, products)
             
-            # Mettre à jour le stock
-            self.product_dal.update_stock(sale_data.product_id, -sale_data.quantity)
+            sale_date = datetime.utcnow()
+            sales = self.sale_dal.create_sales(
+                [
+                    {
+                        "product_id": line.product_id,
+                        "user_id": batch.user_id,
+                        "quantity": line.quantity,
+                        "date": sale_date,
+                        **self._price_fields(products[line.product_id]["prix"], line.quantity)
+                    }
+                    for line in batch.items
+                ],
+                commit=False
+            )
+            deltas = {}
+            for sale in sales:
+                add_delta(deltas, (sale_date.date(), sale["product_id"], batch.user_id), sale["quantity"], sale["total"], 1)
+            self.rollup_dal.apply_deltas(deltas)
+            self.sale_dal.publish_changes("created", sales)
+            self.sale_dal.commit()
             
-            # Récupérer la vente avec les détails
-            return self.sale_dal.get_sale_by_id(new_sale.id)
+            sales = [
+                self._sale_response(sale, products[sale["product_id"]], user_nom)
+                for sale in sales
+            ]
+            return {
+                "user_id": batch.user_id,
+                "user_nom": user_nom,
+                "total_quantity": sum(quantities.values()),
+                "prix_total": sum((sale["prix_total"] for sale in sales), Decimal("0")),
+                "sales": sales
+            }
         
         except ValueError as e:
+            self.sale_dal.rollback()
             raise e
         except Exception as e:
-            raise Exception(f"Erreur lors de la création de la vente: {str(e)}")
+            self.sale_dal.rollback()
+            raise Exception(f"Erreur lors de l'enregistrement du panier: {str(e)}")
+    
+    def _raise_batch_stock_error(self, quantities: dict, updated: dict) -> None:
+        """Expliquer l'échec d'un panier : produits introuvables ou stocks insuffisants"""
+        failed = [product_id for product_id in quantities if product_id not in updated]
+        # Lecture hors de la transaction annulée pour rapporter les stocks réels
+        self.sale_dal.rollback()
+        stocks = self.product_dal.get_stocks(failed)
+        
+        missing = [str(product_id) for product_id in failed if product_id not in stocks]
+        if missing:
+            raise ValueError(f"Produit introuvable: {', '.join(missing)}")
+        raise ValueError(
+            "Stock insuffisant. " + ", ".join(
+                f"Produit {product_id}: {stocks[product_id]} disponible(s)" for product_id in failed
+            )
+        )
     
     def get_sale_by_id(self, sale_id: int) -> dict:
         """Récupérer une vente par son ID"""
@@ -66,6 +189,29 @@ class SaleService:
         except Exception as e:
             raise Exception(f"Erreur lors de la récupération des ventes: {str(e)}")
     
+    def get_sales_page(
+        self,
+        skip: int = 0,
+        limit: int = 100,
+        after: Optional[str] = None
+    ) -> Tuple[List[dict], Optional[str]]:
+        """Récupérer une page de ventes et le curseur de la page suivante"""
+        try:
+            position = decode_sale_cursor(after) if after else None
+            sales = self.sale_dal.get_all_sales(skip, limit, position)
+            return sales, next_cursor(sales, limit, "date", "id")
+        except ValueError as e:
+            raise e
+        except Exception as e:
+            raise Exception(f"Erreur lors de la récupération des ventes: {str(e)}")
+    
+    def get_sales_etag(self, *variant) -> str:
+        """ETag de la liste des ventes (version des tables + paramètres de la page)"""
+        try:
+            return make_etag("sales", *self.sale_dal.get_version(), *variant)
+        except Exception as e:
+            raise Exception(f"Erreur lors du calcul de la version des ventes: {str(e)}")
+    
     def get_sales_by_user(self, user_id: int) -> List[dict]:
         """Récupérer toutes les ventes d'un utilisateur"""
         try:
@@ -107,77 +253,269 @@ class SaleService:
             raise Exception(f"Erreur lors de la récupération des ventes: {str(e)}")
     
     def update_sale(self, sale_id: int, sale_data: SaleUpdate) -> dict:
-        """Mettre à jour une vente"""
+        """Mettre à jour une vente (une seule transaction, stocks ajustés atomiquement)"""
         try:
-            # Vérifier que la vente existe
-            existing_sale = self.sale_dal.get_sale_by_id(sale_id)
-            if not existing_sale:
+            if sale_data.quantity is not None and sale_data.quantity <= 0:
+                raise ValueError("La quantité doit être supérieure à 0")
+            
+            # Verrouiller la vente pour éviter deux corrections concurrentes
+            sale = self.sale_dal.get_sale_for_update(sale_id)
+            if not sale:
                 raise ValueError("Vente introuvable")
             
-            # Si on change le produit, vérifier qu'il existe
-            if sale_data.product_id is not None:
-                product = self.product_dal.get_product_by_id(sale_data.product_id)
-                if not product:
-                    raise ValueError("Produit introuvable")
-            
-            # Si on change l'utilisateur, vérifier qu'il existe
-            if sale_data.user_id is not None:
-                user = self.user_dal.get_user_by_id(sale_data.user_id)
-                if not user:
-                    raise ValueError("Utilisateur introuvable")
-            
-            # Si on change la quantité, gérer le stock
-            if sale_data.quantity is not None:
-                old_quantity = existing_sale["quantity"]
-                product_id = existing_sale["product_id"]
-                quantity_diff = sale_data.quantity - old_quantity
-                
-                product = self.product_dal.get_product_by_id(product_id)
-                if product.stock < quantity_diff:
-                    raise ValueError(f"Stock insuffisant. Stock disponible: {product.stock}")
-                
-                # Mettre à jour le stock
-                self.product_dal.update_stock(product_id, -quantity_diff)
-            
-            # Mettre à jour la vente
-            sale_dict = sale_data.dict(exclude_unset=True)
-            self.sale_dal.update_sale(sale_id, sale_dict)
-            
-            return self.sale_dal.get_sale_by_id(sale_id)
+            old_product_id, old_quantity = sale.product_id, sale.quantity
+            new_product_id = sale_data.product_id if sale_data.product_id is not None else old_product_id
+            new_quantity = sale_data.quantity if sale_data.quantity is not None else old_quantity
+            new_user_id = sale_data.user_id if sale_data.user_id is not None else sale.user_id
+            
+            user_nom = self.user_dal.get_user_nom(new_user_id)
+            if user_nom is None:
+                raise ValueError("Utilisateur introuvable")
+            
+            if new_product_id == old_product_id:
+                product = self.product_dal.adjust_stock(
+                    new_product_id, old_quantity - new_quantity, commit=False
+                )
+            else:
+                # Changement de produit : restituer l'ancien stock, prélever le nouveau.
+                # Verrous pris par id croissant pour éviter les interblocages.
+                changes = {old_product_id: old_quantity, new_product_id: -new_quantity}
+                results = {
+                    product_id: self.product_dal.adjust_stock(product_id, changes[product_id], commit=False)
+                    for product_id in sorted(changes)
+                }
+                product = results[new_product_id]
+            
+            if product is None:
+                self._raise_stock_error(new_product_id)
+            
+            # Le prix figé est conservé ; un changement de produit applique le prix courant du nouveau produit
+            unit_price = sale.unit_price if new_product_id == old_product_id else product["prix"]
+            price_fields = self._price_fields(unit_price, new_quantity)
+            
+            # Agrégat : retirer l'ancienne ligne, ajouter la nouvelle (même jour de vente)
+            deltas = {}
+            add_delta(deltas, (sale.date.date(), old_product_id, sale.user_id), -old_quantity, -sale.total, -1)
+            add_delta(deltas, (sale.date.date(), new_product_id, new_user_id), new_quantity, price_fields["total"], 1)
+            self.rollup_dal.apply_deltas(deltas)
+            
+            sale.product_id = new_product_id
+            sale.user_id = new_user_id
+            sale.quantity = new_quantity
+            sale.unit_price = price_fields["unit_price"]
+            sale.total = price_fields["total"]
+            
+            # L'UPDATE de la vente part avec le commit (flush automatique)
+            response = self._sale_response(sale, product, user_nom)
+            self.sale_dal.publish_changes("updated", [sale])
+            self.sale_dal.commit()
+            return response
         
         except ValueError as e:
+            self.sale_dal.rollback()
             raise e
         except Exception as e:
+            self.sale_dal.rollback()
             raise Exception(f"Erreur lors de la mise à jour de la vente: {str(e)}")
     
     def delete_sale(self, sale_id: int) -> bool:
-        """Supprimer une vente"""
+        """Supprimer une vente et remettre le stock (une seule transaction)"""
         try:
-            # Récupérer la vente
-            sale = self.sale_dal.get_sale_by_id(sale_id)
+            sale = self.sale_dal.delete_sale_returning(sale_id, commit=False)
             if not sale:
                 raise ValueError("Vente introuvable")
             
             # Remettre le stock (annuler la vente)
-            self.product_dal.update_stock(sale["product_id"], sale["quantity"])
-            
-            # Supprimer la vente
-            return self.sale_dal.delete_sale(sale_id)
+            self.product_dal.adjust_stock(sale["product_id"], sale["quantity"], commit=False)
+            self.rollup_dal.apply_deltas({
+                (sale["date"].date(), sale["product_id"], sale["user_id"]):
+                    (-sale["quantity"], -sale["total"], -1)
+            })
+            self.sale_dal.publish_changes("deleted", [sale])
+            self.sale_dal.commit()
+            return True
         
         except ValueError as e:
+            self.sale_dal.rollback()
             raise e
         except Exception as e:
+            self.sale_dal.rollback()
             raise Exception(f"Erreur lors de la suppression de la vente: {str(e)}")
     
-    def get_total_sales_amount(self, start_date: datetime = None, end_date: datetime = None) -> float:
+    def get_total_sales_amount(self, start_date: datetime = None, end_date: datetime = None) -> Decimal:
         """Calculer le montant total des ventes"""
         try:
-            if start_date and end_date:
-                sales = self.sale_dal.get_sales_by_date_range(start_date, end_date)
+            return self.get_sales_totals(start_date, end_date)["total_amount"]
+        except ValueError as e:
+            raise e
+        except Exception as e:
+            raise Exception(f"Erreur lors du calcul du total: {str(e)}")
+    
+    @staticmethod
+    def _split_by_day(
+        start_date: Optional[datetime],
+        end_date: Optional[datetime]
+    ) -> Tuple[Optional[Tuple[Optional[date], Optional[date]]], List[Tuple[datetime, datetime]]]:
+        """
+        Découper une période (bornes incluses) en jours entiers, servis par l'agrégat
+        journalier, et en bords partiels (au plus deux) servis par les ventes brutes
+
+        Returns:
+            Tuple: ((premier jour, dernier jour) ou None, [(début, fin) des bords])
+        """
+        last_instant = timedelta(microseconds=1)
+        first_day = None
+        if start_date is not None:
+            first_day = start_date.date() if start_date.time() == time.min else start_date.date() + timedelta(days=1)
+        last_day = None
+        if end_date is not None:
+            last_day = end_date.date() if end_date.time() == time.max else end_date.date() - timedelta(days=1)
+        
+        if first_day is not None and last_day is not None and first_day > last_day:
+            return None, [(start_date, end_date)]
+        
+        edges = []
+        if start_date is not None and first_day != start_date.date():
+            edges.append((start_date, datetime.combine(first_day, time.min) - last_instant))
+        if end_date is not None and last_day != end_date.date():
+            edges.append((datetime.combine(end_date.date(), time.min), end_date))
+        return (first_day, last_day), edges
+    
+    def get_sales_totals(
+        self,
+        start_date: Optional[datetime] = None,
+        end_date: Optional[datetime] = None,
+        group_by: Optional[str] = None
+    ) -> dict:
+        """Calculer les totaux des ventes (montant, nombre, quantités), éventuellement regroupés"""
+        try:
+            if start_date and end_date and start_date > end_date:
+                raise ValueError("La date de début doit être antérieure à la date de fin")
+            
+            if group_by is not None and group_by not in TOTALS_GROUP_BY:
+                raise ValueError(
+                    f"Regroupement invalide. Valeurs possibles: {', '.join(TOTALS_GROUP_BY)}"
+                )
+            
+            full_days, edges = self._split_by_day(start_date, end_date)
+            
+            # Jours entiers : agrégat journalier ; bords de période : ventes brutes
+            parts = []
+            if full_days is not None:
+                parts.append(self.rollup_dal.get_totals(*full_days))
+            parts.extend(self.sale_dal.get_sales_totals(*edge) for edge in edges)
+            totals = {
+                key: sum((part[key] for part in parts), Decimal("0") if key == "total_amount" else 0)
+                for key in ("total_amount", "sales_count", "total_quantity")
+            }
+            
+            if group_by is not None:
+                groups = {}
+                group_parts = []
+                if full_days is not None:
+                    group_parts.append(self.rollup_dal.get_totals_grouped(group_by, *full_days))
+                group_parts.extend(self.sale_dal.get_sales_totals_grouped(group_by, *edge) for edge in edges)
+                for rows in group_parts:
+                    for row in rows:
+                        group = groups.get(row[f"{group_by}_id"])
+                        if group is None:
+                            groups[row[f"{group_by}_id"]] = dict(row)
+                        else:
+                            for key in ("total_amount", "sales_count", "total_quantity"):
+                                group[key] += row[key]
+                totals["groups"] = sorted(groups.values(), key=lambda group: group["total_amount"], reverse=True)
+            return totals
+        except ValueError as e:
+            raise e
+        except Exception as e:
+            raise Exception(f"Erreur lors du calcul du total: {str(e)}")
+    
+    def get_sales_series(
+        self,
+        bucket: str = "day",
+        start_date: Optional[datetime] = None,
+        end_date: Optional[datetime] = None,
+        tz_name: str = "UTC",
+        product_id: Optional[int] = None,
+        user_id: Optional[int] = None
+    ) -> dict:
+        """
+        Série des ventes (unités, chiffre d'affaires) par heure, jour, semaine ou mois
+
+        Bornes sans fuseau lues dans tz_name, pas exprimés en heure locale. En UTC, les pas
+        d'au moins un jour sont servis par l'agrégat journalier (jours entiers) et par les
+        ventes brutes pour les bords partiels de la période.
+        """
+        try:
+            if bucket not in BUCKETS:
+                raise ValueError(f"Pas invalide. Valeurs possibles: {', '.join(BUCKETS)}")
+            tz = load_timezone(tz_name)
+            
+            end_utc = to_utc(end_date, tz) if end_date is not None else datetime.utcnow()
+            start_utc = to_utc(start_date, tz) if start_date is not None else end_utc - DEFAULT_SPANS[bucket]
+            if start_utc > end_utc:
+                raise ValueError("La date de début doit être antérieure à la date de fin")
+            
+            first_bucket = truncate(to_local(start_utc, tz), bucket)
+            last_bucket = truncate(to_local(end_utc, tz), bucket)
+            if sum(1 for _ in islice(bucket_starts(first_bucket, last_bucket, bucket), MAX_SERIES_POINTS + 1)) > MAX_SERIES_POINTS:
+                raise ValueError(
+                    f"Plus de {MAX_SERIES_POINTS} points : réduisez la période ou choisissez un pas plus large"
+                )
+            
+            if tz.key in UTC_ZONES and bucket != "hour":
+                full_days, edges = self._split_by_day(start_utc, end_utc)
+                parts = []
+                if full_days is not None:
+                    parts.append(self.rollup_dal.get_series(
+                        bucket, first_bucket, last_bucket, *full_days, product_id, user_id
+                    ))
+                parts.extend(
+                    self.sale_dal.get_sales_series(
+                        bucket, *edge, first_bucket, last_bucket, tz.key, product_id, user_id
+                    )
+                    for edge in edges
+                )
             else:
-                sales = self.sale_dal.get_all_sales()
+                parts = [self.sale_dal.get_sales_series(
+                    bucket, start_utc, end_utc, first_bucket, last_bucket, tz.key, product_id, user_id
+                )]
+            
+            # Toutes les parties couvrent les mêmes pas : somme point à point
+            points = parts[0]
+            for part in parts[1:]:
+                for point, other in zip(points, part):
+                    for key in ("units", "revenue", "sales_count"):
+                        point[key] += other[key]
+            
+            return {
+                "bucket": bucket,
+                "timezone": tz.key,
+                "start_date": to_local(start_utc, tz),
+                "end_date": to_local(end_utc, tz),
+                "product_id": product_id,
+                "user_id": user_id,
+                "points": points
+            }
+        except ValueError as e:
+            raise e
+        except Exception as e:
+            raise Exception(f"Erreur lors du calcul de la série des ventes: {str(e)}")
+    
+    def get_leaderboard(self, group_by: str, days: int = 30, limit: int = 10, rank_by: str = "revenue") -> dict:
+        """Meilleurs produits ou vendeurs sur les `days` derniers jours (jour en cours compris)"""
+        try:
+            if rank_by not in LEADERBOARD_RANKS:
+                raise ValueError(f"Critère de classement invalide. Valeurs possibles: {', '.join(LEADERBOARD_RANKS)}")
             
-            total = sum(sale["prix_total"] for sale in sales)
-            return total
+            start_day = datetime.utcnow().date() - timedelta(days=days - 1)
+            return {
+                "days": days,
+                "start_day": start_day,
+                "rank_by": rank_by,
+                "entries": self.rollup_dal.get_leaderboard(group_by, start_day, limit, rank_by)
+            }
+        except ValueError as e:
+            raise e
         except Exception as e:
-            raise Exception(f"Erreur lors du calcul du total: {str(e)}")
\ No newline at end of file
+            raise Exception(f"Erreur lors du calcul du classement: {str(e)}")
@@ -0,0 +1,49 @@
+import time
+from typing import Optional
+from datetime import date
+from app.dal.rollup_dal import SalesRollupDAL
+
+
+class SalesRollupService:
+    def __init__(self, rollup_dal: SalesRollupDAL):
+        self.rollup_dal = rollup_dal
+
+    @staticmethod
+    def _check_range(start_day: Optional[date], end_day: Optional[date]) -> None:
+        if start_day and end_day and start_day > end_day:
+            raise ValueError("La date de début doit être antérieure à la date de fin")
+
+    def rebuild(self, start_day: Optional[date] = None, end_day: Optional[date] = None) -> dict:
+        """Recalculer l'agrégat journalier depuis les ventes (toute la période ou les jours donnés)"""
+        try:
+            self._check_range(start_day, end_day)
+            started_at = time.perf_counter()
+            rows = self.rollup_dal.rebuild(start_day, end_day)
+            self.rollup_dal.db.commit()
+            return {
+                "start_day": start_day,
+                "end_day": end_day,
+                "rows": rows,
+                "seconds": round(time.perf_counter() - started_at, 2)
+            }
+        except ValueError as e:
+            raise e
+        except Exception as e:
+            self.rollup_dal.db.rollback()
+            raise Exception(f"Erreur lors de la reconstruction de l'agrégat: {str(e)}")
+
+    def check(self, start_day: Optional[date] = None, end_day: Optional[date] = None, limit: int = 100) -> dict:
+        """Comparer l'agrégat journalier à un recalcul depuis les ventes"""
+        try:
+            self._check_range(start_day, end_day)
+            mismatches = self.rollup_dal.find_mismatches(start_day, end_day, limit)
+            return {
+                "start_day": start_day,
+                "end_day": end_day,
+                "consistent": not mismatches,
+                "mismatches": mismatches
+            }
+        except ValueError as e:
+            raise e
+        except Exception as e:
+            raise Exception(f"Erreur lors de la vérification de l'agrégat: {str(e)}")
@@ -1,6 +1,7 @@
 from app.utils.security import (
     hash_password, 
     verify_password, 
+    verify_and_update_password,
     create_access_token, 
     decode_access_token,
     get_current_user_email,
@@ -10,6 +11,7 @@ from app.utils.security import (
 __all__ = [
     "hash_password", 
     "verify_password", 
+    "verify_and_update_password",
     "create_access_token", 
     "decode_access_token",
     "get_current_user_email",
@@ -0,0 +1,237 @@
+import json
+import socket
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Optional
+from urllib.parse import urlparse
+from app.utils.json_response import dumps
+
+
+class CacheBackend:
+    """
+    Interface commune des caches (clé -> valeur JSON-compatible)
+
+    Les compteurs hits/misses sont locaux au processus ; un cache est un
+    accélérateur « best effort » : une panne ne doit jamais casser une lecture.
+    """
+    name = "none"
+
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+        self.errors = 0
+
+    def get(self, key: str) -> Optional[Any]:
+        self.misses += 1
+        return None
+
+    def set(self, key: str, value: Any) -> None:
+        pass
+
+    def delete(self, key: str) -> None:
+        pass
+
+    def clear(self) -> None:
+        pass
+
+    def size(self) -> Optional[int]:
+        return None
+
+    def stats(self) -> dict:
+        """Statistiques d'utilisation du cache"""
+        lookups = self.hits + self.misses
+        return {
+            "backend": self.name,
+            "hits": self.hits,
+            "misses": self.misses,
+            "errors": self.errors,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else None,
+            "size": self.size()
+        }
+
+
+class NullCache(CacheBackend):
+    """Cache désactivé : chaque lecture est un échec"""
+    name = "none"
+
+
+class LRUCache(CacheBackend):
+    """Cache en mémoire du processus, borné en taille (LRU) et en durée de vie (TTL)"""
+    name = "memory"
+
+    def __init__(self, maxsize: int = 10000, ttl: float = 30.0):
+        super().__init__()
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[Any]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                expires_at, value = entry
+                if expires_at > time.monotonic():
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._entries[key]
+            self.misses += 1
+            return None
+
+    def set(self, key: str, value: Any) -> None:
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def size(self) -> int:
+        return len(self._entries)
+
+
+class RedisCache(CacheBackend):
+    """
+    Cache partagé via le protocole Redis (RESP), sans dépendance externe
+
+    Compatible avec tout serveur parlant RESP (Redis, KeyDB, Dragonfly,
+    ou un substitut local). Une connexion par thread, délai court : en cas
+    d'erreur la lecture est traitée comme un échec de cache.
+    """
+    name = "redis"
+
+    def __init__(self, url: str, ttl: float = 30.0, prefix: str = "optic:", timeout: float = 0.5):
+        super().__init__()
+        parsed = urlparse(url)
+        self.host = parsed.hostname or "localhost"
+        self.port = parsed.port or 6379
+        self.password = parsed.password
+        self.db = int(parsed.path.lstrip("/") or 0)
+        self.ttl = max(int(ttl), 1)
+        self.prefix = prefix
+        self.timeout = timeout
+        self._local = threading.local()
+
+    def _connection(self):
+        """Connexion du thread courant (ouverte à la demande)"""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            sock = socket.create_connection((self.host, self.port), timeout=self.timeout)
+            conn = (sock, sock.makefile("rb"))
+            self._local.conn = conn
+            if self.password:
+                self._command("AUTH", self.password)
+            if self.db:
+                self._command("SELECT", self.db)
+        return conn
+
+    def _reset(self) -> None:
+        conn = getattr(self._local, "conn", None)
+        self._local.conn = None
+        if conn is not None:
+            try:
+                conn[1].close()
+                conn[0].close()
+            except OSError:
+                pass
+
+    def _command(self, *parts) -> Any:
+        """Envoyer une commande RESP et lire la réponse"""
+        sock, reader = self._connection()
+        encoded = [part if isinstance(part, bytes) else str(part).encode("utf-8") for part in parts]
+        payload = b"*%d\r\n" % len(encoded) + b"".join(
+            b"$%d\r\n%s\r\n" % (len(part), part) for part in encoded
+        )
+        sock.sendall(payload)
+        return self._read_reply(reader)
+
+    def _read_reply(self, reader) -> Any:
+        line = reader.readline()
+        if not line:
+            raise ConnectionError("Connexion Redis fermée")
+        kind, body = line[:1], line[1:-2]
+        if kind == b"+":
+            return body.decode("utf-8")
+        if kind == b"-":
+            raise RuntimeError(body.decode("utf-8"))
+        if kind == b":":
+            return int(body)
+        if kind == b"$":
+            length = int(body)
+            if length < 0:
+                return None
+            data = reader.read(length + 2)
+            return data[:-2]
+        if kind == b"*":
+            length = int(body)
+            if length < 0:
+                return None
+            return [self._read_reply(reader) for _ in range(length)]
+        raise RuntimeError(f"Réponse Redis inattendue: {line!r}")
+
+    def _safe(self, *parts) -> Any:
+        """Commande tolérante aux pannes : None (et compteur d'erreurs) en cas d'échec"""
+        try:
+            return self._command(*parts)
+        except (OSError, RuntimeError, ConnectionError, ValueError):
+            self.errors += 1
+            self._reset()
+            return None
+
+    def get(self, key: str) -> Optional[Any]:
+        raw = self._safe("GET", self.prefix + key)
+        if raw is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return json.loads(raw)
+
+    def set(self, key: str, value: Any) -> None:
+        self._safe("SET", self.prefix + key, dumps(value), "EX", self.ttl)
+
+    def delete(self, key: str) -> None:
+        self._safe("DEL", self.prefix + key)
+
+    def clear(self) -> None:
+        cursor = "0"
+        while True:
+            reply = self._safe("SCAN", cursor, "MATCH", self.prefix + "*", "COUNT", 500)
+            if not reply:
+                return
+            cursor, keys = reply[0].decode("utf-8"), reply[1]
+            if keys:
+                self._safe("DEL", *keys)
+            if cursor == "0":
+                return
+
+
+def build_cache(backend: str, maxsize: int, ttl: float, redis_url: Optional[str] = None,
+                prefix: str = "optic:") -> CacheBackend:
+    """
+    Construire un cache selon la configuration
+
+    Args:
+        backend (str): "memory", "redis" ou "none"
+        maxsize (int): Nombre maximal d'entrées (cache mémoire)
+        ttl (float): Durée de vie des entrées en secondes
+        redis_url (Optional[str]): URL redis://[:mot_de_passe@]hote:port/db
+        prefix (str): Préfixe des clés (cache Redis)
+    """
+    if backend == "memory":
+        return LRUCache(maxsize=maxsize, ttl=ttl)
+    if backend == "redis":
+        if not redis_url:
+            raise ValueError("REDIS_URL est requis pour le cache Redis")
+        return RedisCache(redis_url, ttl=ttl, prefix=prefix)
+    if backend == "none":
+        return NullCache()
+    raise ValueError(f"Cache inconnu: {backend} (memory, redis ou none)")
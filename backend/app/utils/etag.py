@@ -0,0 +1,76 @@
+import hashlib
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Optional
+from fastapi import Request, Response, status
+
+# Les réponses peuvent être gardées en cache, mais doivent être revalidées à chaque usage
+REVALIDATE_CACHE_CONTROL = "no-cache"
+
+
+def make_etag(*parts) -> str:
+    """
+    Construire un ETag fort à partir des éléments de version d'une ressource
+
+    Args:
+        *parts: Valeurs identifiant une version (ex: nom de table, compteur, date de mise à jour, paramètres)
+
+    Returns:
+        str: ETag entre guillemets (RFC 9110)
+    """
+    raw = "|".join("" if part is None else str(part) for part in parts)
+    return '"' + hashlib.sha1(raw.encode("utf-8")).hexdigest() + '"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Comparer l'en-tête If-None-Match à l'ETag courant (comparaison faible, RFC 9110)"""
+    if not if_none_match:
+        return False
+    candidates = [candidate.strip() for candidate in if_none_match.split(",")]
+    return "*" in candidates or any(candidate.removeprefix("W/") == etag for candidate in candidates)
+
+
+def _as_utc(value: datetime) -> datetime:
+    """Dates stockées en UTC naïf -> UTC explicite, tronquées à la seconde (précision HTTP)"""
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.replace(microsecond=0)
+
+
+def http_date(value: datetime) -> str:
+    """Formater une date pour l'en-tête Last-Modified"""
+    return format_datetime(_as_utc(value), usegmt=True)
+
+
+def not_modified_since(if_modified_since: Optional[str], last_modified: Optional[datetime]) -> bool:
+    """Vérifier If-Modified-Since (à n'utiliser qu'en l'absence d'If-None-Match)"""
+    if not if_modified_since or last_modified is None:
+        return False
+    try:
+        since = _as_utc(parsedate_to_datetime(if_modified_since))
+    except (TypeError, ValueError):
+        return False
+    return _as_utc(last_modified) <= since
+
+
+def set_validators(response: Response, etag: str, last_modified: Optional[datetime] = None) -> None:
+    """Ajouter ETag (et Last-Modified) à une réponse complète"""
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = REVALIDATE_CACHE_CONTROL
+    if last_modified is not None:
+        response.headers["Last-Modified"] = http_date(last_modified)
+
+
+def not_modified(etag: str, last_modified: Optional[datetime] = None) -> Response:
+    """Réponse 304 sans corps, avec les mêmes validateurs que la réponse complète"""
+    response = Response(status_code=status.HTTP_304_NOT_MODIFIED)
+    set_validators(response, etag, last_modified)
+    return response
+
+
+def request_is_fresh(request: Request, etag: str, last_modified: Optional[datetime] = None) -> bool:
+    """Le client possède-t-il déjà cette version ? (If-None-Match prioritaire sur If-Modified-Since)"""
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        return etag_matches(if_none_match, etag)
+    return not_modified_since(request.headers.get("if-modified-since"), last_modified)
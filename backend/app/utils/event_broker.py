@@ -0,0 +1,306 @@
+import asyncio
+import json
+import logging
+import select
+import threading
+from collections import deque
+from typing import Deque, Iterable, Iterator, List, Optional, Set, Tuple
+from sqlalchemy.engine import make_url
+from app.config import EVENTS_DATABASE_URL, EVENTS_BACKEND, EVENTS_QUEUE_SIZE, EVENTS_MAX_CLIENTS
+from app.utils.json_response import dumps
+
+logger = logging.getLogger(__name__)
+
+# Canal LISTEN/NOTIFY partagé par tous les workers
+EVENTS_CHANNEL = "optic_events"
+# NOTIFY refuse les messages de plus de 8000 octets : marge pour l'enveloppe JSON
+NOTIFY_MAX_PAYLOAD = 7500
+
+# Types d'événements publiés ("resync" : l'état local du client n'est plus fiable, recharger)
+EVENT_TYPES = ("stock", "product", "product_deleted", "catalogue", "sale", "resync")
+
+
+def encode_frame(event: dict) -> bytes:
+    """Trame SSE d'un événement : type en nom d'événement, corps JSON"""
+    return b"event: " + event["type"].encode("ascii") + b"\ndata: " + dumps(event) + b"\n\n"
+
+
+RESYNC_FRAME = encode_frame({"type": "resync"})
+
+
+def notify_payloads(events: Iterable[dict]) -> List[str]:
+    """
+    Découper des événements en messages NOTIFY (tableaux JSON sous la limite de taille)
+
+    Un événement trop gros à lui seul est remplacé par un resync.
+    """
+    payloads, chunk, size = [], [], 2
+    for event in events:
+        encoded = dumps(event).decode("utf-8")
+        if len(encoded.encode("utf-8")) + 2 > NOTIFY_MAX_PAYLOAD:
+            encoded = '{"type":"resync"}'
+        length = len(encoded.encode("utf-8")) + 1
+        if chunk and size + length > NOTIFY_MAX_PAYLOAD:
+            payloads.append("[" + ",".join(chunk) + "]")
+            chunk, size = [], 2
+        chunk.append(encoded)
+        size += length
+    if chunk:
+        payloads.append("[" + ",".join(chunk) + "]")
+    return payloads
+
+
+class EventStreamUnavailable(Exception):
+    """Flux d'événements désactivé ou saturé : la connexion doit être refusée (503)"""
+
+
+class EventSubscription:
+    """
+    File d'un client du flux, bornée
+
+    Un client trop lent ne bloque ni les autres ni la diffusion : à la saturation
+    de sa file, les trames en attente sont remplacées par un unique resync et les
+    suivantes ignorées jusqu'à ce qu'il l'ait lu (il recharge alors son état).
+    """
+
+    def __init__(self, queue_size: int, types: Optional[Set[str]] = None):
+        self.queue_size = queue_size
+        self.types = types
+        self.dropped = 0
+        self._frames: Deque[bytes] = deque()
+        self._ready = asyncio.Event()
+        self._lagging = False
+
+    def offer(self, event_type: str, frame: bytes) -> None:
+        """Ajouter une trame (boucle d'événements uniquement)"""
+        if self.types is not None and event_type not in self.types and event_type != "resync":
+            return
+        if self._lagging:
+            self.dropped += 1
+            return
+        if len(self._frames) >= self.queue_size:
+            self.dropped += len(self._frames) + 1
+            self._frames.clear()
+            self._frames.append(RESYNC_FRAME)
+            self._lagging = True
+        else:
+            self._frames.append(frame)
+        self._ready.set()
+
+    async def next_frame(self, timeout: float) -> Optional[bytes]:
+        """Trame suivante, ou None si rien n'est arrivé pendant `timeout` secondes"""
+        if not self._frames:
+            self._ready.clear()
+            try:
+                await asyncio.wait_for(self._ready.wait(), timeout)
+            except asyncio.TimeoutError:
+                return None
+        frame = self._frames.popleft()
+        if frame is RESYNC_FRAME:
+            self._lagging = False
+        return frame
+
+
+class EventBroker:
+    """
+    Diffusion des événements aux clients du processus (un seul worker)
+
+    publish() est appelable depuis n'importe quel thread : les trames sont
+    encodées une fois puis remises aux files des clients dans la boucle d'événements.
+    """
+    name = "memory"
+    # Les événements sont-ils transmis par NOTIFY dans la transaction qui les produit ?
+    uses_notify = False
+
+    def __init__(self, queue_size: int, max_clients: int):
+        self.queue_size = queue_size
+        self.max_clients = max_clients
+        self.published = 0
+        self._dropped = 0
+        self._subscribers: Set[EventSubscription] = set()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    async def start(self) -> None:
+        self._loop = asyncio.get_running_loop()
+
+    def stop(self) -> None:
+        self._loop = None
+
+    @property
+    def subscribers(self) -> int:
+        return len(self._subscribers)
+
+    @property
+    def dropped(self) -> int:
+        """Trames écartées pour débordement de file (clients actuels et passés)"""
+        return self._dropped + sum(subscription.dropped for subscription in self._subscribers)
+
+    def check_capacity(self) -> None:
+        """
+        Vérifier qu'un client de plus peut être accepté (avant d'ouvrir la réponse)
+
+        Raises:
+            EventStreamUnavailable: Si le nombre maximal de clients est atteint
+        """
+        if len(self._subscribers) >= self.max_clients:
+            raise EventStreamUnavailable("Trop de clients connectés au flux d'événements, réessayez plus tard")
+
+    def subscribe(self, types: Optional[Set[str]] = None) -> EventSubscription:
+        """
+        Inscrire un client (à désinscrire par unsubscribe)
+
+        Raises:
+            EventStreamUnavailable: Si le nombre maximal de clients est atteint
+        """
+        self.check_capacity()
+        subscription = EventSubscription(self.queue_size, types)
+        self._subscribers.add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: EventSubscription) -> None:
+        if subscription in self._subscribers:
+            self._subscribers.discard(subscription)
+            self._dropped += subscription.dropped
+
+    def publish(self, events: List[dict]) -> None:
+        """Diffuser des événements validés (COMMIT effectué)"""
+        self._dispatch(events)
+
+    def resync_all(self) -> None:
+        """Demander à tous les clients de recharger leur état (événements possiblement perdus)"""
+        self._dispatch([{"type": "resync"}])
+
+    def _dispatch(self, events: List[dict]) -> None:
+        loop = self._loop
+        if loop is None or loop.is_closed() or not self._subscribers:
+            return
+        frames = [
+            (event["type"], RESYNC_FRAME if event["type"] == "resync" else encode_frame(event))
+            for event in events
+        ]
+        loop.call_soon_threadsafe(self._deliver, frames)
+
+    def _deliver(self, frames: List[Tuple[str, bytes]]) -> None:
+        self.published += len(frames)
+        for subscription in list(self._subscribers):
+            for event_type, frame in frames:
+                subscription.offer(event_type, frame)
+
+
+class NullEventBroker(EventBroker):
+    """Flux désactivé : rien n'est publié, aucun client n'est accepté"""
+    name = "none"
+
+    def check_capacity(self) -> None:
+        raise EventStreamUnavailable("Flux d'événements désactivé (EVENTS_BACKEND=none)")
+
+    def subscribe(self, types: Optional[Set[str]] = None) -> EventSubscription:
+        self.check_capacity()
+
+    def publish(self, events: List[dict]) -> None:
+        pass
+
+
+class PostgresEventBroker(EventBroker):
+    """
+    Diffusion entre workers par LISTEN/NOTIFY
+
+    Les transactions envoient leurs événements par NOTIFY (remis par PostgreSQL
+    au COMMIT seulement) ; chaque worker les reçoit sur une connexion dédiée,
+    écoutée par un thread, puis les diffuse à ses propres clients. Après une
+    coupure de cette connexion, les clients reçoivent un resync.
+    """
+    name = "postgres"
+    uses_notify = True
+
+    def __init__(self, url: str, queue_size: int, max_clients: int, reconnect_delay: float = 1.0):
+        super().__init__(queue_size, max_clients)
+        # psycopg2 attend une URL libpq (sans suffixe de pilote SQLAlchemy)
+        self.dsn = make_url(url).set(drivername="postgresql").render_as_string(hide_password=False)
+        self.reconnect_delay = reconnect_delay
+        self._stopping = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    async def start(self) -> None:
+        await super().start()
+        self._stopping.clear()
+        self._thread = threading.Thread(target=self._listen, name="events-listener", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stopping.set()
+        if self._thread is not None:
+            self._thread.join(timeout=2)
+            self._thread = None
+        super().stop()
+
+    def publish(self, events: List[dict]) -> None:
+        # Envoi par NOTIFY dans la transaction (app.dal.events) : rien à faire après le COMMIT
+        pass
+
+    def _notifications(self, conn) -> Iterator[str]:
+        """Messages reçus sur la connexion d'écoute (attente d'au plus une seconde)"""
+        if select.select([conn], [], [], 1.0) == ([], [], []):
+            return
+        conn.poll()
+        while conn.notifies:
+            yield conn.notifies.pop(0).payload
+
+    def _listen(self) -> None:
+        import psycopg2
+        from psycopg2.extensions import ISOLATION_LEVEL_AUTOCOMMIT
+
+        connected_once = False
+        while not self._stopping.is_set():
+            conn = None
+            try:
+                conn = psycopg2.connect(self.dsn)
+                conn.set_isolation_level(ISOLATION_LEVEL_AUTOCOMMIT)
+                with conn.cursor() as cursor:
+                    cursor.execute(f"LISTEN {EVENTS_CHANNEL}")
+                if connected_once:
+                    self.resync_all()
+                connected_once = True
+                while not self._stopping.is_set():
+                    for payload in self._notifications(conn):
+                        self._dispatch(json.loads(payload))
+            except Exception as e:
+                logger.warning("Écoute des événements interrompue (%s), reconnexion", e)
+                self._stopping.wait(self.reconnect_delay)
+            finally:
+                if conn is not None:
+                    try:
+                        conn.close()
+                    except Exception:
+                        pass
+
+
+def build_event_broker(backend: str, queue_size: int, max_clients: int, url: Optional[str] = None) -> EventBroker:
+    """
+    Construire la diffusion des événements selon la configuration
+
+    Args:
+        backend (str): "postgres", "memory" ou "none"
+        queue_size (int): Trames en attente par client
+        max_clients (int): Nombre maximal de clients connectés (par worker)
+        url (Optional[str]): URL PostgreSQL directe de la connexion d'écoute
+            (None derrière PgBouncer sans EVENTS_DATABASE_URL : repli sur "memory")
+    """
+    if backend == "postgres":
+        if url is None:
+            logger.warning(
+                "EVENTS_BACKEND=postgres derrière PgBouncer sans EVENTS_DATABASE_URL : "
+                "LISTEN impossible, événements limités au worker courant (memory)"
+            )
+            return EventBroker(queue_size, max_clients)
+        if not url.startswith("postgresql"):
+            raise ValueError("EVENTS_BACKEND=postgres nécessite une base PostgreSQL")
+        return PostgresEventBroker(url, queue_size, max_clients)
+    if backend == "memory":
+        return EventBroker(queue_size, max_clients)
+    if backend == "none":
+        return NullEventBroker(queue_size, max_clients)
+    raise ValueError(f"Diffusion d'événements inconnue: {backend} (postgres, memory ou none)")
+
+
+event_broker = build_event_broker(EVENTS_BACKEND, EVENTS_QUEUE_SIZE, EVENTS_MAX_CLIENTS, EVENTS_DATABASE_URL)
@@ -0,0 +1,57 @@
+import json
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Any, Optional
+from fastapi import Response
+from fastapi.responses import JSONResponse
+
+try:
+    import orjson
+except ImportError:  # dépendance optionnelle : repli sur le module json standard
+    orjson = None
+
+
+def _default(value: Any) -> Any:
+    """Types non JSON : montants exacts en texte (comme les DTO), dates ISO 8601"""
+    if isinstance(value, Decimal):
+        return str(value)
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    raise TypeError(f"Type non sérialisable: {type(value).__name__}")
+
+
+def dumps(content: Any) -> bytes:
+    """Encoder en JSON (orjson si disponible)"""
+    if orjson is not None:
+        return orjson.dumps(content, default=_default, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(content, default=_default, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+class FastJSONResponse(JSONResponse):
+    """
+    Réponse JSON encodée par orjson, sans validation ni conversion intermédiaire
+
+    Réservée aux données déjà conformes au schéma de la route (lignes du DAL) :
+    le response_model de la route reste déclaré pour la documentation OpenAPI
+    mais n'est pas appliqué quand l'endpoint renvoie directement cette réponse.
+    """
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+
+def trusted_json(content: Any, response: Optional[Response] = None) -> FastJSONResponse:
+    """
+    Réponse rapide pour une sortie de confiance, en reprenant les en-têtes
+    (ETag, curseur...) posés sur la réponse injectée par FastAPI
+
+    Args:
+        content (Any): Données JSON-compatibles (dicts, listes, Decimal, datetime)
+        response (Response): Réponse injectée dont les en-têtes sont conservés
+    """
+    fast = FastJSONResponse(content)
+    if response is not None:
+        for key, value in response.headers.items():
+            if key not in ("content-length", "content-type"):
+                fast.headers[key] = value
+    return fast
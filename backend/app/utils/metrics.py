@@ -0,0 +1,227 @@
+import time
+from bisect import bisect_left
+from contextvars import ContextVar
+from typing import Dict, Iterable, List, Optional, Tuple
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+# Bornes des histogrammes (secondes / octets), au format Prometheus
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SIZE_BUCKETS = (128, 512, 2048, 8192, 32768, 131072, 524288, 2097152, 8388608)
+
+# Libellé des requêtes qui ne correspondent à aucune route (évite une série par URL inconnue)
+UNMATCHED_ROUTE = "<unmatched>"
+
+METRICS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+class DBStats:
+    """
+    Temps et nombre de requêtes SQL d'un périmètre (requête HTTP, bloc mesuré)
+
+    Les périmètres s'emboîtent : une requête SQL est comptée dans le périmètre
+    courant et dans tous ses parents.
+    """
+    __slots__ = ("queries", "seconds", "parent", "statements")
+
+    def __init__(self, parent: Optional["DBStats"] = None, record: bool = False):
+        self.queries = 0
+        self.seconds = 0.0
+        self.parent = parent
+        # Texte des requêtes, uniquement si demandé (diagnostic des budgets)
+        self.statements: Optional[List[str]] = [] if record else None
+
+
+# Statistiques base de données de la requête HTTP courante (propagées au pool de threads et à run_sync)
+current_db_stats: ContextVar[Optional[DBStats]] = ContextVar("current_db_stats", default=None)
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _start_query_timer(conn, cursor, statement, parameters, context, executemany):
+    conn.info["query_started_at"] = time.perf_counter()
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _stop_query_timer(conn, cursor, statement, parameters, context, executemany):
+    stats = current_db_stats.get()
+    if stats is None:
+        return
+    elapsed = time.perf_counter() - conn.info["query_started_at"]
+    # Réglages posés à chaque BEGIN (mode PgBouncer) : temps compté, pas de requête au budget
+    counted = 0 if context is not None and context.execution_options.get("transaction_setup") else 1
+    while stats is not None:
+        stats.queries += counted
+        stats.seconds += elapsed
+        if stats.statements is not None:
+            stats.statements.append(statement)
+        stats = stats.parent
+
+
+class Histogram:
+    """Histogramme à bornes fixes (comptes non cumulés, cumulés à l'export)"""
+    __slots__ = ("buckets", "counts", "total", "count")
+
+    def __init__(self, buckets: Tuple[float, ...]):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.total = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.total += value
+        self.count += 1
+
+    def render(self, name: str, labels: str) -> Iterable[str]:
+        cumulative = 0
+        for bound, count in zip(self.buckets, self.counts):
+            cumulative += count
+            yield f'{name}_bucket{{{labels},le="{bound}"}} {cumulative}'
+        yield f'{name}_bucket{{{labels},le="+Inf"}} {self.count}'
+        yield f"{name}_sum{{{labels}}} {self.total}"
+        yield f"{name}_count{{{labels}}} {self.count}"
+
+
+class RouteMetrics:
+    """Séries d'une route (méthode + chemin paramétré) ; libellés formatés une seule fois"""
+    __slots__ = ("labels", "responses", "latency", "size", "db_time", "db_queries")
+
+    def __init__(self, method: str, route: str):
+        self.labels = f'method="{method}",route="{route}"'
+        self.responses: Dict[int, int] = {}
+        self.latency = Histogram(LATENCY_BUCKETS)
+        self.size = Histogram(SIZE_BUCKETS)
+        self.db_time = Histogram(LATENCY_BUCKETS)
+        self.db_queries = 0
+
+
+class MetricsRegistry:
+    """
+    Compteurs HTTP du processus
+
+    Toutes les mises à jour ont lieu sur la boucle d'événements (middleware) :
+    aucun verrou n'est nécessaire.
+    """
+
+    def __init__(self):
+        self.in_flight = 0
+        self.routes: Dict[str, Dict[str, RouteMetrics]] = {}
+
+    def observe(self, method: str, route: str, status: int, seconds: float, size: int, db: DBStats) -> None:
+        by_route = self.routes.get(method)
+        if by_route is None:
+            by_route = self.routes[method] = {}
+        series = by_route.get(route)
+        if series is None:
+            series = by_route[route] = RouteMetrics(method, route)
+
+        series.responses[status] = series.responses.get(status, 0) + 1
+        series.latency.observe(seconds)
+        series.size.observe(size)
+        series.db_time.observe(db.seconds)
+        series.db_queries += db.queries
+
+    def render(self) -> List[str]:
+        """Séries HTTP au format texte Prometheus"""
+        series_list = [series for by_route in self.routes.values() for series in by_route.values()]
+        lines = [
+            "# HELP http_requests_in_flight Requêtes HTTP en cours de traitement",
+            "# TYPE http_requests_in_flight gauge",
+            f"http_requests_in_flight {self.in_flight}",
+            "# HELP http_requests_total Réponses HTTP par route et code",
+            "# TYPE http_requests_total counter",
+        ]
+        for series in series_list:
+            for status, count in sorted(series.responses.items()):
+                lines.append(f'http_requests_total{{{series.labels},status="{status}"}} {count}')
+
+        histograms = (
+            ("http_request_duration_seconds", "Durée de traitement des requêtes", "latency"),
+            ("http_response_size_bytes", "Taille du corps des réponses", "size"),
+            ("http_request_db_seconds", "Temps passé en base de données par requête", "db_time"),
+        )
+        for name, help_text, attribute in histograms:
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} histogram")
+            for series in series_list:
+                lines.extend(getattr(series, attribute).render(name, series.labels))
+
+        lines.append("# HELP http_request_db_queries_total Requêtes SQL exécutées")
+        lines.append("# TYPE http_request_db_queries_total counter")
+        for series in series_list:
+            lines.append(f"http_request_db_queries_total{{{series.labels}}} {series.db_queries}")
+        return lines
+
+
+metrics = MetricsRegistry()
+
+
+class MetricsMiddleware:
+    """Middleware ASGI : durée, code, taille et temps base de données de chaque requête HTTP"""
+
+    def __init__(self, app, registry: MetricsRegistry = metrics):
+        self.app = app
+        self.registry = registry
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        registry = self.registry
+        registry.in_flight += 1
+        db = DBStats()
+        token = current_db_stats.set(db)
+        started_at = time.perf_counter()
+        status = 500
+        size = 0
+
+        async def send_and_measure(message):
+            nonlocal status, size
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            elif message["type"] == "http.response.body":
+                size += len(message.get("body", b""))
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_and_measure)
+        finally:
+            current_db_stats.reset(token)
+            registry.in_flight -= 1
+            # Le routeur renseigne scope["route"] : chemin paramétré, pas l'URL brute
+            route = scope.get("route")
+            registry.observe(
+                scope["method"],
+                getattr(route, "path", UNMATCHED_ROUTE),
+                status,
+                time.perf_counter() - started_at,
+                size,
+                db
+            )
+
+
+def render_samples(name: str, help_text: str, samples: Iterable[Tuple[str, float]], kind: str = "gauge") -> List[str]:
+    """Série simple (gauge ou counter) à partir de couples (libellés, valeur)"""
+    lines = [f"# HELP {name} {help_text}", f"# TYPE {name} {kind}"]
+    lines.extend(f"{name}{{{labels}}} {value}" if labels else f"{name} {value}" for labels, value in samples)
+    return lines
+
+
+def render_pools(engines: Dict[str, Engine]) -> List[str]:
+    """Statistiques des pools de connexions SQLAlchemy (QueuePool ; les autres pools sont ignorés)"""
+    pools = [
+        (f'engine="{name}"', engine.pool)
+        for name, engine in engines.items()
+        if hasattr(engine.pool, "checkedout")
+    ]
+    lines = []
+    for name, help_text, read in (
+        ("db_pool_size", "Taille configurée du pool", lambda pool: pool.size()),
+        ("db_pool_checked_out", "Connexions prêtées", lambda pool: pool.checkedout()),
+        ("db_pool_checked_in", "Connexions disponibles dans le pool", lambda pool: pool.checkedin()),
+        ("db_pool_overflow", "Connexions au-delà de la taille du pool", lambda pool: pool.overflow()),
+    ):
+        if pools:
+            lines.extend(render_samples(name, help_text, [(labels, read(pool)) for labels, pool in pools]))
+    return lines
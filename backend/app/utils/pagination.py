@@ -0,0 +1,85 @@
+import base64
+import json
+from datetime import datetime
+from typing import List, Optional
+
+# En-tête HTTP portant le curseur de la page suivante
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+def encode_cursor(*values) -> str:
+    """
+    Encoder une position de pagination (keyset) en curseur opaque
+    
+    Args:
+        *values: Valeurs de la clé de tri de la dernière ligne (ex: date, id)
+    
+    Returns:
+        str: Curseur encodé en base64 URL-safe
+    """
+    payload = [value.isoformat() if isinstance(value, datetime) else value for value in values]
+    raw = json.dumps(payload, separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str, size: int) -> List:
+    """
+    Décoder un curseur opaque
+    
+    Args:
+        cursor (str): Curseur reçu du client
+        size (int): Nombre de valeurs attendues dans le curseur
+    
+    Returns:
+        List: Valeurs de la clé de tri
+    
+    Raises:
+        ValueError: Si le curseur est invalide
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+    except Exception:
+        raise ValueError("Curseur de pagination invalide")
+    
+    if not isinstance(values, list) or len(values) != size:
+        raise ValueError("Curseur de pagination invalide")
+    return values
+
+
+def decode_sale_cursor(cursor: str) -> tuple:
+    """Décoder un curseur de ventes (date, id)"""
+    date_value, sale_id = decode_cursor(cursor, 2)
+    try:
+        return datetime.fromisoformat(date_value), int(sale_id)
+    except (TypeError, ValueError):
+        raise ValueError("Curseur de pagination invalide")
+
+
+def decode_product_cursor(cursor: str) -> int:
+    """Décoder un curseur de produits (id)"""
+    (product_id,) = decode_cursor(cursor, 1)
+    try:
+        return int(product_id)
+    except (TypeError, ValueError):
+        raise ValueError("Curseur de pagination invalide")
+
+
+def next_cursor(items: List, limit: int, *keys: str) -> Optional[str]:
+    """
+    Construire le curseur de la page suivante à partir de la dernière ligne
+    
+    Args:
+        items (List): Lignes de la page courante (dicts ou objets)
+        limit (int): Taille de page demandée
+        *keys (str): Attributs formant la clé de tri
+    
+    Returns:
+        Optional[str]: Curseur, ou None si la page est la dernière
+    """
+    if not items or len(items) < limit:
+        return None
+    last = items[-1]
+    if isinstance(last, dict):
+        return encode_cursor(*(last[key] for key in keys))
+    return encode_cursor(*(getattr(last, key) for key in keys))
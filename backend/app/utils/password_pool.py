@@ -0,0 +1,52 @@
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable
+from app.config import PASSWORD_POOL_WORKERS, PASSWORD_POOL_QUEUE
+
+
+class PasswordPoolSaturated(Exception):
+    """Trop de demandes de hachage en cours : la requête doit être rejetée (503)"""
+
+
+class PasswordPool:
+    """
+    Pool borné pour le travail bcrypt (hachage, vérification)
+
+    bcrypt libère le GIL : quelques threads dédiés suffisent à sortir ce calcul
+    de la boucle d'événements et du pool de threads des requêtes. Le nombre de
+    demandes en vol est limité (workers + file) : au-delà, rejet immédiat plutôt
+    qu'une file qui grossit pendant une rafale de connexions.
+    """
+
+    def __init__(self, workers: int, max_queue: int):
+        self.workers = workers
+        self.max_queue = max_queue
+        self.rejected = 0
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="password")
+        self._slots = threading.BoundedSemaphore(workers + max_queue)
+
+    async def run(self, fn: Callable[..., Any], *args) -> Any:
+        """
+        Exécuter fn(*args) dans le pool et attendre son résultat
+
+        Raises:
+            PasswordPoolSaturated: Si workers + file sont déjà occupés
+        """
+        if not self._slots.acquire(blocking=False):
+            self.rejected += 1
+            raise PasswordPoolSaturated("Service d'authentification saturé, réessayez dans un instant")
+        try:
+            future = self._executor.submit(fn, *args)
+        except BaseException:
+            self._slots.release()
+            raise
+        future.add_done_callback(lambda _: self._slots.release())
+        return await asyncio.wrap_future(future)
+
+    def shutdown(self) -> None:
+        """Arrêter les threads (les demandes non démarrées sont annulées)"""
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+password_pool = PasswordPool(PASSWORD_POOL_WORKERS, PASSWORD_POOL_QUEUE)
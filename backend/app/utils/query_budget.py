@@ -0,0 +1,117 @@
+import logging
+from contextlib import contextmanager
+from typing import Dict, Iterator, Optional
+from app.utils.metrics import DBStats, current_db_stats
+
+logger = logging.getLogger(__name__)
+
+# En-têtes de diagnostic (mode debug uniquement)
+DB_QUERIES_HEADER = b"x-db-queries"
+DB_TIME_HEADER = b"x-db-time"
+
+# Nombre maximal de requêtes SQL par route (méthode + chemin paramétré), COMMIT non compris
+# (NOTIFY des événements /events compris : une requête par transaction d'écriture sous PostgreSQL ;
+# set_config des timeouts posé à chaque BEGIN en mode PgBouncer non compris, comme BEGIN).
+# Les routes absentes utilisent le budget par défaut (DB_QUERY_BUDGET).
+ROUTE_QUERY_BUDGETS: Dict[str, int] = {
+    "POST /sales/": 5,
+    "POST /sales/batch": 6,
+    "GET /sales/": 2,
+    "GET /sales/{sale_id}": 1,
+    "PUT /sales/{sale_id}": 9,
+    "DELETE /sales/{sale_id}": 5,
+    "GET /sales/stats/total-amount": 6,
+    "GET /sales/stats/series": 3,
+    "GET /sales/stats/top-products": 1,
+    "GET /sales/stats/top-sellers": 1,
+    "GET /products/": 2,
+    "GET /products/low-stock": 1,
+    "GET /products/{product_id}": 1,
+    "PUT /products/{product_id}": 4,
+    "DELETE /products/{product_id}": 5,
+    "GET /products/{product_id}/stock-check": 1,
+    "POST /auth/login": 2,
+    "POST /auth/register": 3,
+    "GET /dashboard/summary": 4,
+}
+
+
+@contextmanager
+def count_queries(record: bool = False) -> Iterator[DBStats]:
+    """
+    Compter les requêtes SQL exécutées dans un bloc (toutes sessions confondues)
+
+    Args:
+        record (bool): Conserver le texte des requêtes (diagnostic)
+
+    Yields:
+        DBStats: Compteurs du bloc (queries, seconds, statements)
+    """
+    stats = DBStats(parent=current_db_stats.get(), record=record)
+    token = current_db_stats.set(stats)
+    try:
+        yield stats
+    finally:
+        current_db_stats.reset(token)
+
+
+@contextmanager
+def assert_max_queries(budget: int) -> Iterator[DBStats]:
+    """
+    Échouer (AssertionError) si le bloc exécute plus de `budget` requêtes SQL
+
+    Exemple:
+        with assert_max_queries(3):
+            service.create_sale(sale_data)
+    """
+    with count_queries(record=True) as stats:
+        yield stats
+    if stats.queries > budget:
+        listing = "\n".join(f"  {index}. {' '.join(sql.split())}" for index, sql in enumerate(stats.statements, 1))
+        raise AssertionError(f"{stats.queries} requêtes SQL pour un budget de {budget}:\n{listing}")
+
+
+class QueryBudgetMiddleware:
+    """
+    Middleware ASGI : nombre de requêtes SQL et temps base de données par requête HTTP
+
+    - debug_headers : ajoute X-DB-Queries / X-DB-Time aux réponses
+    - les requêtes dépassant le budget de leur route sont journalisées
+    """
+
+    def __init__(self, app, default_budget: int, debug_headers: bool = False,
+                 budgets: Optional[Dict[str, int]] = None):
+        self.app = app
+        self.default_budget = default_budget
+        self.debug_headers = debug_headers
+        self.budgets = ROUTE_QUERY_BUDGETS if budgets is None else budgets
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        with count_queries() as stats:
+            if self.debug_headers:
+                async def send_with_headers(message):
+                    # Requêtes exécutées avant l'envoi des en-têtes (hors corps en flux)
+                    if message["type"] == "http.response.start":
+                        message["headers"] = list(message.get("headers", [])) + [
+                            (DB_QUERIES_HEADER, str(stats.queries).encode("ascii")),
+                            (DB_TIME_HEADER, f"{stats.seconds * 1000:.2f}ms".encode("ascii")),
+                        ]
+                    await send(message)
+                await self.app(scope, receive, send_with_headers)
+            else:
+                await self.app(scope, receive, send)
+
+        route = scope.get("route")
+        if route is None:
+            return
+        key = f"{scope['method']} {route.path}"
+        budget = self.budgets.get(key, self.default_budget)
+        if stats.queries > budget:
+            logger.warning(
+                "Budget SQL dépassé: %s -> %d requêtes (budget %d), %.1f ms en base",
+                key, stats.queries, budget, stats.seconds * 1000
+            )
@@ -0,0 +1,65 @@
+import unicodedata
+
+# Ligatures que la décomposition Unicode ne sépare pas (alignées sur l'extension unaccent)
+LIGATURES = str.maketrans({"œ": "oe", "Œ": "OE", "æ": "ae", "Æ": "AE", "ß": "ss"})
+
+# Nom de la fonction SQL de normalisation enregistrée sur les connexions SQLite
+SQLITE_NORMALIZE_FUNCTION = "search_normalize"
+
+
+def normalize_text(value: str) -> str:
+    """
+    Normaliser un texte pour la recherche (sans accents, insensible à la casse)
+
+    Args:
+        value (str): Texte brut (ex: "Monture Acétate")
+
+    Returns:
+        str: Texte normalisé (ex: "monture acetate")
+    """
+    if value is None:
+        return None
+    decomposed = unicodedata.normalize("NFKD", value.translate(LIGATURES))
+    stripped = "".join(char for char in decomposed if not unicodedata.combining(char))
+    return stripped.lower()
+
+
+def escape_like(value: str, escape: str = "\\") -> str:
+    """Échapper les caractères spéciaux d'un motif LIKE"""
+    return (
+        value.replace(escape, escape * 2)
+        .replace("%", escape + "%")
+        .replace("_", escape + "_")
+    )
+
+
+def trigrams(value: str) -> set:
+    """Calculer l'ensemble des trigrammes d'un texte normalisé (même découpage que pg_trgm)"""
+    result = set()
+    for word in "".join(char if char.isalnum() else " " for char in value).split():
+        padded = f"  {word} "
+        result.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return result
+
+
+def word_similarity(term: str, text: str) -> float:
+    """
+    Approximation de word_similarity(term, text) de pg_trgm
+
+    Args:
+        term (str): Terme recherché normalisé
+        text (str): Texte normalisé dans lequel chercher
+
+    Returns:
+        float: Score entre 0 et 1 (part des trigrammes du terme présents dans le texte)
+    """
+    term_trigrams = trigrams(term)
+    if not term_trigrams:
+        return 0.0
+    return len(term_trigrams & trigrams(text)) / len(term_trigrams)
+
+
+def rank_key(term: str, text: str) -> tuple:
+    """Clé de tri par pertinence : préfixe d'abord, puis similarité décroissante"""
+    return (not text.startswith(term), -word_similarity(term, text), text)
+
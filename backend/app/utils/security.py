@@ -1,11 +1,18 @@
 from passlib.context import CryptContext
 from jose import JWTError, jwt
 from datetime import datetime, timedelta
-from typing import Optional, Dict
-from app.config import SECRET_KEY, ALGORITHM, ACCESS_TOKEN_EXPIRE_MINUTES
+from typing import Optional, Dict, Tuple
+from app.config import SECRET_KEY, ALGORITHM, ACCESS_TOKEN_EXPIRE_MINUTES, BCRYPT_ROUNDS
 
 # Configuration du contexte de hachage des mots de passe
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# Un hash d'un autre coût que BCRYPT_ROUNDS est considéré obsolète (recalculé à la connexion)
+pwd_context = CryptContext(
+    schemes=["bcrypt"],
+    deprecated="auto",
+    bcrypt__default_rounds=BCRYPT_ROUNDS,
+    bcrypt__min_rounds=BCRYPT_ROUNDS,
+    bcrypt__max_rounds=BCRYPT_ROUNDS
+)
 
 def hash_password(password: str) -> str:
     """
@@ -38,6 +45,22 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
     except Exception as e:
         raise Exception(f"Erreur lors de la vérification du mot de passe: {str(e)}")
 
+def verify_and_update_password(plain_password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+    """
+    Vérifier un mot de passe et, si son hash est obsolète (coût bcrypt modifié), en calculer un nouveau
+    
+    Args:
+        plain_password (str): Mot de passe en clair
+        hashed_password (str): Mot de passe hashé
+    
+    Returns:
+        Tuple[bool, Optional[str]]: (correspondance, nouveau hash à enregistrer ou None)
+    """
+    try:
+        return pwd_context.verify_and_update(plain_password, hashed_password)
+    except Exception as e:
+        raise Exception(f"Erreur lors de la vérification du mot de passe: {str(e)}")
+
 def create_access_token(data: Dict, expires_delta: Optional[timedelta] = None) -> str:
     """
     Créer un token JWT
@@ -0,0 +1,88 @@
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+from typing import Dict, Iterator, List, Tuple
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
+# Pas autorisés (mêmes noms que date_trunc de PostgreSQL)
+BUCKETS = ("hour", "day", "week", "month")
+
+# Nombre maximal de points d'une série (au-delà : pas plus large ou période plus courte)
+MAX_SERIES_POINTS = 1000
+
+# Période par défaut (jusqu'à maintenant) selon le pas
+DEFAULT_SPANS = {
+    "hour": timedelta(days=2),
+    "day": timedelta(days=30),
+    "week": timedelta(weeks=26),
+    "month": timedelta(days=365),
+}
+
+# Fuseaux dont l'heure locale est celle des dates stockées (agrégat journalier utilisable)
+UTC_ZONES = ("UTC", "Etc/UTC")
+
+# Valeurs d'un pas : (unités, chiffre d'affaires, nombre de ventes)
+BucketTotals = Tuple[int, Decimal, int]
+
+
+def load_timezone(name: str) -> ZoneInfo:
+    """Fuseau IANA (ex: Africa/Casablanca), ValueError s'il est inconnu"""
+    try:
+        return ZoneInfo(name)
+    except (ZoneInfoNotFoundError, ValueError):
+        raise ValueError(f"Fuseau horaire inconnu: {name}")
+
+
+def to_utc(value: datetime, tz: ZoneInfo) -> datetime:
+    """Instant UTC naïf (format des dates de vente) ; une date naïve est lue dans le fuseau tz"""
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=tz)
+    return value.astimezone(timezone.utc).replace(tzinfo=None)
+
+
+def to_local(value: datetime, tz: ZoneInfo) -> datetime:
+    """Heure locale naïve dans tz d'un instant UTC naïf"""
+    return value.replace(tzinfo=timezone.utc).astimezone(tz).replace(tzinfo=None)
+
+
+def truncate(value: datetime, bucket: str) -> datetime:
+    """Début du pas contenant value (semaines commençant le lundi, comme date_trunc)"""
+    value = value.replace(minute=0, second=0, microsecond=0)
+    if bucket == "hour":
+        return value
+    value = value.replace(hour=0)
+    if bucket == "week":
+        return value - timedelta(days=value.weekday())
+    if bucket == "month":
+        return value.replace(day=1)
+    return value
+
+
+def next_bucket(value: datetime, bucket: str) -> datetime:
+    """Début du pas suivant"""
+    if bucket == "hour":
+        return value + timedelta(hours=1)
+    if bucket == "day":
+        return value + timedelta(days=1)
+    if bucket == "week":
+        return value + timedelta(weeks=1)
+    if value.month == 12:
+        return value.replace(year=value.year + 1, month=1)
+    return value.replace(month=value.month + 1)
+
+
+def bucket_starts(first: datetime, last: datetime, bucket: str) -> Iterator[datetime]:
+    """Débuts des pas de first à last inclus (équivalent de generate_series)"""
+    current = first
+    while current <= last:
+        yield current
+        current = next_bucket(current, bucket)
+
+
+def fill_series(totals: Dict[datetime, BucketTotals], first: datetime, last: datetime, bucket: str) -> List[dict]:
+    """Série complète : un point par pas, à zéro pour les pas sans vente"""
+    empty = (0, Decimal("0.00"), 0)
+    points = []
+    for start in bucket_starts(first, last, bucket):
+        units, revenue, sales_count = totals.get(start, empty)
+        points.append({"bucket": start, "units": units, "revenue": revenue, "sales_count": sales_count})
+    return points
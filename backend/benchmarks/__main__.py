@@ -0,0 +1,123 @@
+import argparse
+import asyncio
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+from datetime import datetime, timezone
+from sqlalchemy import create_engine, text
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m benchmarks", description="Banc d'essai des chemins critiques de l'API")
+    parser.add_argument("--scale", choices=("small", "medium", "large"), default="small", help="Volume du jeu de données")
+    parser.add_argument("--products", type=int, help="Surcharge du nombre de produits")
+    parser.add_argument("--users", type=int, help="Surcharge du nombre d'utilisateurs")
+    parser.add_argument("--sales", type=int, help="Surcharge du nombre de ventes")
+    parser.add_argument("--concurrency", default="1,8,32", help="Paliers de concurrence (séparés par des virgules)")
+    parser.add_argument("--requests", type=int, default=1000, help="Requêtes mesurées par scénario et par palier")
+    parser.add_argument("--warmup", type=int, default=20, help="Requêtes d'échauffement (non mesurées)")
+    parser.add_argument("--flows", help="Scénarios à exécuter (tous par défaut)")
+    parser.add_argument("--database-url", default=os.getenv("BENCH_DATABASE_URL"),
+                        help="Base PostgreSQL dédiée (SQLite temporaire si absente ou injoignable)")
+    parser.add_argument("--reset", action="store_true", help="Supprimer les tables existantes avant l'alimentation")
+    parser.add_argument("--seed", type=int, default=42, help="Graine des générateurs")
+    parser.add_argument("--workers", type=int, default=1, help="Workers uvicorn")
+    parser.add_argument("--env", action="append", default=[], metavar="CLE=VALEUR",
+                        help="Variable d'environnement du serveur (ex: DB_ASYNC=true), répétable")
+    parser.add_argument("--output", help="Fichier JSON de résultats (sortie standard sinon)")
+    return parser.parse_args(argv)
+
+
+def log(message: str) -> None:
+    print(message, file=sys.stderr, flush=True)
+
+
+def resolve_database(url):
+    """PostgreSQL si l'URL est fournie et joignable, sinon une base SQLite temporaire"""
+    if url:
+        try:
+            with create_engine(url).connect() as connection:
+                connection.execute(text("SELECT 1"))
+            return url, False
+        except Exception as e:
+            log(f"Base {url.split('@')[-1]} injoignable ({e.__class__.__name__}) : repli sur SQLite")
+    path = os.path.join(tempfile.mkdtemp(prefix="optic-bench-"), "bench.db")
+    return f"sqlite:///{path}", True
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+    database_url, temporary = resolve_database(args.database_url)
+    overrides = dict(item.split("=", 1) for item in args.env)
+
+    # La configuration de l'application est lue à l'import : environnement d'abord
+    os.environ.update(overrides)
+    os.environ["DATABASE_URL"] = database_url
+    from benchmarks.dataset import SCALES, seed
+    from benchmarks.flows import FLOWS
+    from benchmarks.runner import Server, run_level
+
+    flow_names = args.flows.split(",") if args.flows else list(FLOWS)
+    unknown = [name for name in flow_names if name not in FLOWS]
+    if unknown:
+        log(f"Scénarios inconnus: {', '.join(unknown)} (disponibles: {', '.join(FLOWS)})")
+        return 2
+    levels = [int(level) for level in args.concurrency.split(",")]
+
+    products, users, sales = SCALES[args.scale]
+    products, users, sales = args.products or products, args.users or users, args.sales or sales
+    log(f"Alimentation: {products} produits, {users} utilisateurs, {sales} ventes ({database_url.split(':')[0]})")
+    data = seed(products, users, sales, seed_value=args.seed, reset=args.reset or temporary)
+
+    results = []
+    with Server(dict(os.environ), workers=args.workers) as server:
+        for name in flow_names:
+            flow = FLOWS[name]
+            for concurrency in levels:
+                requests = max(int(args.requests * flow.weight), concurrency)
+                summary = asyncio.run(run_level(
+                    server.base_url, flow, data, concurrency, requests, args.warmup, args.seed
+                ))
+                results.append({"flow": name, "concurrency": concurrency, **summary})
+                latency = summary["latency_ms"]
+                log(f"{name:<16} c={concurrency:<4} {summary['throughput_rps']:>9.1f} req/s  "
+                    f"p50={latency['p50']:.1f}ms p95={latency['p95']:.1f}ms p99={latency['p99']:.1f}ms "
+                    f"erreurs={summary['errors']}")
+
+    report = {
+        "meta": {
+            "commit": git_commit(),
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "database": database_url.split(":", 1)[0],
+            "dataset": {"products": products, "users": users, "sales": sales, "seed": args.seed},
+            "server": {"workers": args.workers, "env": overrides},
+            "requests_per_level": args.requests,
+            "warmup": args.warmup,
+        },
+        "results": results,
+    }
+    output = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as handle:
+            handle.write(output + "\n")
+    else:
+        print(output)
+    return 1 if any(result["errors"] for result in results) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
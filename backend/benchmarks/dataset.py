@@ -0,0 +1,55 @@
+"""Jeu de données déterministe du banc d'essai (importé après configuration de DATABASE_URL)"""
+from dataclasses import dataclass, field
+from typing import List
+from app.scripts.seed_data import MATERIALS, SyntheticDataGenerator, seed_database
+
+# Échelles prédéfinies : (produits, utilisateurs, ventes)
+SCALES = {
+    "small": (500, 20, 20000),
+    "medium": (5000, 100, 200000),
+    "large": (20000, 500, 2000000),
+}
+
+BENCH_PASSWORD = "benchmark-password"
+# Stock large : les ventes du banc ne doivent pas échouer faute de stock
+BENCH_STOCK = 10_000_000
+
+
+@dataclass
+class BenchDataset:
+    """Ce que les scénarios doivent connaître du jeu de données"""
+    products: int
+    users: int
+    sales: int
+    search_terms: List[str] = field(default_factory=list)
+
+    @staticmethod
+    def email(index: int) -> str:
+        return SyntheticDataGenerator.email(index)
+
+
+def seed(products: int, users: int, sales: int, seed_value: int = 42, reset: bool = False) -> BenchDataset:
+    """
+    Créer le schéma et insérer le jeu de données (identique pour une même graine)
+
+    Args:
+        products (int): Nombre de produits
+        users (int): Nombre d'utilisateurs (mot de passe commun BENCH_PASSWORD)
+        sales (int): Nombre de ventes, réparties sur les 365 derniers jours
+        seed_value (int): Graine du générateur
+        reset (bool): Supprimer les tables existantes avant l'insertion
+    """
+    try:
+        seed_database(
+            products, users, sales, SyntheticDataGenerator(seed=seed_value, days=365),
+            reset=reset, stock_range=(BENCH_STOCK, BENCH_STOCK), password=BENCH_PASSWORD
+        )
+    except ValueError as e:
+        raise RuntimeError(str(e))
+
+    return BenchDataset(
+        products=products,
+        users=users,
+        sales=sales,
+        search_terms=list(MATERIALS) + ["monture", "verres", "soleil", "lentile"]
+    )
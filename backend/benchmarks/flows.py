@@ -0,0 +1,60 @@
+"""Scénarios mesurés : chaque scénario construit une requête HTTP à partir d'un générateur déterministe"""
+import random
+from dataclasses import dataclass
+from typing import Callable, Dict, Optional, Tuple
+from benchmarks.dataset import BENCH_PASSWORD, BenchDataset
+
+# (méthode, chemin, corps JSON)
+Request = Tuple[str, str, Optional[dict]]
+
+
+@dataclass(frozen=True)
+class Flow:
+    name: str
+    build: Callable[[random.Random, BenchDataset], Request]
+    # Part du nombre de requêtes par palier (bcrypt rend la connexion volontairement coûteuse)
+    weight: float = 1.0
+
+
+def _create_sale(rng: random.Random, data: BenchDataset) -> Request:
+    return "POST", "/sales/", {
+        "product_id": rng.randint(1, data.products),
+        "user_id": rng.randint(1, data.users),
+        "quantity": 1,
+    }
+
+
+def _list_sales(rng: random.Random, data: BenchDataset) -> Request:
+    return "GET", "/sales/?limit=100", None
+
+
+def _list_products(rng: random.Random, data: BenchDataset) -> Request:
+    return "GET", f"/products/?limit=100&skip={rng.randrange(0, max(data.products - 100, 1))}", None
+
+
+def _search_products(rng: random.Random, data: BenchDataset) -> Request:
+    return "GET", f"/products/search/?q={rng.choice(data.search_terms)}", None
+
+
+def _sales_totals(rng: random.Random, data: BenchDataset) -> Request:
+    return "GET", "/sales/stats/total-amount", None
+
+
+def _login(rng: random.Random, data: BenchDataset) -> Request:
+    return "POST", "/auth/login", {
+        "email": BenchDataset.email(rng.randint(1, data.users)),
+        "password": BENCH_PASSWORD,
+    }
+
+
+FLOWS: Dict[str, Flow] = {
+    flow.name: flow
+    for flow in (
+        Flow("create_sale", _create_sale),
+        Flow("list_sales", _list_sales),
+        Flow("list_products", _list_products),
+        Flow("search_products", _search_products),
+        Flow("sales_totals", _sales_totals),
+        Flow("login", _login, weight=0.1),
+    )
+}
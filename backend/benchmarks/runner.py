@@ -0,0 +1,128 @@
+"""Démarrage du serveur et génération de charge"""
+import asyncio
+import os
+import random
+import socket
+import subprocess
+import sys
+import time
+from typing import Dict, List, Optional
+import httpx
+from benchmarks.dataset import BenchDataset
+from benchmarks.flows import Flow
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SERVER_START_TIMEOUT = 60
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+class Server:
+    """uvicorn app.main:app dans un processus séparé (le client de charge ne partage pas son GIL)"""
+
+    def __init__(self, env: Dict[str, str], workers: int = 1):
+        self.port = free_port()
+        self.base_url = f"http://127.0.0.1:{self.port}"
+        self.env = env
+        self.workers = workers
+        self.process: Optional[subprocess.Popen] = None
+
+    def __enter__(self) -> "Server":
+        self.process = subprocess.Popen(
+            [
+                sys.executable, "-m", "uvicorn", "app.main:app",
+                "--host", "127.0.0.1", "--port", str(self.port),
+                "--workers", str(self.workers), "--log-level", "warning", "--no-access-log",
+            ],
+            cwd=BACKEND_DIR,
+            env=self.env,
+        )
+        deadline = time.monotonic() + SERVER_START_TIMEOUT
+        while time.monotonic() < deadline:
+            if self.process.poll() is not None:
+                raise RuntimeError(f"Le serveur s'est arrêté au démarrage (code {self.process.returncode})")
+            try:
+                if httpx.get(f"{self.base_url}/health", timeout=1).status_code == 200:
+                    return self
+            except httpx.HTTPError:
+                pass
+            time.sleep(0.2)
+        self.__exit__(None, None, None)
+        raise RuntimeError("Le serveur n'a pas répondu sur /health à temps")
+
+    def __exit__(self, *exc) -> None:
+        if self.process and self.process.poll() is None:
+            self.process.terminate()
+            try:
+                self.process.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                self.process.kill()
+
+
+def percentile(sorted_values: List[float], fraction: float) -> float:
+    """Percentile au rang le plus proche (valeurs triées)"""
+    if not sorted_values:
+        return 0.0
+    rank = max(int(round(fraction * len(sorted_values) + 0.5)) - 1, 0)
+    return sorted_values[min(rank, len(sorted_values) - 1)]
+
+
+def summarize(latencies: List[float], errors: int, elapsed: float) -> dict:
+    values = sorted(latencies)
+    to_ms = lambda seconds: round(seconds * 1000, 3)
+    return {
+        "requests": len(values),
+        "errors": errors,
+        "duration_s": round(elapsed, 3),
+        "throughput_rps": round(len(values) / elapsed, 2) if elapsed else 0.0,
+        "latency_ms": {
+            "p50": to_ms(percentile(values, 0.50)),
+            "p95": to_ms(percentile(values, 0.95)),
+            "p99": to_ms(percentile(values, 0.99)),
+            "mean": to_ms(sum(values) / len(values)) if values else 0.0,
+            "max": to_ms(values[-1]) if values else 0.0,
+        },
+    }
+
+
+async def run_level(base_url: str, flow: Flow, data: BenchDataset, concurrency: int,
+                    requests: int, warmup: int, seed: int) -> dict:
+    """
+    Envoyer `requests` requêtes du scénario avec `concurrency` clients simultanés
+
+    Chaque client a son propre générateur (graine dérivée) : la suite de requêtes
+    est identique d'une exécution à l'autre.
+    """
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=60) as client:
+        warmup_rng = random.Random(seed)
+        for _ in range(warmup):
+            method, path, body = flow.build(warmup_rng, data)
+            await client.request(method, path, json=body)
+
+        remaining = requests
+        latencies: List[float] = []
+        errors = 0
+
+        async def worker(index: int) -> None:
+            nonlocal remaining, errors
+            rng = random.Random(seed * 1000 + index)
+            while remaining > 0:
+                remaining -= 1
+                method, path, body = flow.build(rng, data)
+                started_at = time.perf_counter()
+                try:
+                    response = await client.request(method, path, json=body)
+                    failed = response.status_code >= 400
+                except httpx.HTTPError:
+                    failed = True
+                latencies.append(time.perf_counter() - started_at)
+                errors += failed
+
+        started_at = time.perf_counter()
+        await asyncio.gather(*(worker(index) for index in range(concurrency)))
+        return summarize(latencies, errors, time.perf_counter() - started_at)
@@ -0,0 +1,102 @@
+"""
+Coût de sérialisation par ligne des réponses de liste (sans base ni serveur)
+
+Compare, sur des pages de lignes synthétiques :
+- validated : chemin response_model de FastAPI (validation Pydantic puis encodage),
+  précédé pour les produits de la conversion ProductResponse.from_orm par ligne
+- trusted : lignes du DAL encodées directement (app.utils.json_response, orjson)
+- trusted_stdlib : même chemin avec le repli sur le module json standard
+
+Usage (depuis backend/):
+    python -m benchmarks.serialization --rows 1000 --repeat 200
+"""
+import argparse
+import json
+import sys
+import time
+from datetime import datetime, timedelta
+from decimal import Decimal
+from typing import Callable, List
+from pydantic import TypeAdapter
+from app.dto.product_dto import ProductResponse
+from app.dto.sale_dto import SaleResponse
+from app.models import Product
+from app.utils import json_response
+
+
+def sale_rows(count: int) -> List[dict]:
+    start = datetime(2025, 1, 1, 9)
+    return [
+        {
+            "id": index, "product_id": index % 500 + 1, "user_id": index % 20 + 1, "quantity": index % 3 + 1,
+            "date": start + timedelta(minutes=index), "product_nom": f"Monture acétate noir {index % 500}",
+            "user_nom": f"Vendeur {index % 20}", "prix_unitaire": Decimal("129.90"),
+            "prix_total": Decimal("129.90") * (index % 3 + 1),
+        }
+        for index in range(1, count + 1)
+    ]
+
+
+def product_rows(count: int) -> List[dict]:
+    return [
+        {
+            "id": index, "nom": f"Monture acétate noir {index}", "prix": Decimal("129.90"), "stock": index % 50,
+            "image_url": None, "reference": f"SYN-{index:07d}", "updated_at": datetime(2025, 1, 1, 9),
+        }
+        for index in range(1, count + 1)
+    ]
+
+
+def measure(encode: Callable[[], bytes], repeat: int) -> float:
+    """Meilleur temps d'un encodage de page (secondes) sur `repeat` essais"""
+    best = float("inf")
+    for _ in range(repeat):
+        started_at = time.perf_counter()
+        encode()
+        best = min(best, time.perf_counter() - started_at)
+    return best
+
+
+def stdlib_dumps(content) -> bytes:
+    return json.dumps(content, default=json_response._default, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.serialization", description="Coût de sérialisation par ligne")
+    parser.add_argument("--rows", type=int, default=1000, help="Lignes par page")
+    parser.add_argument("--repeat", type=int, default=200, help="Essais par chemin (meilleur temps retenu)")
+    args = parser.parse_args(argv)
+
+    sales = sale_rows(args.rows)
+    products = product_rows(args.rows)
+    orm_products = [Product(**row) for row in products]
+    sale_adapter = TypeAdapter(List[SaleResponse])
+    product_adapter = TypeAdapter(List[ProductResponse])
+
+    cases = {
+        "sales": {
+            "validated": lambda: sale_adapter.dump_json(sale_adapter.validate_python(sales)),
+            "trusted": lambda: json_response.dumps(sales),
+            "trusted_stdlib": lambda: stdlib_dumps(sales),
+        },
+        "products": {
+            "validated": lambda: product_adapter.dump_json(product_adapter.validate_python(
+                [ProductResponse.from_orm(product) for product in orm_products]
+            )),
+            "trusted": lambda: json_response.dumps(products),
+            "trusted_stdlib": lambda: stdlib_dumps(products),
+        },
+    }
+
+    report = {"rows": args.rows, "orjson": json_response.orjson is not None, "us_per_row": {}}
+    for endpoint, paths in cases.items():
+        report["us_per_row"][endpoint] = {
+            path: round(measure(encode, args.repeat) / args.rows * 1e6, 3) for path, encode in paths.items()
+        }
+    json.dump(report, sys.stdout, indent=2)
+    sys.stdout.write("\n")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
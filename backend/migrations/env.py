@@ -0,0 +1,48 @@
+"""
+Environnement Alembic
+
+- L'URL vient de la configuration Alembic si elle est fournie (upgrade_schema),
+  sinon de DATABASE_URL comme pour l'application.
+- Connexion dédiée sans pool ni timeouts du profil moteur : une création d'index
+  CONCURRENTLY sur une grande table ne doit pas être interrompue par statement_timeout.
+"""
+from logging.config import fileConfig
+from alembic import context
+from sqlalchemy import create_engine
+from sqlalchemy.pool import NullPool
+from app.config import Base, DATABASE_URL
+import app.models  # noqa: F401  (déclare les tables pour --autogenerate)
+
+config = context.config
+if config.config_file_name is not None and config.attributes.get("configure_logger", True):
+    fileConfig(config.config_file_name)
+
+target_metadata = Base.metadata
+url = config.get_main_option("sqlalchemy.url") or DATABASE_URL
+
+
+def run_migrations_offline() -> None:
+    """Mode hors ligne : écrire le SQL des migrations sans connexion"""
+    context.configure(
+        url=url,
+        target_metadata=target_metadata,
+        literal_binds=True,
+        dialect_opts={"paramstyle": "named"},
+    )
+    with context.begin_transaction():
+        context.run_migrations()
+
+
+def run_migrations_online() -> None:
+    """Appliquer les migrations sur la base"""
+    connectable = create_engine(url, poolclass=NullPool)
+    with connectable.connect() as connection:
+        context.configure(connection=connection, target_metadata=target_metadata)
+        with context.begin_transaction():
+            context.run_migrations()
+
+
+if context.is_offline_mode():
+    run_migrations_offline()
+else:
+    run_migrations_online()
@@ -0,0 +1,154 @@
+"""Schéma de référence : utilisateurs, produits, ventes, agrégat journalier
+
+Applicable à une base vide comme à une base existante créée avant les
+migrations : les tables présentes sont conservées et les objets PostgreSQL
+complémentaires sont ajoutés de façon idempotente.
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-18
+"""
+import logging
+from alembic import context, op
+import sqlalchemy as sa
+
+revision = "0001"
+down_revision = None
+branch_labels = None
+depends_on = None
+
+logger = logging.getLogger("alembic.runtime.migration")
+
+# Objets PostgreSQL complémentaires (idempotents, repris du démarrage de l'application)
+POSTGRES_DDL = [
+    # Recherche de produits : trigrammes + suppression des accents
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+    "CREATE EXTENSION IF NOT EXISTS unaccent",
+    # unaccent() n'est pas IMMUTABLE : on l'enveloppe pour pouvoir l'indexer
+    """
+    CREATE OR REPLACE FUNCTION f_search_normalize(text) RETURNS text AS $$
+        SELECT lower(public.unaccent('public.unaccent'::regdictionary, $1))
+    $$ LANGUAGE sql IMMUTABLE PARALLEL SAFE STRICT
+    """,
+    """
+    CREATE INDEX IF NOT EXISTS ix_products_nom_search_trgm
+        ON products USING gin (f_search_normalize(nom) gin_trgm_ops)
+    """,
+    # Stock jamais négatif : ajouté NOT VALID (pas de verrou long), puis validé à part
+    """
+    DO $$
+    BEGIN
+        IF NOT EXISTS (
+            SELECT 1 FROM pg_constraint WHERE conname = 'ck_products_stock_non_negative'
+        ) THEN
+            ALTER TABLE products
+                ADD CONSTRAINT ck_products_stock_non_negative CHECK (stock >= 0) NOT VALID;
+        END IF;
+    END $$
+    """,
+    "ALTER TABLE products VALIDATE CONSTRAINT ck_products_stock_non_negative",
+    # Colonnes ajoutées après la création initiale des tables
+    "ALTER TABLE products ADD COLUMN IF NOT EXISTS reference VARCHAR(64)",
+    "CREATE UNIQUE INDEX IF NOT EXISTS ix_products_reference ON products (reference)",
+    "ALTER TABLE products ADD COLUMN IF NOT EXISTS updated_at TIMESTAMP NOT NULL DEFAULT (now() AT TIME ZONE 'utc')",
+    "CREATE INDEX IF NOT EXISTS ix_products_updated_at ON products (updated_at)",
+    "ALTER TABLE sales ADD COLUMN IF NOT EXISTS updated_at TIMESTAMP NOT NULL DEFAULT (now() AT TIME ZONE 'utc')",
+    "CREATE INDEX IF NOT EXISTS ix_sales_updated_at ON sales (updated_at)",
+    "CREATE INDEX IF NOT EXISTS ix_sales_date ON sales (date)",
+    # Alimentation initiale de l'agrégat journalier si les ventes précèdent la table
+    """
+    INSERT INTO sales_daily_rollup (day, product_id, user_id, units, revenue, sales_count)
+    SELECT s.date::date, s.product_id, s.user_id, sum(s.quantity), sum(s.quantity * p.prix), count(*)
+    FROM sales s JOIN products p ON p.id = s.product_id
+    WHERE NOT EXISTS (SELECT 1 FROM sales_daily_rollup)
+    GROUP BY 1, 2, 3
+    """,
+]
+
+# Extensions et fonction de recherche : un refus (droits insuffisants) n'empêche pas la migration
+OPTIONAL_DDL = POSTGRES_DDL[:4]
+
+
+def create_tables(existing: set) -> None:
+    if "users" not in existing:
+        op.create_table(
+            "users",
+            sa.Column("id", sa.Integer(), primary_key=True, autoincrement=True),
+            sa.Column("nom", sa.String(100), nullable=False),
+            sa.Column("email", sa.String(100), nullable=False),
+            sa.Column("password", sa.String(255), nullable=False),
+        )
+        op.create_index("ix_users_id", "users", ["id"])
+        op.create_index("ix_users_email", "users", ["email"], unique=True)
+
+    if "products" not in existing:
+        op.create_table(
+            "products",
+            sa.Column("id", sa.Integer(), primary_key=True, autoincrement=True),
+            sa.Column("nom", sa.String(100), nullable=False),
+            sa.Column("prix", sa.Numeric(10, 2), nullable=False),
+            sa.Column("stock", sa.Integer(), nullable=False),
+            sa.Column("image_url", sa.Text(), nullable=True),
+            sa.Column("reference", sa.String(64), nullable=True),
+            sa.Column("updated_at", sa.DateTime(), nullable=False),
+            sa.CheckConstraint("stock >= 0", name="ck_products_stock_non_negative"),
+        )
+        op.create_index("ix_products_id", "products", ["id"])
+        op.create_index("ix_products_reference", "products", ["reference"], unique=True)
+        op.create_index("ix_products_updated_at", "products", ["updated_at"])
+
+    if "sales" not in existing:
+        op.create_table(
+            "sales",
+            sa.Column("id", sa.Integer(), primary_key=True, autoincrement=True),
+            sa.Column("product_id", sa.Integer(), sa.ForeignKey("products.id"), nullable=False),
+            sa.Column("user_id", sa.Integer(), sa.ForeignKey("users.id"), nullable=False),
+            sa.Column("quantity", sa.Integer(), nullable=False),
+            sa.Column("date", sa.DateTime(), nullable=True),
+            sa.Column("updated_at", sa.DateTime(), nullable=False),
+        )
+        op.create_index("ix_sales_id", "sales", ["id"])
+        op.create_index("ix_sales_date", "sales", ["date"])
+        op.create_index("ix_sales_updated_at", "sales", ["updated_at"])
+
+    if "sales_daily_rollup" not in existing:
+        op.create_table(
+            "sales_daily_rollup",
+            sa.Column("day", sa.Date(), primary_key=True),
+            sa.Column("product_id", sa.Integer(), sa.ForeignKey("products.id"), primary_key=True),
+            sa.Column("user_id", sa.Integer(), sa.ForeignKey("users.id"), primary_key=True),
+            sa.Column("units", sa.Integer(), nullable=False),
+            sa.Column("revenue", sa.Numeric(14, 2), nullable=False),
+            sa.Column("sales_count", sa.Integer(), nullable=False),
+        )
+
+
+def upgrade() -> None:
+    if context.is_offline_mode():
+        existing = set()
+    else:
+        existing = set(sa.inspect(op.get_bind()).get_table_names())
+    create_tables(existing)
+
+    if op.get_context().dialect.name != "postgresql":
+        return
+
+    for statement in POSTGRES_DDL:
+        if statement not in OPTIONAL_DDL or context.is_offline_mode():
+            op.execute(statement)
+            continue
+        # Point de sauvegarde : un échec n'annule pas le reste de la migration
+        savepoint = op.get_bind().begin_nested()
+        try:
+            op.execute(statement)
+            savepoint.commit()
+        except Exception as e:
+            savepoint.rollback()
+            logger.warning("Instruction de schéma ignorée (%s): %s", " ".join(statement.split())[:80], e)
+
+
+def downgrade() -> None:
+    op.drop_table("sales_daily_rollup")
+    op.drop_table("sales")
+    op.drop_table("products")
+    op.drop_table("users")
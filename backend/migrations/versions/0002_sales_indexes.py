@@ -0,0 +1,74 @@
+"""Index composites des ventes (filtres produit/vendeur, tri chronologique)
+
+- (product_id, date DESC) : ventes d'un produit, plus récentes d'abord
+- (user_id, date DESC) : ventes d'un vendeur, plus récentes d'abord
+- (date DESC, id DESC) : liste paginée (ORDER BY date DESC, id DESC, keyset)
+  et bornes de période ; remplace l'index simple sur date
+
+Sous PostgreSQL les index sont créés et supprimés CONCURRENTLY, hors
+transaction : pas de verrou bloquant les ventes sur une base en service.
+Un index laissé INVALID par une interruption est supprimé puis recréé.
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0002"
+down_revision = "0001"
+branch_labels = None
+depends_on = None
+
+INDEXES = {
+    "ix_sales_product_id_date": ["product_id", sa.text("date DESC")],
+    "ix_sales_user_id_date": ["user_id", sa.text("date DESC")],
+    "ix_sales_date_id": [sa.text("date DESC"), sa.text("id DESC")],
+}
+
+
+def _is_postgresql() -> bool:
+    return op.get_context().dialect.name == "postgresql"
+
+
+def _drop_invalid(name: str) -> None:
+    """Supprimer un index resté INVALID après un CREATE INDEX CONCURRENTLY interrompu"""
+    op.execute(f"""
+        DO $$
+        BEGIN
+            IF EXISTS (
+                SELECT 1 FROM pg_index i JOIN pg_class c ON c.oid = i.indexrelid
+                WHERE c.relname = '{name}' AND NOT i.indisvalid
+            ) THEN
+                EXECUTE 'DROP INDEX {name}';
+            END IF;
+        END $$
+    """)
+
+
+def upgrade() -> None:
+    if not _is_postgresql():
+        for name, columns in INDEXES.items():
+            op.create_index(name, "sales", columns, if_not_exists=True)
+        op.drop_index("ix_sales_date", table_name="sales", if_exists=True)
+        return
+
+    with op.get_context().autocommit_block():
+        for name, columns in INDEXES.items():
+            _drop_invalid(name)
+            op.create_index(name, "sales", columns, postgresql_concurrently=True, if_not_exists=True)
+        op.drop_index("ix_sales_date", table_name="sales", postgresql_concurrently=True, if_exists=True)
+
+
+def downgrade() -> None:
+    if not _is_postgresql():
+        op.create_index("ix_sales_date", "sales", ["date"], if_not_exists=True)
+        for name in INDEXES:
+            op.drop_index(name, table_name="sales", if_exists=True)
+        return
+
+    with op.get_context().autocommit_block():
+        op.create_index("ix_sales_date", "sales", ["date"], postgresql_concurrently=True, if_not_exists=True)
+        for name in INDEXES:
+            op.drop_index(name, table_name="sales", postgresql_concurrently=True, if_exists=True)
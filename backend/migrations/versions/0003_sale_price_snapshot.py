@@ -0,0 +1,72 @@
+"""Prix unitaire et montant figés sur chaque vente
+
+Les ventes existantes reçoivent le prix actuel de leur produit (seule
+information disponible). Sous PostgreSQL, l'alimentation se fait par
+tranches d'identifiants validées une à une (verrous courts, pas de
+transaction géante), puis NOT NULL est posé via une contrainte CHECK
+validée à part pour éviter un parcours de table sous verrou exclusif.
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-18
+"""
+from alembic import context, op
+import sqlalchemy as sa
+
+revision = "0003"
+down_revision = "0002"
+branch_labels = None
+depends_on = None
+
+# Ventes mises à jour par transaction lors de l'alimentation
+BACKFILL_BATCH_SIZE = 50000
+
+BACKFILL = """
+    UPDATE sales SET
+        unit_price = (SELECT prix FROM products WHERE products.id = sales.product_id),
+        total = (SELECT prix FROM products WHERE products.id = sales.product_id) * quantity
+    WHERE unit_price IS NULL
+"""
+
+
+def upgrade() -> None:
+    op.add_column("sales", sa.Column("unit_price", sa.Numeric(10, 2), nullable=True))
+    op.add_column("sales", sa.Column("total", sa.Numeric(12, 2), nullable=True))
+
+    if op.get_context().dialect.name != "postgresql":
+        op.execute(BACKFILL)
+        with op.batch_alter_table("sales") as batch:
+            batch.alter_column("unit_price", existing_type=sa.Numeric(10, 2), nullable=False)
+            batch.alter_column("total", existing_type=sa.Numeric(12, 2), nullable=False)
+        return
+
+    with op.get_context().autocommit_block():
+        if context.is_offline_mode():
+            op.execute(BACKFILL)
+        else:
+            bind = op.get_bind()
+            last_id = bind.execute(sa.text("SELECT coalesce(max(id), 0) FROM sales")).scalar()
+            for start in range(0, last_id, BACKFILL_BATCH_SIZE):
+                bind.execute(
+                    sa.text("""
+                        UPDATE sales s SET unit_price = p.prix, total = p.prix * s.quantity
+                        FROM products p
+                        WHERE p.id = s.product_id AND s.id > :start AND s.id <= :stop AND s.unit_price IS NULL
+                    """),
+                    {"start": start, "stop": start + BACKFILL_BATCH_SIZE}
+                )
+            # Ventes créées par l'ancienne version de l'API pendant l'alimentation
+            op.execute(BACKFILL)
+
+    # CHECK NOT VALID puis VALIDATE (verrou léger) : SET NOT NULL réutilise la contrainte validée
+    op.execute("ALTER TABLE sales ADD CONSTRAINT ck_sales_price_not_null CHECK (unit_price IS NOT NULL AND total IS NOT NULL) NOT VALID")
+    op.execute("ALTER TABLE sales VALIDATE CONSTRAINT ck_sales_price_not_null")
+    op.alter_column("sales", "unit_price", existing_type=sa.Numeric(10, 2), nullable=False)
+    op.alter_column("sales", "total", existing_type=sa.Numeric(12, 2), nullable=False)
+    op.drop_constraint("ck_sales_price_not_null", "sales", type_="check")
+
+
+def downgrade() -> None:
+    with op.batch_alter_table("sales") as batch:
+        batch.drop_column("total")
+        batch.drop_column("unit_price")
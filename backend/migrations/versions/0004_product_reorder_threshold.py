@@ -0,0 +1,61 @@
+"""Seuil de réapprovisionnement par produit et index partiel du stock faible
+
+La colonne est ajoutée avec une valeur par défaut constante (sans réécriture
+de la table sous PostgreSQL 11+). L'index partiel ne contient que les
+produits dont stock <= reorder_threshold : la liste du stock faible reste
+une lecture de quelques lignes quelle que soit la taille du catalogue.
+Sous PostgreSQL il est créé CONCURRENTLY, hors transaction.
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0004"
+down_revision = "0003"
+branch_labels = None
+depends_on = None
+
+LOW_STOCK_INDEX = "ix_products_low_stock"
+LOW_STOCK_WHERE = sa.text("stock <= reorder_threshold")
+
+
+def upgrade() -> None:
+    op.add_column(
+        "products",
+        sa.Column("reorder_threshold", sa.Integer(), nullable=False, server_default=sa.text("20"))
+    )
+
+    if op.get_context().dialect.name != "postgresql":
+        op.create_index(LOW_STOCK_INDEX, "products", ["stock"], sqlite_where=LOW_STOCK_WHERE, if_not_exists=True)
+        return
+
+    with op.get_context().autocommit_block():
+        # Index resté INVALID après une création interrompue
+        op.execute(f"""
+            DO $$
+            BEGIN
+                IF EXISTS (
+                    SELECT 1 FROM pg_index i JOIN pg_class c ON c.oid = i.indexrelid
+                    WHERE c.relname = '{LOW_STOCK_INDEX}' AND NOT i.indisvalid
+                ) THEN
+                    EXECUTE 'DROP INDEX {LOW_STOCK_INDEX}';
+                END IF;
+            END $$
+        """)
+        op.create_index(
+            LOW_STOCK_INDEX, "products", ["stock"],
+            postgresql_where=LOW_STOCK_WHERE, postgresql_concurrently=True, if_not_exists=True
+        )
+
+
+def downgrade() -> None:
+    if op.get_context().dialect.name != "postgresql":
+        op.drop_index(LOW_STOCK_INDEX, table_name="products", if_exists=True)
+    else:
+        with op.get_context().autocommit_block():
+            op.drop_index(LOW_STOCK_INDEX, table_name="products", postgresql_concurrently=True, if_exists=True)
+    with op.batch_alter_table("products") as batch:
+        batch.drop_column("reorder_threshold")
@@ -0,0 +1,41 @@
+"""Date de vente obligatoire
+
+La pagination par curseur compare (date, id) : une vente sans date sortait
+de la comparaison et produisait un curseur indécodable. Les ventes sans date
+reçoivent leur date de dernière modification (ajoutée à l'agrégat journalier,
+dont elles étaient absentes), puis la colonne devient NOT NULL.
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0005"
+down_revision = "0004"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # ON CONFLICT sur un INSERT ... SELECT : "WHERE true" lève l'ambiguïté de syntaxe sous SQLite
+    op.execute("""
+        INSERT INTO sales_daily_rollup (day, product_id, user_id, units, revenue, sales_count)
+        SELECT date(updated_at), product_id, user_id, sum(quantity), sum(total), count(*)
+        FROM sales
+        WHERE date IS NULL AND true
+        GROUP BY date(updated_at), product_id, user_id
+        ON CONFLICT (day, product_id, user_id) DO UPDATE SET
+            units = sales_daily_rollup.units + excluded.units,
+            revenue = sales_daily_rollup.revenue + excluded.revenue,
+            sales_count = sales_daily_rollup.sales_count + excluded.sales_count
+    """)
+    op.execute("UPDATE sales SET date = updated_at WHERE date IS NULL")
+    with op.batch_alter_table("sales") as batch:
+        batch.alter_column("date", existing_type=sa.DateTime(), nullable=False)
+
+
+def downgrade() -> None:
+    with op.batch_alter_table("sales") as batch:
+        batch.alter_column("date", existing_type=sa.DateTime(), nullable=True)
@@ -0,0 +1,35 @@
+"""Date de dernière modification des utilisateurs
+
+Les lignes de vente exposent le nom du vendeur : la version (ETag) de la
+liste des ventes doit changer quand un utilisateur est renommé. La colonne
+est remplie avec l'instant de la migration puis devient NOT NULL ; elle est
+indexée pour que max(updated_at) reste une lecture d'index.
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0006"
+down_revision = "0005"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column("users", sa.Column("updated_at", sa.DateTime(), nullable=True))
+    if op.get_context().dialect.name == "postgresql":
+        op.execute("UPDATE users SET updated_at = now() AT TIME ZONE 'utc'")
+    else:
+        op.execute("UPDATE users SET updated_at = CURRENT_TIMESTAMP")
+    with op.batch_alter_table("users") as batch:
+        batch.alter_column("updated_at", existing_type=sa.DateTime(), nullable=False)
+    op.create_index("ix_users_updated_at", "users", ["updated_at"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_users_updated_at", table_name="users")
+    with op.batch_alter_table("users") as batch:
+        batch.drop_column("updated_at")
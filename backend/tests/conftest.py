@@ -0,0 +1,47 @@
+"""
+Fixtures partagées des tests (lancer depuis backend/ : python -m pytest)
+
+    def test_create_sale_budget(query_counter, db):
+        with query_counter(5):
+            SaleService(SaleDAL(db), ProductDAL(db), UserDAL(db), SalesRollupDAL(db)).create_sale(sale_data)
+"""
+import os
+
+# Base SQLite en mémoire par défaut : les tests ne touchent jamais la base configurée
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+from sqlalchemy.pool import StaticPool
+from app.config import Base
+import app.models  # noqa: F401  (tables déclarées sur Base.metadata)
+from app.utils.query_budget import assert_max_queries, count_queries
+from app.engine_profiles import install_sqlite_functions
+
+
+@pytest.fixture
+def db():
+    """Session sur une base SQLite en mémoire, schéma créé depuis les modèles"""
+    engine = create_engine("sqlite://", poolclass=StaticPool)
+    install_sqlite_functions(engine)
+    Base.metadata.create_all(engine)
+    session = Session(engine)
+    try:
+        yield session
+    finally:
+        session.close()
+        engine.dispose()
+
+
+@pytest.fixture
+def query_counter():
+    """Context manager échouant si le bloc dépasse son budget de requêtes SQL"""
+    return assert_max_queries
+
+
+@pytest.fixture
+def sql_queries():
+    """Compteurs (queries, seconds, statements) de toutes les requêtes SQL du test"""
+    with count_queries(record=True) as stats:
+        yield stats
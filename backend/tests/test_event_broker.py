@@ -0,0 +1,18 @@
+import logging
+from app.utils.event_broker import EventBroker, PostgresEventBroker, build_event_broker
+
+
+def test_postgres_broker_without_direct_url_falls_back_to_memory(caplog):
+    with caplog.at_level(logging.WARNING, logger="app.utils.event_broker"):
+        broker = build_event_broker("postgres", 16, 10, None)
+
+    assert type(broker) is EventBroker
+    assert not broker.uses_notify
+    assert "EVENTS_DATABASE_URL" in caplog.text
+
+
+def test_postgres_broker_listens_on_given_url():
+    broker = build_event_broker("postgres", 16, 10, "postgresql://optic@db-direct:5432/optic")
+
+    assert isinstance(broker, PostgresEventBroker)
+    assert broker.uses_notify
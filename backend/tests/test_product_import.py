@@ -0,0 +1,37 @@
+import io
+from app.dal.product_dal import ProductDAL
+from app.models.product import Product
+from app.services.product_import_service import ProductImportService
+
+
+def import_csv(db, content: str) -> dict:
+    return ProductImportService(ProductDAL(db)).import_file(io.BytesIO(content.encode("utf-8")), "csv")
+
+
+def test_reimport_updates_reorder_threshold(db):
+    header = "reference,nom,prix,stock,reorder_threshold\n"
+    import_csv(db, header + "MON-001,Monture acétate,89.90,12,3\n")
+
+    report = import_csv(db, header + "MON-001,Monture acétate,89.90,12,50\n")
+
+    assert report["error_count"] == 0
+    product = db.query(Product).filter(Product.reference == "MON-001").one()
+    assert product.reorder_threshold == 50
+    assert db.query(Product).count() == 1
+
+
+def test_rows_exceeding_column_limits_are_reported(db):
+    header = "reference,nom,prix,stock\n"
+    rows = (
+        f"MON-001,{'x' * 101},89.90,12\n"
+        f"{'R' * 65},Monture,89.90,12\n"
+        "MON-003,Monture,123456789.00,12\n"
+        "MON-004,Monture acétate,89.90,12\n"
+    )
+
+    report = import_csv(db, header + rows)
+
+    assert report["error_count"] == 3
+    assert [error["line"] for error in report["errors"]] == [2, 3, 4]
+    assert report["imported"] == 1
+    assert db.query(Product).count() == 1
@@ -0,0 +1,91 @@
+"""
+Budgets SQL des routes d'écriture et du tableau de bord (ROUTE_QUERY_BUDGETS)
+
+Les services sont appelés comme par leur route ; un dépassement liste les
+requêtes exécutées. Sous SQLite le NOTIFY des événements n'est pas émis :
+le budget PostgreSQL en prévoit un par transaction d'écriture.
+"""
+import asyncio
+from decimal import Decimal
+import pytest
+from app.dal.product_dal import ProductDAL
+from app.dal.sale_dal import SaleDAL
+from app.dal.rollup_dal import SalesRollupDAL
+from app.dal.user_dal import UserDAL
+from app.dto.sale_dto import SaleBatchCreate, SaleCreate, SaleLine, SaleUpdate
+from app.models.product import Product
+from app.models.user import User
+from app.services.dashboard_service import DashboardService
+from app.services.sale_service import SaleService
+from app.utils.cache import NullCache
+from app.utils.query_budget import ROUTE_QUERY_BUDGETS
+
+
+@pytest.fixture
+def catalog(db):
+    """Un vendeur et deux produits en stock"""
+    user = User(nom="Alice", email="alice@example.com", password="hash")
+    products = [
+        Product(nom="Monture acétate", prix=Decimal("89.90"), stock=50),
+        Product(nom="Verres progressifs", prix=Decimal("240.00"), stock=50),
+    ]
+    db.add_all([user, *products])
+    db.commit()
+    return user.id, [product.id for product in products]
+
+
+@pytest.fixture
+def sale_service(db):
+    return SaleService(SaleDAL(db), ProductDAL(db), UserDAL(db), SalesRollupDAL(db))
+
+
+def test_create_sale_budget(query_counter, sale_service, catalog):
+    user_id, product_ids = catalog
+
+    with query_counter(ROUTE_QUERY_BUDGETS["POST /sales/"]):
+        sale_service.create_sale(SaleCreate(product_id=product_ids[0], user_id=user_id, quantity=2))
+
+
+def test_create_sales_batch_budget(query_counter, sale_service, catalog):
+    user_id, product_ids = catalog
+    batch = SaleBatchCreate(user_id=user_id, items=[
+        SaleLine(product_id=product_ids[0], quantity=1),
+        SaleLine(product_id=product_ids[1], quantity=2),
+        SaleLine(product_id=product_ids[0], quantity=3),
+    ])
+
+    with query_counter(ROUTE_QUERY_BUDGETS["POST /sales/batch"]):
+        sale_service.create_sales_batch(batch)
+
+
+@pytest.mark.parametrize("change_product", [False, True], ids=["quantity", "product"])
+def test_update_sale_budget(query_counter, sale_service, catalog, change_product):
+    user_id, product_ids = catalog
+    sale = sale_service.create_sale(SaleCreate(product_id=product_ids[1], user_id=user_id, quantity=2))
+    # Changement de produit : deux ajustements de stock, le pire cas de la route
+    changes = SaleUpdate(product_id=product_ids[0], quantity=4) if change_product else SaleUpdate(quantity=5)
+
+    with query_counter(ROUTE_QUERY_BUDGETS["PUT /sales/{sale_id}"]):
+        sale_service.update_sale(sale["id"], changes)
+
+
+def test_delete_sale_budget(query_counter, sale_service, catalog):
+    user_id, product_ids = catalog
+    sale = sale_service.create_sale(SaleCreate(product_id=product_ids[0], user_id=user_id, quantity=2))
+
+    with query_counter(ROUTE_QUERY_BUDGETS["DELETE /sales/{sale_id}"]):
+        assert sale_service.delete_sale(sale["id"])
+
+
+def test_dashboard_summary_budget(query_counter, db, sale_service, catalog):
+    user_id, product_ids = catalog
+    sale_service.create_sale(SaleCreate(product_id=product_ids[0], user_id=user_id, quantity=2))
+
+    async def run(fn, *args, **kwargs):
+        # Les quatre agrégats sur la session du test, sans cache
+        return fn(db, *args, **kwargs)
+
+    with query_counter(ROUTE_QUERY_BUDGETS["GET /dashboard/summary"]):
+        summary = asyncio.run(DashboardService(run=run, cache=NullCache()).get_summary())
+
+    assert summary["counts"]["sales"] == 1
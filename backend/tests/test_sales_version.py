@@ -0,0 +1,20 @@
+from decimal import Decimal
+from app.dal.sale_dal import SaleDAL
+from app.dal.user_dal import UserDAL
+from app.models.product import Product
+from app.models.sale import Sale
+from app.models.user import User
+
+
+def test_renaming_seller_changes_sales_version(db):
+    user = User(nom="Alice", email="alice@example.com", password="hash")
+    product = Product(nom="Monture", prix=Decimal("89.90"), stock=10)
+    db.add_all([user, product])
+    db.flush()
+    db.add(Sale(product_id=product.id, user_id=user.id, quantity=1, unit_price=Decimal("89.90"), total=Decimal("89.90")))
+    db.commit()
+    before = SaleDAL(db).get_version()
+
+    UserDAL(db).update_user(user.id, {"nom": "Alice Martin"})
+
+    assert SaleDAL(db).get_version() != before
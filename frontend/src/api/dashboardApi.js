@@ -0,0 +1,15 @@
+import api from './axios';
+
+export const dashboardApi = {
+  // Résumé calculé côté serveur : compteurs, chiffre d'affaires, stock faible, ventes récentes
+  getSummary: async ({ windows = '1,7,30', lowStockLimit = 10, recentLimit = 5 } = {}) => {
+    const response = await api.get('/dashboard/summary', {
+      params: {
+        windows,
+        low_stock_limit: lowStockLimit,
+        recent_limit: recentLimit,
+      },
+    });
+    return response.data;
+  },
+};
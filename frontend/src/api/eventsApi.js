@@ -0,0 +1,27 @@
+import api from './axios';
+
+// Flux Server-Sent Events des changements (stocks, produits, ventes) : remplace le rechargement périodique.
+// handlers : { stock, product, product_deleted, catalogue, sale, resync } ; "ready" (chaque (re)connexion)
+// et "resync" (événements perdus) signalent que l'état affiché doit être rechargé.
+export const subscribeEvents = (handlers, types = null) => {
+  const url = new URL('/events', api.defaults.baseURL);
+  if (types) {
+    url.searchParams.set('types', types.join(','));
+  }
+  const source = new EventSource(url);
+  let connected = false;
+
+  source.addEventListener('ready', () => {
+    // Première connexion : l'état vient d'être chargé ; reconnexion : des événements ont pu être manqués
+    if (connected) {
+      handlers.resync?.();
+    }
+    connected = true;
+  });
+
+  Object.entries(handlers).forEach(([type, handler]) => {
+    source.addEventListener(type, (event) => handler(JSON.parse(event.data)));
+  });
+
+  return () => source.close();
+};
@@ -6,6 +6,12 @@ export const productApi = {
     return response.data;
   },
 
+  // Produits à réapprovisionner (stock <= seuil), les plus urgents d'abord
+  getLowStock: async (limit = 100) => {
+    const response = await api.get(`/products/low-stock?limit=${limit}`);
+    return response.data;
+  },
+
   getProductById: async (id) => {
     const response = await api.get(`/products/${id}`);
     return response.data;
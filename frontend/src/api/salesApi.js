@@ -6,6 +6,12 @@ export const salesApi = {
     return response.data;
   },
 
+  // Panier : plusieurs lignes { product_id, quantity } enregistrées en une requête
+  createSalesBatch: async (userId, items) => {
+    const response = await api.post('/sales/batch', { user_id: userId, items });
+    return response.data;
+  },
+
   getSaleById: async (id) => {
     const response = await api.get(`/sales/${id}`);
     return response.data;
@@ -51,4 +57,29 @@ export const salesApi = {
     const response = await api.get(url);
     return response.data;
   },
-};
\ No newline at end of file
+
+  getSeries: async ({ bucket = 'day', start, end, tz, productId, userId } = {}) => {
+    const params = { bucket };
+    if (start) params.start_date = start;
+    if (end) params.end_date = end;
+    if (tz) params.tz = tz;
+    if (productId) params.product_id = productId;
+    if (userId) params.user_id = userId;
+    const response = await api.get('/sales/stats/series', { params });
+    return response.data;
+  },
+
+  getTopProducts: async ({ days = 30, limit = 10, rankBy = 'units' } = {}) => {
+    const response = await api.get('/sales/stats/top-products', {
+      params: { days, limit, rank_by: rankBy },
+    });
+    return response.data;
+  },
+
+  getTopSellers: async ({ days = 30, limit = 10, rankBy = 'revenue' } = {}) => {
+    const response = await api.get('/sales/stats/top-sellers', {
+      params: { days, limit, rank_by: rankBy },
+    });
+    return response.data;
+  },
+};
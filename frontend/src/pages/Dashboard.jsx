@@ -2,9 +2,8 @@ import { useEffect, useState } from 'react';
 import { Package, ShoppingCart, Users, DollarSign, TrendingUp, AlertTriangle, Activity, ArrowUpRight } from 'lucide-react';
 import Navbar from '../components/Navbar';
 import Sidebar from '../components/Sidebar';
-import { productApi } from '../api/productApi';
-import { salesApi } from '../api/salesApi';
-import { authApi } from '../api/authApi';
+import { dashboardApi } from '../api/dashboardApi';
+import { subscribeEvents } from '../api/eventsApi';
 import { formatPrice, formatDate } from '../utils/helpers';
 import './dashboard.css';
 
@@ -14,6 +13,7 @@ const Dashboard = () => {
     totalSales: 0,
     totalUsers: 0,
     totalRevenue: 0,
+    lowStockCount: 0,
   });
   const [recentSales, setRecentSales] = useState([]);
   const [lowStockProducts, setLowStockProducts] = useState([]);
@@ -22,23 +22,19 @@ const Dashboard = () => {
   useEffect(() => {
     const fetchStats = async () => {
       try {
-        const [products, sales, users, revenue] = await Promise.all([
-          productApi.getAllProducts(),
-          salesApi.getAllSales(),
-          authApi.getUsers(),
-          salesApi.getTotalAmount(),
-        ]);
+        // Une seule requête : agrégats calculés en base, quelques Ko quel que soit le volume
+        const summary = await dashboardApi.getSummary();
 
         setStats({
-          totalProducts: products.length,
-          totalSales: sales.length,
-          totalUsers: users.length,
-          totalRevenue: revenue.total_amount || 0,
+          totalProducts: summary.counts.products,
+          totalSales: summary.counts.sales,
+          totalUsers: summary.counts.users,
+          totalRevenue: summary.revenue.total_amount || 0,
+          lowStockCount: summary.counts.low_stock,
         });
 
-        setRecentSales(sales.slice(0, 5));
-        const lowStock = products.filter((p) => p.stock < 20);
-        setLowStockProducts(lowStock);
+        setRecentSales(summary.recent_sales);
+        setLowStockProducts(summary.low_stock);
       } catch (error) {
         console.error('Erreur lors du chargement des stats:', error);
       } finally {
@@ -47,6 +43,29 @@ const Dashboard = () => {
     };
 
     fetchStats();
+
+    // Résumé rechargé au plus une fois par seconde quand des ventes ou des stocks changent
+    let timer = null;
+    const refresh = () => {
+      if (!timer) {
+        timer = setTimeout(() => {
+          timer = null;
+          fetchStats();
+        }, 1000);
+      }
+    };
+    const unsubscribe = subscribeEvents({
+      sale: refresh,
+      stock: refresh,
+      product: refresh,
+      product_deleted: refresh,
+      catalogue: refresh,
+      resync: refresh,
+    });
+    return () => {
+      clearTimeout(timer);
+      unsubscribe();
+    };
   }, []);
 
   if (loading) {
@@ -229,7 +248,7 @@ const Dashboard = () => {
                   <h2 style={{ fontSize: '20px', fontWeight: '700', color: '#1a202c' }}>Stock faible</h2>
                 </div>
                 <span style={{ fontSize: '12px', fontWeight: '600', color: '#ed8936', background: 'rgba(237, 137, 54, 0.1)', padding: '4px 12px', borderRadius: '20px' }}>
-                  {lowStockProducts.length} alertes
+                  {stats.lowStockCount} alertes
                 </span>
               </div>
 
@@ -251,7 +270,7 @@ const Dashboard = () => {
                         </div>
                         <div>
                           <p style={{ fontWeight: '600', color: '#2d3748' }}>{product.nom}</p>
-                          <p style={{ fontSize: '14px', color: '#718096' }}>Prix: <span style={{ fontWeight: '500' }}>{formatPrice(product.prix)}</span></p>
+                          <p style={{ fontSize: '14px', color: '#718096' }}>Prix: <span style={{ fontWeight: '500' }}>{formatPrice(product.prix)}</span> · Seuil: <span style={{ fontWeight: '500' }}>{product.reorder_threshold}</span></p>
                         </div>
                       </div>
                       <span style={{ display: 'inline-flex', alignItems: 'center', padding: '4px 12px', borderRadius: '20px', fontSize: '12px', fontWeight: '600', background: product.stock === 0 ? 'rgba(245, 101, 101, 0.1)' : 'rgba(237, 137, 54, 0.1)', color: product.stock === 0 ? '#f56565' : '#ed8936' }}>
@@ -3,6 +3,7 @@ import { Plus, Search, Edit, Trash2, Package, AlertCircle, CheckCircle, X } from
 import Navbar from '../components/Navbar';
 import Sidebar from '../components/Sidebar';
 import { productApi } from '../api/productApi';
+import { subscribeEvents } from '../api/eventsApi';
 import { formatPrice, getStockStatus } from '../utils/helpers';
 import './dashboard.css';
 
@@ -17,6 +18,7 @@ const Products = () => {
     nom: '',
     prix: '',
     stock: '',
+    reorder_threshold: '20',
     image_url: '',
   });
   const [error, setError] = useState('');
@@ -26,6 +28,20 @@ const Products = () => {
     fetchProducts();
   }, []);
 
+  // Stocks et fiches mis à jour en direct (ventes des autres caisses, modifications)
+  useEffect(() => {
+    const updateProduct = (id, changes) =>
+      setProducts((current) => current.map((p) => (p.id === id ? { ...p, ...changes } : p)));
+
+    return subscribeEvents({
+      stock: ({ product_id, stock }) => updateProduct(product_id, { stock }),
+      product: ({ type, ...product }) => updateProduct(product.id, product),
+      product_deleted: ({ id }) => setProducts((current) => current.filter((p) => p.id !== id)),
+      catalogue: () => fetchProducts(),
+      resync: () => fetchProducts(),
+    }, ['stock', 'product', 'product_deleted', 'catalogue']);
+  }, []);
+
   useEffect(() => {
     if (searchTerm.trim() === '') {
       setFilteredProducts(products);
@@ -58,11 +74,12 @@ const Products = () => {
         nom: product.nom,
         prix: product.prix,
         stock: product.stock,
+        reorder_threshold: product.reorder_threshold ?? 20,
         image_url: product.image_url || '',
       });
     } else {
       setEditingProduct(null);
-      setFormData({ nom: '', prix: '', stock: '', image_url: '' });
+      setFormData({ nom: '', prix: '', stock: '', reorder_threshold: '20', image_url: '' });
     }
     setIsModalOpen(true);
     setError('');
@@ -72,7 +89,7 @@ const Products = () => {
   const handleCloseModal = () => {
     setIsModalOpen(false);
     setEditingProduct(null);
-    setFormData({ nom: '', prix: '', stock: '', image_url: '' });
+    setFormData({ nom: '', prix: '', stock: '', reorder_threshold: '20', image_url: '' });
     setError('');
     setSuccess('');
   };
@@ -87,6 +104,7 @@ const Products = () => {
         nom: formData.nom,
         prix: parseFloat(formData.prix),
         stock: parseInt(formData.stock),
+        reorder_threshold: parseInt(formData.reorder_threshold),
         image_url: formData.image_url || null,
       };
 
@@ -224,7 +242,7 @@ const Products = () => {
           ) : (
             <div style={{ display: 'grid', gridTemplateColumns: 'repeat(auto-fill, minmax(300px, 1fr))', gap: '24px' }}>
               {filteredProducts.map((product) => {
-                const status = getStockStatus(product.stock);
+                const status = getStockStatus(product.stock, product.reorder_threshold);
                 const statusColors = {
                   red: { bg: 'rgba(245, 101, 101, 0.1)', text: '#f56565', border: 'rgba(245, 101, 101, 0.3)' },
                   orange: { bg: 'rgba(237, 137, 54, 0.1)', text: '#ed8936', border: 'rgba(237, 137, 54, 0.3)' },
@@ -346,6 +364,20 @@ const Products = () => {
                 </div>
               </div>
 
+              <div className="form-group">
+                <label className="form-label">Seuil de réapprovisionnement *</label>
+                <input
+                  type="number"
+                  min="0"
+                  value={formData.reorder_threshold}
+                  onChange={(e) => setFormData({ ...formData, reorder_threshold: e.target.value })}
+                  className="form-input"
+                  placeholder="20"
+                  required
+                />
+                <p className="input-hint">Le produit passe en stock faible quand son stock atteint ce seuil</p>
+              </div>
+
               <div className="form-group">
                 <label className="form-label">URL de l'image (optionnel)</label>
                 <input
@@ -29,10 +29,10 @@ export const isValidEmail = (email) => {
   return regex.test(email);
 };
 
-// Calculer le statut du stock
-export const getStockStatus = (stock) => {
+// Calculer le statut du stock (faible : au seuil de réapprovisionnement du produit ou en dessous)
+export const getStockStatus = (stock, reorderThreshold = 20) => {
   if (stock === 0) return { label: 'Rupture', color: 'red' };
-  if (stock < 10) return { label: 'Faible', color: 'orange' };
+  if (stock <= reorderThreshold) return { label: 'Faible', color: 'orange' };
   if (stock < 50) return { label: 'Moyen', color: 'yellow' };
   return { label: 'Bon', color: 'green' };
 };
\ No newline at end of file